@@ -16,6 +16,7 @@ from .models import (
 class PropertyImageInline(admin.TabularInline):
     model = PropertyImage
     extra = 1
+    readonly_fields = ('thumbnail', 'card', 'full', 'webp')
 
 class PropertyDocumentInline(admin.TabularInline):
     model = PropertyDocument
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class HouseAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'house_app'
+
+    def ready(self):
+        # Receivers run in the order their modules are imported: saved
+        # searches are matched against the search index, and cached responses
+        # are dropped once what they show has been updated.
+        from .signals import (  # noqa: F401
+            geography, geo, location, sellers, search, market, saved_searches, conditional, images, media,
+            uploads, authentication, response_cache,
+        )
@@ -0,0 +1,152 @@
+"""
+Async (ASGI) variants of the public read endpoints.
+
+They answer like their DRF counterparts in views.py but are plain async
+Django views that go through the async ORM, so under an ASGI server a
+single worker can keep many slow clients waiting on I/O without holding
+a thread for each. Authentication is not needed: every endpoint here is
+AllowAny in the sync API as well.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.request import Request
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .cache import aget_geography_version, aget_property_list_state, get_geography_cache, get_geography_cache_key, get_geography_timeout
+from .conditional import is_not_modified, make_etag, not_modified, set_validators
+from .models import Property
+from .pagination import PropertyPageNumberPagination
+from .renderers import ORJSONRenderer
+from .serializers import PropertyListingSerializer, PropertySerializer, RegionSerializer, ReviewSerializer
+from .views import PropertyDetailView, PropertyListView, RegionViewSet, ReviewListView
+
+
+class AsyncReadView(View):
+    http_method_names = ['get', 'head', 'options']
+    renderer = ORJSONRenderer()
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except Http404 as exc:
+            return self.render({'detail': str(exc) or NotFound.default_detail}, 404)
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+            return self.render(detail, exc.status_code)
+
+    def render(self, data, status=200):
+        return HttpResponse(self.renderer.render(data), content_type=self.renderer.media_type, status=status)
+
+    def get_serializer_context(self):
+        return {'request': self.request}
+
+    async def aget_object_or_404(self, queryset, **kwargs):
+        try:
+            return await queryset.aget(**kwargs)
+        except queryset.model.DoesNotExist:
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+
+    def get_sync_view(self, view_class, **kwargs):
+        """An instance of the DRF view to reuse its queryset and filter setup."""
+        view = view_class(**kwargs)
+        view.request = Request(self.request)
+        view.format_kwarg = None
+        view.args, view.kwargs = self.args, self.kwargs
+        return view
+
+
+class AsyncPropertyListView(AsyncReadView):
+    """PropertyListView with page-number pagination; cursor pagination and facets stay on the sync view."""
+    pagination_class = PropertyPageNumberPagination
+
+    def get_queryset(self):
+        # django-filter validates model choices with a query, so this runs in a thread.
+        view = self.get_sync_view(PropertyListView)
+        return view.filter_queryset(view.get_queryset())
+
+    async def get(self, request, *args, **kwargs):
+        state = await aget_property_list_state()
+        etag = make_etag(*state, await aget_geography_version(), request.get_full_path(), 'json')
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+        queryset = await sync_to_async(self.get_queryset)()
+        count = await queryset.acount()
+
+        paginator = self.pagination_class()
+        try:
+            page = int(request.GET.get(paginator.page_query_param, 1))
+        except ValueError:
+            page = 0
+        offset = (page - 1) * paginator.page_size
+        if page < 1 or (offset and offset >= count):
+            raise NotFound(paginator.invalid_page_message.format(page_number=page, message='That page contains no results'))
+
+        rows = PropertyListingSerializer.prepare_queryset(queryset)[offset:offset + paginator.page_size]
+        results = await PropertyListingSerializer(rows, many=True, context=self.get_serializer_context()).adata()
+
+        url = request.build_absolute_uri()
+        next_link = previous_link = None
+        if offset + paginator.page_size < count:
+            next_link = replace_query_param(url, paginator.page_query_param, page + 1)
+        if page == 2:
+            previous_link = remove_query_param(url, paginator.page_query_param)
+        elif page > 2:
+            previous_link = replace_query_param(url, paginator.page_query_param, page - 1)
+        data = {'count': count, 'next': next_link, 'previous': previous_link, 'results': results}
+        return set_validators(self.render(data), etag)
+
+
+class AsyncPropertyDetailView(AsyncReadView):
+
+    async def get(self, request, pk, *args, **kwargs):
+        updated_at = await Property.objects.filter(pk=pk).values_list('updated_at', flat=True).afirst()
+        if updated_at is None:
+            raise Http404(f'No {Property._meta.object_name} matches the given query.')
+        geography_version = await aget_geography_version()
+        etag = make_etag(updated_at, geography_version, request.get_full_path(), 'json')
+        last_modified = max(int(updated_at.timestamp()), geography_version // 10 ** 9)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+
+        instance = await self.aget_object_or_404(PropertyDetailView.queryset, pk=pk)
+        data = PropertySerializer(instance, context=self.get_serializer_context()).data
+        return set_validators(self.render(data), etag, last_modified)
+
+
+class AsyncRegionView(AsyncReadView):
+    """RegionViewSet list (no ``pk``) and retrieve, sharing its version-keyed cache policy."""
+
+    async def get(self, request, pk=None, *args, **kwargs):
+        version = await aget_geography_version()
+        etag = f'geo-{version}-json'
+        last_modified = version // 10 ** 9
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+
+        cache = get_geography_cache()
+        key = get_geography_cache_key(request, version, 'async-json')
+        content = await cache.aget(key)
+        if content is None:
+            queryset = RegionViewSet.queryset
+            if pk is None:
+                data = RegionSerializer([region async for region in queryset], many=True).data
+            else:
+                data = RegionSerializer(await self.aget_object_or_404(queryset, pk=pk)).data
+            content = self.renderer.render(data)
+            await cache.aset(key, content, get_geography_timeout())
+        response = HttpResponse(content, content_type=self.renderer.media_type)
+        return set_validators(response, etag, last_modified)
+
+
+class AsyncReviewListView(AsyncReadView):
+    chunk_size = 500
+
+    def get_queryset(self):
+        return self.get_sync_view(ReviewListView).get_queryset()
+
+    async def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        reviews = [review async for review in queryset.aiterator(chunk_size=self.chunk_size)]
+        return self.render(ReviewSerializer(reviews, many=True, context=self.get_serializer_context()).data)
@@ -0,0 +1,86 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class UserCache:
+    """
+    Process-local LRU of authenticated users with a short TTL.
+
+    Entries are dropped on UserProfile save/delete and on logout in this
+    process; other processes see the change once the TTL runs out.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_timeout(self):
+        return getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 30)
+
+    def get_max_size(self):
+        return getattr(settings, 'AUTH_USER_CACHE_SIZE', 1024)
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            expires, user = entry
+            if expires < time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+        # Each request gets its own copy, so related objects it caches or
+        # attributes it sets never leak into other requests.
+        return copy.copy(user)
+
+    def set(self, user_id, user):
+        timeout = self.get_timeout()
+        if timeout <= 0:
+            return
+        with self.lock:
+            self.entries[user_id] = (time.monotonic() + timeout, copy.copy(user))
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.get_max_size():
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves the token's user through ``user_cache``."""
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = user_cache.get(str(user_id)) if user_id is not None else None
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(str(user_id), user)
+            return user
+
+        # The checks super().get_user() runs after loading the user.
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+        ):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
@@ -0,0 +1,178 @@
+from collections import namedtuple
+from functools import cached_property
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models.deletion import Collector
+from django.utils import timezone
+from modeltranslation.utils import build_localized_fieldname, get_language
+
+from .geo import get_property_geohash
+from .models import Region, City, District, Property, SellerStats, get_location_path
+from .serializers import PropertyBatchItemSerializer
+from .signals import properties_bulk_deleted, properties_bulk_saved
+from .signals.market import get_market_state
+
+
+BatchResult = namedtuple('BatchResult', ['created', 'updated', 'deleted'])
+
+GEOGRAPHY_MODELS = {'region': Region, 'city': City, 'district': District}
+TRANSLATED_FIELDS = ('title', 'description')
+
+
+def get_max_items():
+    return getattr(settings, 'PROPERTY_BATCH_MAX_ITEMS', 1000)
+
+
+class PropertyBatch:
+    """
+    Validate and apply a batch of property creates, updates and deletes.
+
+    Items are checked with PropertyBatchItemSerializer against geography
+    loaded with one ``IN`` query per model, and existing rows are loaded
+    with one query. Nothing is written unless every item is valid; then
+    all changes go through bulk_create/bulk_update and one collected
+    delete in one transaction.
+    """
+
+    def __init__(self, user, request=None):
+        self.user = user
+        self.request = request
+        self.errors = {}
+
+    def preload_geography(self, items):
+        ids = {name: set() for name in GEOGRAPHY_MODELS}
+        for item in items:
+            for name in GEOGRAPHY_MODELS:
+                value = item.get(name) if isinstance(item, dict) else None
+                if isinstance(value, int) and not isinstance(value, bool):
+                    ids[name].add(value)
+                elif isinstance(value, str) and value.isdigit():
+                    ids[name].add(int(value))
+        return {
+            model: model.objects.in_bulk(ids[name]) if ids[name] else {}
+            for name, model in GEOGRAPHY_MODELS.items()
+        }
+
+    def load_owned(self, pks):
+        properties = Property.objects.select_related('city', 'district').in_bulk(pks) if pks else {}
+        if self.user.role != 'ADMIN':
+            properties = {pk: prop for pk, prop in properties.items() if prop.seller_id == self.user.pk}
+        return properties
+
+    def get_pk(self, item):
+        value = item.get('id') if isinstance(item, dict) else item
+        if isinstance(value, bool):
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def validate(self, create, update, delete):
+        """Return ``(new instances, (instance, changed fields) pairs, instances to delete)`` and fill ``errors``."""
+        context = {'request': self.request, 'preloaded': self.preload_geography(create + update)}
+        existing = self.load_owned({pk for pk in map(self.get_pk, update + delete) if pk is not None})
+
+        new, create_errors = [], []
+        for item in create:
+            serializer = PropertyBatchItemSerializer(data=item, context=context)
+            if serializer.is_valid():
+                new.append(self.build(serializer.validated_data))
+                create_errors.append({})
+            else:
+                create_errors.append(serializer.errors)
+
+        changed, update_errors, seen = [], [], set()
+        for item in update:
+            pk = self.get_pk(item)
+            instance = existing.get(pk)
+            if instance is None or pk in seen:
+                update_errors.append({'id': ['Not found.' if pk not in seen else 'Listed more than once.']})
+                continue
+            seen.add(pk)
+            serializer = PropertyBatchItemSerializer(instance, data=item, partial=True, context=context)
+            if serializer.is_valid():
+                changed.append((instance, serializer.validated_data))
+                update_errors.append({})
+            else:
+                update_errors.append(serializer.errors)
+
+        deleted, delete_errors = [], []
+        for item in delete:
+            pk = self.get_pk(item)
+            if pk not in existing or pk in seen:
+                delete_errors.append({'id': ['Not found.' if pk not in seen else 'Listed more than once.']})
+                continue
+            seen.add(pk)
+            deleted.append(existing[pk])
+            delete_errors.append({})
+
+        for name, errors in (('create', create_errors), ('update', update_errors), ('delete', delete_errors)):
+            if any(errors):
+                self.errors[name] = errors
+        return new, changed, deleted
+
+    @cached_property
+    def seller_rating(self):
+        return SellerStats.objects.get_rating(self.user.pk)
+
+    def build(self, validated_data):
+        instance = Property(seller=self.user, seller_rating=self.seller_rating, **validated_data)
+        instance.geohash = get_property_geohash(instance.latitude, instance.longitude)
+        instance.location_path = get_location_path(instance.region_id, instance.city_id, instance.district_id)
+        return instance
+
+    def apply_changes(self, changed):
+        """Set the validated values and return the column names bulk_update has to write."""
+        language = get_language()
+        fields = {'updated_at', 'geohash', 'location_path'}
+        now = timezone.now()
+        for instance, validated_data in changed:
+            # Read by the properties_bulk_saved receivers to refresh what the row left.
+            instance._previous_market_state = get_market_state(instance)
+            for name, value in validated_data.items():
+                setattr(instance, name, value)
+                fields.add(name)
+                if name in TRANSLATED_FIELDS:
+                    fields.add(build_localized_fieldname(name, language))
+            instance.geohash = get_property_geohash(instance.latitude, instance.longitude)
+            instance.location_path = get_location_path(instance.region_id, instance.city_id, instance.district_id)
+            instance.updated_at = now
+        return sorted(fields)
+
+    def run(self, create=(), update=(), delete=()):
+        create, update, delete = list(create), list(update), list(delete)
+        new, changed, deleted = self.validate(create, update, delete)
+        if self.errors:
+            return None
+
+        with transaction.atomic():
+            if new:
+                new = Property.objects.bulk_create(new)
+                properties_bulk_saved.send(sender=Property, instances=new, created=True)
+            if changed:
+                fields = self.apply_changes(changed)
+                instances = [instance for instance, validated_data in changed]
+                Property.objects.bulk_update(instances, fields)
+                properties_bulk_saved.send(sender=Property, instances=instances, created=False)
+            if deleted:
+                self.delete(deleted)
+        return BatchResult(
+            created=[instance.pk for instance in new],
+            updated=[instance.pk for instance, validated_data in changed],
+            deleted=[instance.pk for instance in deleted],
+        )
+
+    def delete(self, instances):
+        pks = [instance.pk for instance in instances]
+        for instance in instances:
+            instance._bulk_deleted = True
+        # Collecting the loaded instances hands them to post_delete, so the
+        # per-row receivers can skip what properties_bulk_deleted does once.
+        collector = Collector(using=router.db_for_write(Property))
+        collector.collect(instances)
+        collector.delete()
+        for instance, pk in zip(instances, pks):
+            instance.pk = pk
+        properties_bulk_deleted.send(sender=Property, instances=instances)
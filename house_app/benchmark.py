@@ -0,0 +1,431 @@
+import json
+import math
+import random
+import time
+from collections import namedtuple
+from decimal import Decimal
+
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import translation
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import (
+    UserProfile,
+    Region,
+    City,
+    District,
+    Property,
+    PropertyImage,
+    PropertyDocument,
+    Review,
+    SellerStats,
+    MarketStats,
+    PropertyUpload,
+    SavedSearch,
+    get_location_path
+)
+from .geo import get_property_geohash
+from .images import EXTENSIONS, IMAGE_VARIANTS
+from .search import get_search_backend
+from .uploads import get_part_name, get_storage
+from .renderers import MessagePackRenderer, ORJSONRenderer
+from .serializers import PropertyListSerializer, PropertyListingSerializer, PropertySerializer, RegionSerializer
+
+
+DEFAULT_SIZES = {
+    'regions': 3,
+    'cities': 4,
+    'districts': 3,
+    'sellers': 10,
+    'properties': 200,
+    'images': 3,
+    'documents': 1,
+    'reviews': 100,
+}
+
+Dataset = namedtuple('Dataset', ['admin', 'seller', 'buyer', 'region', 'city', 'district', 'property'])
+
+# name, method, url kwargs, request data, authenticated role, max queries and,
+# for non-JSON bodies, the content type of the already encoded data.
+# Query bounds do not depend on the dataset size, so N+1 regressions fail them.
+# They are measured with cold process-local caches, so geography-versioned
+# routes include the read of the shared geography version.
+Route = namedtuple('Route', ['name', 'method', 'kwargs', 'data', 'user', 'max_queries', 'content_type'], defaults=[None])
+
+ROUTES = [
+    Route('api-root', 'get', None, None, 'buyer', 1),
+    Route('region-list', 'get', None, None, None, 4),
+    Route('region-detail', 'get', lambda ds: {'pk': ds.region.pk}, None, None, 4),
+    Route('city-list', 'get', None, lambda ds: {'region': ds.region.pk}, None, 3),
+    Route('city-detail', 'get', lambda ds: {'pk': ds.city.pk}, None, None, 3),
+    Route('district-list', 'get', None, lambda ds: {'city': ds.city.pk}, None, 2),
+    Route('district-detail', 'get', lambda ds: {'pk': ds.district.pk}, None, None, 2),
+    Route('register', 'post', None, lambda ds: _register_payload(), None, 3),
+    Route('login', 'post', None, lambda ds: {'username': ds.buyer.username, 'password': 'benchmark-pass'}, None, 2),
+    Route('logout', 'post', None, lambda ds: {'refresh': str(RefreshToken.for_user(ds.buyer))}, 'buyer', 8),
+    Route('user-list', 'get', None, None, 'admin', 2),
+    Route('user-me', 'get', None, None, 'buyer', 2),
+    Route('property-list', 'get', None, None, None, 7),
+    Route('property-list', 'get', None, lambda ds: {
+        'city': ds.city.pk, 'ordering': '-price', 'pagination': 'cursor',
+    }, None, 7),
+    Route('property-list', 'get', None, lambda ds: {'search': ds.property.title.split()[0]}, None, 7),
+    Route('property-list', 'get', None, lambda ds: {'ordering': '-seller_rating'}, None, 7),
+    Route('property-list', 'get', None, lambda ds: {'facets': 'true'}, None, 10),
+    Route('property-list', 'get', None, lambda ds: {
+        'facets': 'true', 'property_type': 'house', 'price__gte': 100000, 'search': ds.property.title.split()[0],
+    }, None, 12),
+    Route('property-list', 'get', None, lambda ds: {'bbox': '74.5,42.75,74.7,42.9'}, None, 7),
+    Route('property-list', 'get', None, lambda ds: {'near': '42.85,74.6', 'radius': 5}, None, 7),
+    Route('property-list', 'get', None, lambda ds: {'region': ds.region.pk}, None, 7),
+    Route('property-list', 'get', None, lambda ds: {
+        'cities': f'{ds.city.pk},{ds.city.pk + 1}', 'districts': ds.district.pk,
+    }, None, 7),
+    Route('property-clusters', 'get', None, lambda ds: {'bbox': '74.4,42.6,74.8,43.0', 'zoom': 12}, None, 1),
+    Route('property-detail', 'get', lambda ds: {'pk': ds.property.pk}, None, None, 5),
+    Route('property-export', 'get', None, lambda ds: {'city': ds.city.pk, 'ordering': '-price'}, None, 2),
+    Route('property-export', 'get', None, lambda ds: {'search': ds.property.title.split()[0], 'output': 'csv'}, None, 1),
+    Route('market-stats', 'get', None, lambda ds: {'city': ds.city.pk, 'district__isnull': 'true'}, None, 3),
+    Route('property-import', 'post', None, lambda ds: _import_payload(ds, 50), 'admin', 12, 'application/x-ndjson'),
+    Route('property-batch', 'post', None, lambda ds: _batch_payload(ds, 10), 'admin', 36),
+    Route('upload-create', 'post', None, lambda ds: {
+        'property': ds.property.pk, 'kind': 'document', 'filename': 'scan.pdf', 'size': 20 * 1024 * 1024,
+    }, 'admin', 3),
+    Route('upload-detail', 'get', lambda ds: {'pk': _upload(ds, parts=2).pk}, None, 'admin', 2),
+    Route('upload-part', 'put', lambda ds: {'pk': _upload(ds).pk, 'index': 0}, lambda ds: b'%' * 1024, 'admin', 3,
+          'application/octet-stream'),
+    Route('upload-complete', 'post', lambda ds: {'pk': _upload(ds, parts=3).pk}, None, 'admin', 8),
+    Route('saved-search-list', 'get', None, None, 'buyer', 1),
+    Route('saved-search-list', 'post', None, lambda ds: _saved_search_payload(ds), 'buyer', 6),
+    Route('saved-search-detail', 'get', lambda ds: {'pk': _saved_search(ds).pk}, None, 'buyer', 1),
+    Route('saved-search-matches', 'get', None, lambda ds: {'after': 0, 'saved_search': _saved_search(ds).pk}, 'buyer', 1),
+    Route('sql-profile', 'get', None, None, 'admin', 1),
+    Route('review-list', 'get', None, lambda ds: {'seller': ds.seller.pk}, None, 1),
+    Route('async-property-list', 'get', None, lambda ds: {'city': ds.city.pk, 'page': 2}, None, 8),
+    Route('async-property-detail', 'get', lambda ds: {'pk': ds.property.pk}, None, None, 5),
+    Route('async-region-list', 'get', None, None, None, 4),
+    Route('async-region-detail', 'get', lambda ds: {'pk': ds.region.pk}, None, None, 4),
+    Route('async-review-list', 'get', None, lambda ds: {'seller': ds.seller.pk}, None, 1),
+    Route('review-create', 'post', None, lambda ds: {
+        'seller_id': ds.seller.pk, 'rating': 5, 'comment': 'Benchmark review',
+    }, 'buyer', 9),
+]
+
+WORDS = ['sunny', 'quiet', 'spacious', 'central', 'modern', 'cozy', 'renovated', 'family', 'garden', 'view']
+
+
+def seed_dataset(sizes=None, seed=0):
+    """Create a synthetic catalogue with ``bulk_create`` and return handles to sample rows."""
+    sizes = {**DEFAULT_SIZES, **(sizes or {})}
+    rng = random.Random(seed)
+
+    admin = UserProfile.objects.create_user('bench-admin', password='benchmark-pass', phone_number='+996700000000', role='ADMIN')
+    buyer = UserProfile.objects.create_user('bench-buyer', password='benchmark-pass', phone_number='+996700000001', role='GUEST')
+    sellers = UserProfile.objects.bulk_create([
+        UserProfile(username=f'bench-seller-{i}', phone_number=f'+99677{i:07d}', role='seller')
+        for i in range(sizes['sellers'])
+    ])
+
+    regions = Region.objects.bulk_create([Region(name=f'Region {i}') for i in range(sizes['regions'])])
+    cities = City.objects.bulk_create([
+        City(region=region, name=f'City {region.pk}-{i}')
+        for region in regions for i in range(sizes['cities'])
+    ])
+    districts = District.objects.bulk_create([
+        District(city=city, name=f'District {city.pk}-{i}')
+        for city in cities for i in range(sizes['districts'])
+    ])
+    districts_by_city = {}
+    for district in districts:
+        districts_by_city.setdefault(district.city_id, []).append(district)
+
+    properties = []
+    for i in range(sizes['properties']):
+        city = rng.choice(cities)
+        words = rng.sample(WORDS, 3)
+        latitude, longitude = rng.uniform(42.7, 42.95), rng.uniform(74.45, 74.75)
+        properties.append(Property(
+            title_en=' '.join(words).capitalize(),
+            title_ru=f'Объект {i}',
+            description_en=' '.join(rng.choice(WORDS) for _ in range(30)),
+            description_ru='Описание объекта',
+            property_type=rng.choice(Property.PROPERTY_TYPE_CHOICES)[0],
+            region_id=city.region_id,
+            city=city,
+            district=rng.choice(districts_by_city.get(city.pk, [None])),
+            address=f'{rng.randint(1, 200)} {rng.choice(WORDS).capitalize()} street',
+            latitude=latitude,
+            longitude=longitude,
+            geohash=get_property_geohash(latitude, longitude),
+            area=round(rng.uniform(20, 300), 1),
+            price=Decimal(rng.randint(10_000, 500_000)),
+            rooms=rng.randint(1, 6),
+            floor=rng.randint(1, 9),
+            total_floors=rng.randint(9, 16),
+            seller=rng.choice(sellers),
+        ))
+    for prop in properties:
+        prop.location_path = get_location_path(prop.region_id, prop.city_id, prop.district_id)
+    properties = Property.objects.bulk_create(properties)
+
+    # The last image of every property is left unprocessed, as if still queued.
+    PropertyImage.objects.bulk_create([
+        PropertyImage(property=prop, image=f'property/images/bench-{prop.pk}-{i}.jpg', **({
+            name: f'property/images/variants/bench-{prop.pk}-{i}-{name}.{EXTENSIONS[variant.format]}'
+            for name, variant in IMAGE_VARIANTS.items()
+        } if i < sizes['images'] - 1 else {}))
+        for prop in properties for i in range(sizes['images'])
+    ])
+    PropertyDocument.objects.bulk_create([
+        PropertyDocument(property=prop, file=f'property/documents/bench-{prop.pk}-{i}.pdf')
+        for prop in properties for i in range(sizes['documents'])
+    ])
+    Review.objects.bulk_create([
+        Review(author=buyer, seller=rng.choice(sellers), rating=rng.randint(1, 5), comment='Benchmark review')
+        for _ in range(sizes['reviews'])
+    ])
+
+    SellerStats.objects.rebuild()
+    MarketStats.objects.rebuild()
+    backend = get_search_backend()
+    if backend is not None:
+        backend.rebuild()
+
+    sample = properties[0]
+    return Dataset(
+        admin=admin,
+        seller=sample.seller,
+        buyer=buyer,
+        region=sample.city.region,
+        city=sample.city,
+        district=districts_by_city[sample.city_id][0] if sample.city_id in districts_by_city else None,
+        property=sample,
+    )
+
+
+def _register_payload():
+    # UserRegisterSerializer leaves the unique phone_number blank, so only
+    # one such account can exist at a time.
+    UserProfile.objects.filter(phone_number='').delete()
+    return {'username': f'user{random.getrandbits(48)}', 'email': 'user@example.com', 'password': 'benchmark-pass'}
+
+
+def _import_payload(dataset, rows):
+    row = json.dumps({
+        'title': 'Imported listing', 'description': 'Bulk imported', 'property_type': 'apartment',
+        'region': dataset.region.name, 'city': dataset.city.name, 'address': '1 Import street',
+        'area': 50, 'price': '100000.00', 'rooms': 2, 'floor': 1, 'total_floors': 9,
+    })
+    return '\n'.join([row] * rows)
+
+
+def _upload(dataset, parts=0):
+    """A 3-part document upload by the admin with the first ``parts`` parts stored."""
+    upload = PropertyUpload.objects.create(
+        property=dataset.property, owner=dataset.admin, kind='document', filename='scan.pdf', size=2560, part_size=1024,
+    )
+    storage = get_storage(upload)
+    for index in range(parts):
+        storage.save(get_part_name(upload, index), ContentFile(b'%' * upload.get_part_length(index)))
+    return upload
+
+
+def _saved_search(dataset):
+    """The buyer's saved search for the sample city, with its existing listings in the inbox."""
+    saved_search = SavedSearch.objects.filter(user=dataset.buyer, name='Benchmark').first()
+    if saved_search is None:
+        saved_search = SavedSearch.objects.create(user=dataset.buyer, name='Benchmark', params={'city': dataset.city.pk})
+        SavedSearch.objects.match(Property.objects.filter(city=dataset.city))
+    return saved_search
+
+
+def _saved_search_payload(dataset):
+    # Stay under SAVED_SEARCH_MAX_PER_USER across iterations.
+    SavedSearch.objects.filter(user=dataset.buyer).exclude(name='Benchmark').delete()
+    return {'name': 'Cheap houses', 'params': {
+        'city': dataset.city.pk, 'property_type': 'house', 'price__gte': '50000', 'price__lte': '150000', 'search': 'garden',
+    }}
+
+
+def _batch_payload(dataset, size):
+    item = {
+        'title': 'Batch listing', 'description': 'Created in a batch', 'property_type': 'apartment',
+        'region': dataset.region.pk, 'city': dataset.city.pk, 'district': dataset.district.pk,
+        'address': '1 Batch street', 'area': 50, 'price': '100000.00', 'rooms': 2, 'floor': 1, 'total_floors': 9,
+    }
+    doomed = Property.objects.bulk_create([
+        Property(seller=dataset.admin, **{**item, 'region': dataset.region, 'city': dataset.city, 'district': dataset.district})
+        for _ in range(size)
+    ])
+    updates = (
+        Property.objects.filter(city=dataset.city).exclude(pk__in=[prop.pk for prop in doomed])
+        .values_list('pk', flat=True)[:size]
+    )
+    return {
+        'create': [item] * size,
+        'update': [{'id': pk, 'price': '150000.00', 'city': dataset.city.pk} for pk in updates],
+        'delete': [prop.pk for prop in doomed],
+    }
+
+
+def _consume(response):
+    # Streaming responses only hit the database while they are read.
+    if response.streaming:
+        response.streamed_content = b''.join(response.streaming_content)
+    return response
+
+
+def prepare_route(client, route, dataset):
+    """Authenticate the client and return a zero-argument callable performing the request."""
+    user = getattr(dataset, route.user) if route.user else None
+    if user is not None:
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    else:
+        client.credentials()
+    with translation.override('en'):
+        url = reverse(route.name, kwargs=route.kwargs(dataset) if route.kwargs else None)
+    data = route.data(dataset) if route.data else None
+    if route.method == 'get':
+        return lambda: _consume(client.get(url, data))
+    if route.content_type:
+        return lambda: client.generic(route.method.upper(), url, data=data, content_type=route.content_type)
+    return lambda: client.generic(route.method.upper(), url, data=json.dumps(data or {}), content_type='application/json')
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+
+class QueryTimer:
+    """``connection.execute_wrapper`` hook summing wall-clock SQL time."""
+
+    def __init__(self):
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+
+def run_endpoints(dataset, iterations=20):
+    client = APIClient()
+    report = []
+    for route in ROUTES:
+        prepare_route(client, route, dataset)()  # warm up caches and lazy imports
+        totals, sql = [], []
+        for _ in range(iterations):
+            request = prepare_route(client, route, dataset)
+            timer = QueryTimer()
+            with CaptureQueriesContext(connection) as queries, connection.execute_wrapper(timer):
+                started = time.perf_counter()
+                response = request()
+                totals.append((time.perf_counter() - started) * 1000)
+            sql.append(timer.seconds * 1000)
+        total_p50, sql_p50 = percentile(totals, 50), percentile(sql, 50)
+        report.append({
+            'route': route.name,
+            'method': route.method.upper(),
+            'url': response.request['PATH_INFO'],
+            'query_string': response.request.get('QUERY_STRING', ''),
+            'status': response.status_code,
+            'queries': len(queries.captured_queries),
+            'max_queries': route.max_queries,
+            'p50_ms': round(total_p50, 3),
+            'p95_ms': round(percentile(totals, 95), 3),
+            'sql_p50_ms': round(sql_p50, 3),
+            'python_p50_ms': round(max(total_p50 - sql_p50, 0), 3),
+        })
+    return report
+
+
+def run_serializers(dataset, iterations=20, page_size=20):
+    request = Request(APIRequestFactory().get('/'))
+    context = {'request': request}
+    properties = list(
+        Property.objects.select_related('region', 'city__region', 'district__city__region', 'seller__seller_stats')
+        .prefetch_related('images', 'documents')[:page_size]
+    )
+    rows = list(PropertyListingSerializer.prepare_queryset(Property.objects.all())[:page_size])
+    regions = list(Region.objects.prefetch_related('cities__districts'))
+
+    cases = {
+        'PropertyListSerializer': lambda: PropertyListSerializer(properties, many=True, context=context).data,
+        'PropertyListingSerializer': lambda: PropertyListingSerializer(rows, many=True, context=context).data,
+        'RegionSerializer': lambda: RegionSerializer(regions, many=True, context=context).data,
+    }
+    report = {}
+    for name, serialize in cases.items():
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            serialize()
+            timings.append((time.perf_counter() - started) * 1000)
+        report[name] = {
+            'rows': page_size if name != 'RegionSerializer' else len(regions),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+        }
+    return report
+
+
+RENDERERS = {'drf-json': JSONRenderer(), 'orjson': ORJSONRenderer(), 'msgpack': MessagePackRenderer()}
+RENDERER_ROUTES = ('property-list', 'property-detail', 'region-list')
+
+
+def run_renderers(dataset, iterations=20, page_size=100):
+    """p50 render time and payload size of the property/region payloads with every renderer in RENDERERS."""
+    client = APIClient()
+    cases = {}
+    for route in ROUTES:
+        if route.name in RENDERER_ROUTES and route.method == 'get':
+            response = prepare_route(client, route, dataset)()
+            query_string = response.request.get('QUERY_STRING', '')
+            cases[route.name + (f'?{query_string}' if query_string else '')] = response.data
+
+    context = {'request': Request(APIRequestFactory().get('/'))}
+    properties = list(
+        Property.objects.select_related('region', 'city__region', 'district__city__region', 'seller__seller_stats')
+        .prefetch_related('images', 'documents')[:page_size]
+    )
+    cases[f'PropertySerializer x{len(properties)}'] = PropertySerializer(properties, many=True, context=context).data
+    rows = list(PropertyListingSerializer.prepare_queryset(Property.objects.all())[:page_size])
+    cases[f'PropertyListingSerializer x{len(rows)}'] = PropertyListingSerializer(rows, many=True, context=context).data
+    cases['RegionSerializer tree'] = RegionSerializer(
+        Region.objects.prefetch_related('cities__districts'), many=True, context=context,
+    ).data
+
+    report = {}
+    for name, data in cases.items():
+        report[name] = {}
+        for renderer_name, renderer in RENDERERS.items():
+            timings = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                content = renderer.render(data)
+                timings.append((time.perf_counter() - started) * 1000)
+            report[name][renderer_name] = {'bytes': len(content), 'p50_ms': round(percentile(timings, 50), 4)}
+    return report
+
+
+def compare_reports(previous, current):
+    """Yield (label, metric, before, after) for every endpoint present in both reports."""
+    before = {(row['method'], row['route'], row['query_string']): row for row in previous.get('endpoints', [])}
+    for row in current.get('endpoints', []):
+        old = before.get((row['method'], row['route'], row['query_string']))
+        if old is None:
+            continue
+        label = f"{row['method']} {row['route']}"
+        if row['query_string']:
+            label += f" ?{row['query_string']}"
+        for metric in ('queries', 'p50_ms', 'p95_ms'):
+            yield label, metric, old[metric], row[metric]
@@ -0,0 +1,140 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Max
+from rest_framework.response import Response
+
+from .conditional import is_not_modified, not_modified, set_validators
+from .models import Property
+from .replicas import get_sticky_seconds, read_database, use_primary
+
+
+GEOGRAPHY_VERSION_KEY = 'house:geography:version'
+PROPERTY_DELETE_VERSION_KEY = 'house:properties:deleted'
+
+
+def get_geography_cache():
+    return caches[getattr(settings, 'GEOGRAPHY_CACHE_ALIAS', 'default')]
+
+
+def get_geography_timeout():
+    return getattr(settings, 'GEOGRAPHY_CACHE_TIMEOUT', 300)
+
+
+def get_geography_version_cache():
+    return caches[getattr(settings, 'GEOGRAPHY_VERSION_CACHE_ALIAS', 'shared')]
+
+
+def get_geography_version():
+    """
+    Nanosecond timestamp of the last Region/City/District change.
+
+    The version is kept without expiry in ``GEOGRAPHY_VERSION_CACHE_ALIAS``,
+    shared by all workers, so they agree on ETags; each process remembers it
+    in the geography cache for ``GEOGRAPHY_CACHE_TIMEOUT``.
+    """
+    cache = get_geography_cache()
+    version = cache.get(GEOGRAPHY_VERSION_KEY)
+    if version is None:
+        shared = get_geography_version_cache()
+        version = shared.get(GEOGRAPHY_VERSION_KEY)
+        if version is None:
+            version = time.time_ns()
+            if not shared.add(GEOGRAPHY_VERSION_KEY, version, None):
+                version = shared.get(GEOGRAPHY_VERSION_KEY, version)
+        cache.set(GEOGRAPHY_VERSION_KEY, version, get_geography_timeout())
+    return version
+
+
+async def aget_geography_version():
+    cache = get_geography_cache()
+    version = await cache.aget(GEOGRAPHY_VERSION_KEY)
+    if version is None:
+        shared = get_geography_version_cache()
+        version = await shared.aget(GEOGRAPHY_VERSION_KEY)
+        if version is None:
+            version = time.time_ns()
+            if not await shared.aadd(GEOGRAPHY_VERSION_KEY, version, None):
+                version = await shared.aget(GEOGRAPHY_VERSION_KEY, version)
+        await cache.aset(GEOGRAPHY_VERSION_KEY, version, get_geography_timeout())
+    return version
+
+
+def bump_geography_version():
+    version = time.time_ns()
+    get_geography_version_cache().set(GEOGRAPHY_VERSION_KEY, version, None)
+    get_geography_cache().set(GEOGRAPHY_VERSION_KEY, version, get_geography_timeout())
+
+
+def get_property_version_cache():
+    return caches[getattr(settings, 'PROPERTY_VERSION_CACHE_ALIAS', 'shared')]
+
+
+def get_property_list_state():
+    """
+    What every property list validator is derived from: the newest
+    ``updated_at`` of the table (an index lookup; saves, bulk and media
+    changes and seller updates all set it) and the time of the last delete,
+    which leaves no row behind.
+    """
+    updated_at = Property.objects.aggregate(updated_at=Max('updated_at'))['updated_at']
+    return updated_at, get_property_version_cache().get(PROPERTY_DELETE_VERSION_KEY, 0)
+
+
+async def aget_property_list_state():
+    updated_at = (await Property.objects.aaggregate(updated_at=Max('updated_at')))['updated_at']
+    return updated_at, await get_property_version_cache().aget(PROPERTY_DELETE_VERSION_KEY, 0)
+
+
+def bump_property_delete_version():
+    get_property_version_cache().set(PROPERTY_DELETE_VERSION_KEY, time.time_ns(), None)
+
+
+def get_geography_cache_key(request, version, renderer_format):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'house:geography:{version}:{renderer_format}:{path}'
+
+
+class GeographyCacheMixin:
+    """
+    Read-through cache for the read-only geography viewsets.
+
+    Responses are stored per geography version, so any Region/City/District
+    change invalidates every entry at once. Conditional requests are answered
+    from the version alone, without touching the cache entries or the DB.
+    Within ``REPLICA_STICKY_SECONDS`` of a change, misses read from the primary.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(request, super().retrieve, *args, **kwargs)
+
+    def get_cached_response(self, request, handler, *args, **kwargs):
+        version = get_geography_version()
+        renderer_format = getattr(request.accepted_renderer, 'format', '')
+        etag = f'geo-{version}-{renderer_format}'
+        last_modified = version // 10 ** 9
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+
+        cache = get_geography_cache()
+        key = get_geography_cache_key(request, version, renderer_format)
+        data = cache.get(key)
+        if data is None:
+            if read_database.get() is not None and time.time_ns() - version < get_sticky_seconds() * 10 ** 9:
+                # The replica may not have the change behind this version yet,
+                # and what it returns would be cached under the new version.
+                with use_primary():
+                    response = handler(request, *args, **kwargs)
+            else:
+                response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            cache.set(key, response.data, get_geography_timeout())
+        else:
+            response = Response(data)
+        return set_validators(response, etag, last_modified)
@@ -0,0 +1,77 @@
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from modeltranslation.utils import build_localized_fieldname
+
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def get_export_columns():
+    """
+    ``(column, lookup)`` pairs. Column names match what house_app.importer
+    reads, so an export can be imported back.
+    """
+    translated = [
+        (name, name) for field in ('title', 'description')
+        for name in (build_localized_fieldname(field, language) for language in settings.MODELTRANSLATION_LANGUAGES)
+    ]
+    return [('id', 'id')] + translated + [
+        ('property_type', 'property_type'),
+        ('region', 'region__name'),
+        ('city', 'city__name'),
+        ('district', 'district__name'),
+        ('address', 'address'),
+        ('latitude', 'latitude'),
+        ('longitude', 'longitude'),
+        ('area', 'area'),
+        ('price', 'price'),
+        ('rooms', 'rooms'),
+        ('floor', 'floor'),
+        ('total_floors', 'total_floors'),
+        ('seller_id', 'seller_id'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ]
+
+
+class Echo:
+    """File-like object whose write() returns the line, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def iter_export(queryset, export_format, chunk_size=2000):
+    """
+    Yield the encoded rows of ``queryset`` one chunk at a time.
+
+    Rows come from ``.values_list().iterator()``, which uses a server-side
+    cursor where the database supports it, so memory does not grow with the
+    number of rows.
+    """
+    columns = get_export_columns()
+    names = [name for name, lookup in columns]
+    rows = queryset.values_list(*[lookup for name, lookup in columns]).iterator(chunk_size=chunk_size)
+
+    if export_format == 'csv':
+        writer = csv.writer(Echo())
+        encode = writer.writerow
+        yield encode(names)
+    else:
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        encode = lambda row: encoder.encode(dict(zip(names, row))) + '\n'
+
+    chunk = []
+    for row in rows:
+        chunk.append(encode(row))
+        if len(chunk) >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
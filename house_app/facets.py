@@ -0,0 +1,133 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .filters import PropertySearchFilter
+from .models import Property
+
+
+PRICE_BUCKETS = [
+    (None, Decimal(50_000)),
+    (Decimal(50_000), Decimal(100_000)),
+    (Decimal(100_000), Decimal(250_000)),
+    (Decimal(250_000), Decimal(500_000)),
+    (Decimal(500_000), None),
+]
+ROOM_BUCKETS = [(1, 1), (2, 2), (3, 3), (4, 4), (5, None)]
+
+# Query parameters each facet ignores, so the counts show what choosing
+# another option of the same facet would return.
+FACET_PARAMS = {
+    'property_type': ('property_type',),
+    'price': ('price__gte', 'price__lte'),
+    'rooms': ('rooms', 'rooms__gte'),
+    'city': ('city', 'cities'),
+    'district': ('district', 'districts'),
+}
+BUCKET_FACETS = ('property_type', 'price', 'rooms')
+
+# Parameters that do not change which rows match.
+NON_FILTER_PARAMS = ('page', 'pagination', 'cursor', 'ordering', 'count', 'facets', 'format')
+
+
+def get_bucket_label(low, high, suffix='+'):
+    if high is None:
+        return f'{low}{suffix}'
+    if low is None:
+        return f'<{high}'
+    return str(low) if low == high else f'{low}-{high}'
+
+
+def get_bucket_condition(field, low, high, inclusive=False):
+    condition = Q()
+    if low is not None:
+        condition &= Q(**{f'{field}__gte': low})
+    if high is not None:
+        condition &= Q(**{f'{field}__lte' if inclusive else f'{field}__lt': high})
+    return condition
+
+
+def get_bucket_aggregates(names):
+    """Conditional counts for every bucket of ``names``, evaluated in one pass over the rows."""
+    aggregates = {}
+    if 'property_type' in names:
+        for value, label in Property.PROPERTY_TYPE_CHOICES:
+            aggregates[f'property_type:{value}'] = Count('id', filter=Q(property_type=value))
+    if 'price' in names:
+        for low, high in PRICE_BUCKETS:
+            aggregates[f'price:{get_bucket_label(low, high)}'] = Count('id', filter=get_bucket_condition('price', low, high))
+    if 'rooms' in names:
+        for low, high in ROOM_BUCKETS:
+            aggregates[f'rooms:{get_bucket_label(low, high)}'] = Count(
+                'id', filter=get_bucket_condition('rooms', low, high, inclusive=True)
+            )
+    return aggregates
+
+
+def get_grouped_counts(queryset, field):
+    rows = (
+        queryset.filter(**{f'{field}__isnull': False})
+        .values(f'{field}_id', f'{field}__name')
+        .annotate(count=Count('id'))
+        .order_by('-count', f'{field}__name')
+    )
+    return [{'id': row[f'{field}_id'], 'name': row[f'{field}__name'], 'count': row['count']} for row in rows]
+
+
+class PropertyFacets:
+    """
+    Facet counts for PropertyListView under the request's filters and search.
+
+    Facets whose own parameters are absent share the fully filtered queryset:
+    the bucketed ones are counted together in a single aggregate query, the
+    city and district ones with one GROUP BY each.
+    """
+
+    def __init__(self, view, request):
+        self.view = view
+        self.request = request
+
+    def is_filtered(self):
+        return any(key not in NON_FILTER_PARAMS for key in self.request.query_params)
+
+    def get_queryset(self, excluded):
+        params = self.request.query_params.copy()
+        for key in excluded:
+            params.pop(key, None)
+        queryset = self.view.get_queryset().select_related(None).prefetch_related(None)
+        filterset = self.view.filterset_class(params, queryset=queryset, request=self.request)
+        queryset = filterset.qs if filterset.is_valid() else queryset.none()
+        return PropertySearchFilter().filter_queryset(self.request, queryset, self.view).order_by()
+
+    def compute(self):
+        groups = {}
+        for name, params in FACET_PARAMS.items():
+            excluded = tuple(key for key in params if key in self.request.query_params)
+            groups.setdefault(excluded, []).append(name)
+
+        facets = {}
+        for excluded, names in groups.items():
+            queryset = self.get_queryset(excluded)
+            bucket_names = [name for name in names if name in BUCKET_FACETS]
+            if bucket_names:
+                for key, count in queryset.aggregate(**get_bucket_aggregates(bucket_names)).items():
+                    name, bucket = key.split(':', 1)
+                    facets.setdefault(name, []).append({'value': bucket, 'count': count})
+            for name in names:
+                if name not in BUCKET_FACETS:
+                    facets[name] = get_grouped_counts(queryset, name)
+        return {name: facets[name] for name in FACET_PARAMS}
+
+    def get(self, state_key):
+        """Facets, cached while the catalogue is unchanged if no filter is applied."""
+        timeout = getattr(settings, 'PROPERTY_FACETS_CACHE_TIMEOUT', 60)
+        if self.is_filtered() or not timeout:
+            return self.compute()
+        key = f'house:facets:{state_key}'
+        facets = cache.get(key)
+        if facets is None:
+            facets = self.compute()
+            cache.set(key, facets, timeout)
+        return facets
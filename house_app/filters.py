@@ -1,18 +1,123 @@
-from django_filters import FilterSet
-from .models import Property, City
+import math
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+from django_filters import BaseCSVFilter, FilterSet, NumberFilter
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+from .geo import EARTH_RADIUS_KM, BBox, cover_bbox, get_geohash_range, get_radius_bbox, split_bbox
+from .models import Property, City, MarketStats, get_location_path
+from .search import get_search_backend
+
+
+class NumberCSVFilter(BaseCSVFilter, NumberFilter):
+    pass
+
+
+def filter_bbox(queryset, bbox):
+    """
+    Narrow to the geohash cells covering ``bbox`` (index range scans), then
+    drop the rows of those cells that fall outside the box.
+    """
+    condition = Q()
+    for part in split_bbox(bbox):
+        cells = Q()
+        for prefix in cover_bbox(part):
+            cells |= Q(geohash__range=get_geohash_range(prefix))
+        condition |= cells & Q(
+            latitude__range=(part.min_lat, part.max_lat),
+            longitude__range=(part.min_lng, part.max_lng),
+        )
+    return queryset.filter(condition)
+
+
+def get_distance_expression(latitude, longitude):
+    """Haversine distance in km from (latitude, longitude) to each row."""
+    half_lat = Radians(F('latitude') - Value(latitude, output_field=FloatField())) / 2
+    half_lng = Radians(F('longitude') - Value(longitude, output_field=FloatField())) / 2
+    a = Power(Sin(half_lat), 2) + Value(math.cos(math.radians(latitude))) * Cos(Radians('latitude')) * Power(Sin(half_lng), 2)
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a))
+
+
 class PropertyFilterSet(FilterSet):
+    bbox = NumberCSVFilter(method='filter_bbox', label='min_lng,min_lat,max_lng,max_lat')
+    near = NumberCSVFilter(method='filter_near', label='lat,lng (with radius)')
+    radius = NumberFilter(method='filter_radius', label='Radius in km around near')
+    region = NumberFilter(method='filter_region', label='Region id, including all of its cities and districts')
+    cities = NumberCSVFilter(field_name='city', lookup_expr='in', label='Comma-separated city ids')
+    districts = NumberCSVFilter(field_name='district', lookup_expr='in', label='Comma-separated district ids')
+
     class Meta:
         model = Property
         fields = {
             'city': ['exact'],
+            'district': ['exact'],
             'property_type': ['exact'],
             'price': ['gte', 'lte'],
-
+            'rooms': ['exact', 'gte'],
         }
 
+    def filter_bbox(self, queryset, name, value):
+        if len(value) != 4:
+            raise ValidationError({name: ['Expected min_lng,min_lat,max_lng,max_lat.']})
+        bbox = BBox(*map(float, value))
+        if not (-90 <= bbox.min_lat <= bbox.max_lat <= 90 and -180 <= min(bbox.min_lng, bbox.max_lng)
+                and max(bbox.min_lng, bbox.max_lng) <= 180):
+            raise ValidationError({name: ['Coordinates are out of range.']})
+        return filter_bbox(queryset, bbox)
+
+    def filter_near(self, queryset, name, value):
+        radius = self.form.cleaned_data.get('radius')
+        if len(value) != 2 or radius is None:
+            raise ValidationError({name: ['Expected lat,lng together with radius.']})
+        latitude, longitude = map(float, value)
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or radius <= 0:
+            raise ValidationError({name: ['Coordinates or radius are out of range.']})
+        queryset = filter_bbox(queryset, get_radius_bbox(latitude, longitude, float(radius)))
+        return queryset.alias(distance=get_distance_expression(latitude, longitude)).filter(distance__lte=float(radius))
+
+    def filter_radius(self, queryset, name, value):
+        # Applied by filter_near.
+        return queryset
+
+    def filter_region(self, queryset, name, value):
+        return queryset.filter(location_path__startswith=get_location_path(int(value)))
+
 
 class CityFilterSet(FilterSet):
 
     class Meta:
         model = City
-        fields = ['name']
\ No newline at end of file
+        fields = ['name']
+
+
+class MarketStatsFilterSet(FilterSet):
+
+    class Meta:
+        model = MarketStats
+        fields = {
+            'city': ['exact'],
+            'district': ['exact', 'isnull'],
+            'property_type': ['exact'],
+        }
+
+
+class PropertySearchFilter(SearchFilter):
+    """
+    Full-text search through the configured search backend, ranked by relevance
+    unless the client asks for an explicit ordering. Falls back to the
+    ``icontains`` lookups of ``SearchFilter`` when no backend is available.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        backend = get_search_backend()
+        text = request.query_params.get(self.search_param, '')
+        if backend is None or not text.strip():
+            return super().filter_queryset(request, queryset, view)
+
+        queryset = backend.search(queryset, text)
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('-search_rank', *queryset.query.order_by)
+        return queryset
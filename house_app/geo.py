@@ -0,0 +1,99 @@
+import math
+from collections import namedtuple
+
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 12
+EARTH_RADIUS_KM = 6371.0088
+
+BBox = namedtuple('BBox', ['min_lng', 'min_lat', 'max_lng', 'max_lat'])
+
+# Geohash length whose cells are roughly the size of a map tile at each zoom level.
+ZOOM_PRECISION = [1, 1, 2, 2, 2, 3, 3, 4, 4, 4, 5, 5, 6, 6, 6, 7, 7, 8, 8, 8]
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = value = 0
+    return ''.join(chars)
+
+
+def get_property_geohash(latitude, longitude):
+    if latitude is None or longitude is None:
+        return ''
+    return encode_geohash(latitude, longitude)
+
+
+def get_cell_size(precision):
+    """(height in degrees of latitude, width in degrees of longitude) of one cell."""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def get_geohash_range(prefix):
+    """Inclusive bounds of every full-precision geohash starting with ``prefix``."""
+    return prefix, prefix.ljust(GEOHASH_PRECISION, GEOHASH_ALPHABET[-1])
+
+
+def split_bbox(bbox):
+    """Split a box crossing the antimeridian (``min_lng > max_lng``) in two."""
+    if bbox.min_lng <= bbox.max_lng:
+        return [bbox]
+    return [bbox._replace(max_lng=180.0), bbox._replace(min_lng=-180.0)]
+
+
+def cover_bbox(bbox, max_cells=16):
+    """
+    Geohash prefixes whose cells cover ``bbox``, using the longest prefix that
+    needs at most ``max_cells`` cells, so the lookup stays a handful of
+    index range scans.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = get_cell_size(precision)
+        rows = math.floor((bbox.max_lat + 90) / height) - math.floor((bbox.min_lat + 90) / height) + 1
+        columns = math.floor((bbox.max_lng + 180) / width) - math.floor((bbox.min_lng + 180) / width) + 1
+        if rows * columns <= max_cells:
+            break
+
+    prefixes = set()
+    first_row = math.floor((bbox.min_lat + 90) / height)
+    first_column = math.floor((bbox.min_lng + 180) / width)
+    for row in range(rows):
+        for column in range(columns):
+            latitude = min(-90 + (first_row + row + 0.5) * height, 90.0)
+            longitude = min(-180 + (first_column + column + 0.5) * width, 180.0)
+            prefixes.add(encode_geohash(latitude, longitude, precision))
+    return sorted(prefixes)
+
+
+def get_radius_bbox(latitude, longitude, radius_km):
+    """Smallest box containing the circle; may cross the antimeridian."""
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = max(latitude - lat_delta, -90.0), min(latitude + lat_delta, 90.0)
+    if min_lat == -90.0 or max_lat == 90.0:
+        return BBox(-180.0, min_lat, 180.0, max_lat)
+    lng_delta = math.degrees(math.asin(min(math.sin(math.radians(lat_delta)) / math.cos(math.radians(latitude)), 1.0)))
+    if lng_delta >= 180:
+        return BBox(-180.0, min_lat, 180.0, max_lat)
+    min_lng = (longitude - lng_delta + 540) % 360 - 180
+    max_lng = (longitude + lng_delta + 540) % 360 - 180
+    return BBox(min_lng, min_lat, max_lng, max_lat)
+
+
+def get_zoom_precision(zoom):
+    return ZOOM_PRECISION[max(0, min(int(zoom), len(ZOOM_PRECISION) - 1))]
@@ -0,0 +1,138 @@
+import logging
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .response_cache import response_cache
+from .storage import is_content_addressed
+
+
+logger = logging.getLogger(__name__)
+
+ImageVariant = namedtuple('ImageVariant', ['size', 'format', 'quality'])
+
+# Every variant keeps the aspect ratio and only ever shrinks the source.
+IMAGE_VARIANTS = {
+    'thumbnail': ImageVariant((160, 120), 'JPEG', 70),
+    'card': ImageVariant((480, 360), 'JPEG', 80),
+    'full': ImageVariant((1600, 1200), 'JPEG', 85),
+    'webp': ImageVariant((480, 360), 'WEBP', 80),
+}
+EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_worker_count():
+    return getattr(settings, 'IMAGE_PROCESSING_WORKERS', 2)
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=get_worker_count(), thread_name_prefix='property-images')
+        return _executor
+
+
+def render_variant(source, variant):
+    image = source.copy()
+    image.thumbnail(variant.size, Image.Resampling.LANCZOS)
+    if variant.format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+
+    buffer = BytesIO()
+    if variant.format == 'JPEG':
+        image.save(buffer, 'JPEG', quality=variant.quality, optimize=True, progressive=True)
+    else:
+        image.save(buffer, variant.format, quality=variant.quality, method=6)
+    return buffer.getvalue()
+
+
+def get_variant_storage():
+    from .models import PropertyImage
+
+    return PropertyImage._meta.get_field('thumbnail').storage
+
+
+def get_variant_name(pk, source_name, variant_name, variant):
+    # Per row: identical sources in other rows get files of their own.
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    return f'property/images/variants/{pk}/{stem}-{variant_name}.{EXTENSIONS[variant.format]}'
+
+
+def delete_files(storage, names):
+    for name in names:
+        if name:
+            storage.delete(name)
+
+
+def delete_variants(names, keep=()):
+    """Delete variant files, except ``keep`` and content-addressed names, which other rows may share."""
+    storage = get_variant_storage()
+    delete_files(storage, [name for name in names if name not in keep and not is_content_addressed(name)])
+
+
+def process_property_image(pk):
+    """Render every IMAGE_VARIANTS entry for one PropertyImage and store the file names."""
+    from .models import Property, PropertyImage
+
+    instance = PropertyImage.objects.filter(pk=pk).first()
+    if instance is None or not instance.image:
+        return False
+
+    source_name = instance.image.name
+    try:
+        with instance.image.open('rb') as file:
+            source = Image.open(file)
+            source.load()
+    except (OSError, UnidentifiedImageError):
+        logger.warning('Cannot read property image %s (%s).', pk, source_name)
+        return False
+    source = ImageOps.exif_transpose(source)
+
+    storage = get_variant_storage()
+    names = {
+        name: storage.save(get_variant_name(pk, source_name, name, variant), ContentFile(render_variant(source, variant)))
+        for name, variant in IMAGE_VARIANTS.items()
+    }
+    previous = [getattr(instance, name).name for name in IMAGE_VARIANTS]
+
+    now = timezone.now()
+    # Filtering on the source name drops the result if the image was replaced meanwhile.
+    if not PropertyImage.objects.filter(pk=pk, image=source_name).update(updated_at=now, **names):
+        delete_variants(names.values())
+        return False
+    delete_variants(previous, keep=set(names.values()))
+    Property.objects.filter(pk=instance.property_id).update(updated_at=now)
+    response_cache.invalidate({f'property:{instance.property_id}'})
+    return True
+
+
+def process_in_worker(pk):
+    try:
+        return process_property_image(pk)
+    except Exception:
+        logger.exception('Processing property image %s failed.', pk)
+        return False
+    finally:
+        connections.close_all()
+
+
+def schedule_image_processing(pk):
+    """Process the image on the worker pool, or inline when ``IMAGE_PROCESSING_WORKERS`` is 0."""
+    if not get_worker_count():
+        return process_property_image(pk)
+    return get_executor().submit(process_in_worker, pk)
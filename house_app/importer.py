@@ -0,0 +1,243 @@
+import codecs
+import csv
+import io
+import json
+from collections import namedtuple
+from functools import cached_property
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from modeltranslation.utils import build_localized_fieldname
+
+from .geo import get_property_geohash
+from .models import Region, City, District, Property, SellerStats, get_location_path
+from .signals import properties_bulk_saved
+
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+IMPORT_FIELDS = ('property_type', 'address', 'latitude', 'longitude', 'area', 'price', 'rooms', 'floor', 'total_floors')
+TRANSLATED_FIELDS = ('title', 'description')
+
+ImportResult = namedtuple('ImportResult', ['rows', 'created', 'invalid', 'errors'])
+# Yielded by read_rows() instead of a record that is not valid UTF-8.
+INVALID_ENCODING = object()
+
+
+def get_max_rows():
+    return getattr(settings, 'PROPERTY_IMPORT_MAX_ROWS', 10_000)
+
+
+def get_max_size():
+    return getattr(settings, 'PROPERTY_IMPORT_MAX_SIZE', 10 * 1024 * 1024)
+
+
+def get_import_format(name=None, content_type=None):
+    """Guess the format from a file name or a content type, ``None`` if neither matches."""
+    name = (name or '').lower()
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if name.endswith('.csv') or content_type == 'text/csv':
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')) or content_type in ('application/x-ndjson', 'application/jsonl'):
+        return 'ndjson'
+    return None
+
+
+def iter_lines(stream, invalid_lines):
+    """
+    Decode a binary file, upload or request body line by line.
+
+    Lines that are not valid UTF-8 are added to ``invalid_lines`` (1-based)
+    and decoded with replacement characters only to keep CSV parsing in step.
+    """
+    if isinstance(stream, io.TextIOBase):
+        yield from stream
+        return
+    for number, line in enumerate(stream, 1):
+        if number == 1 and line.startswith(codecs.BOM_UTF8):
+            line = line[len(codecs.BOM_UTF8):]
+        try:
+            yield line.decode('utf-8')
+        except UnicodeDecodeError:
+            invalid_lines.add(number)
+            yield line.decode('utf-8', errors='replace')
+
+
+def read_rows(stream, import_format):
+    """
+    Yield ``(line, row)`` one record at a time; ``row`` is None for unparsable
+    NDJSON lines and INVALID_ENCODING for records that are not valid UTF-8.
+    """
+    invalid_lines = set()
+    stream = iter_lines(stream, invalid_lines)
+    if import_format == 'csv':
+        reader = csv.DictReader(stream)
+        last_line = 1
+        for row in reader:
+            # A quoted value can span several lines; reject the record if any of them is invalid.
+            if any(last_line < number <= reader.line_num for number in invalid_lines):
+                row = INVALID_ENCODING
+            last_line = reader.line_num
+            yield reader.line_num, row
+        return
+    for line, text in enumerate(stream, 1):
+        if line in invalid_lines:
+            yield line, INVALID_ENCODING
+            continue
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError:
+            row = None
+        yield line, row if isinstance(row, dict) else None
+
+
+def normalize_name(value):
+    return str(value or '').strip().casefold()
+
+
+class GeographyLookup:
+    """Region/City/District names resolved against dictionaries loaded in three queries."""
+
+    def __init__(self):
+        self.regions = {normalize_name(name): pk for pk, name in Region.objects.values_list('pk', 'name')}
+        self.cities = {}
+        self.cities_by_name = {}
+        for pk, region_id, name in City.objects.values_list('pk', 'region_id', 'name'):
+            self.cities[region_id, normalize_name(name)] = (pk, region_id)
+            self.cities_by_name.setdefault(normalize_name(name), []).append((pk, region_id))
+        self.districts = {
+            (city_id, normalize_name(name)): pk
+            for pk, city_id, name in District.objects.values_list('pk', 'city_id', 'name')
+        }
+
+    def resolve(self, region, city, district):
+        errors = {}
+        region_id = None
+        if normalize_name(region):
+            region_id = self.regions.get(normalize_name(region))
+            if region_id is None:
+                errors['region'] = [f'Unknown region "{region}".']
+
+        if region_id is not None:
+            match = self.cities.get((region_id, normalize_name(city)))
+        else:
+            matches = self.cities_by_name.get(normalize_name(city), [])
+            match = matches[0] if len(matches) == 1 else None
+            if len(matches) > 1 and 'region' not in errors:
+                errors['region'] = [f'City "{city}" exists in several regions, region is required.']
+        if match is None:
+            errors.setdefault('city', [f'Unknown city "{city}".'])
+            return None, errors
+
+        city_id, region_id = match
+        district_id = None
+        if normalize_name(district):
+            district_id = self.districts.get((city_id, normalize_name(district)))
+            if district_id is None:
+                errors['district'] = [f'Unknown district "{district}" in city "{city}".']
+        return (region_id, city_id, district_id), errors
+
+
+class PropertyImporter:
+    """
+    Validate rows with the model fields' own ``clean()`` and insert them with
+    ``bulk_create``, one transaction per chunk.
+
+    Invalid rows are skipped and reported; only the first ``max_errors``
+    are kept. With ``max_rows``, reading stops after that many rows and the
+    next one is reported as not imported.
+    """
+    chunk_size = 1000
+    max_errors = 100
+
+    def __init__(self, seller, chunk_size=None, dry_run=False, max_rows=None):
+        self.seller = seller
+        self.chunk_size = chunk_size or self.chunk_size
+        self.dry_run = dry_run
+        self.max_rows = max_rows
+        self.geography = GeographyLookup()
+        self.model_fields = {name: Property._meta.get_field(name) for name in IMPORT_FIELDS}
+        self.languages = settings.MODELTRANSLATION_LANGUAGES
+        self.default_language = getattr(settings, 'MODELTRANSLATION_DEFAULT_LANGUAGE', self.languages[0])
+        self.translated_fields = {
+            build_localized_fieldname(name, language): Property._meta.get_field(build_localized_fieldname(name, language))
+            for name in TRANSLATED_FIELDS for language in self.languages
+        }
+
+    @cached_property
+    def seller_rating(self):
+        return SellerStats.objects.get_rating(self.seller.pk)
+
+    def build(self, row):
+        """Return ``(Property, errors)``; the instance is None when the row is invalid."""
+        if row is INVALID_ENCODING:
+            return None, {'non_field_errors': ['Row is not valid UTF-8.']}
+        if row is None:
+            return None, {'non_field_errors': ['Row is not a JSON object.']}
+        values, errors = {'seller_id': self.seller.pk}, {}
+
+        for name, field in self.model_fields.items():
+            value = row.get(name)
+            if value == '' and field.null:
+                value = None
+            try:
+                values[name] = field.clean(value, None)
+            except ValidationError as error:
+                errors[name] = error.messages
+
+        for name in TRANSLATED_FIELDS:
+            # A plain "title"/"description" column fills the default language.
+            fallback = row.get(name)
+            for language in self.languages:
+                localized = build_localized_fieldname(name, language)
+                value = row.get(localized) or (fallback if language == self.default_language else None)
+                field = self.translated_fields[localized]
+                if not value and language != self.default_language:
+                    continue
+                try:
+                    values[localized] = field.clean(value, None)
+                except ValidationError as error:
+                    errors[localized] = error.messages
+
+        geography, geography_errors = self.geography.resolve(row.get('region'), row.get('city'), row.get('district'))
+        errors.update(geography_errors)
+        if errors:
+            return None, errors
+        values['region_id'], values['city_id'], values['district_id'] = geography
+        values['geohash'] = get_property_geohash(values['latitude'], values['longitude'])
+        values['location_path'] = get_location_path(*geography)
+        values['seller_rating'] = self.seller_rating
+        return Property(**values), None
+
+    def write(self, instances):
+        if self.dry_run or not instances:
+            return len(instances)
+        with transaction.atomic():
+            created = Property.objects.bulk_create(instances)
+            properties_bulk_saved.send(sender=Property, instances=created, created=True)
+        return len(created)
+
+    def run(self, rows):
+        total = created = invalid = 0
+        errors, chunk = [], []
+        for line, row in rows:
+            if self.max_rows is not None and total >= self.max_rows:
+                errors.append({'line': line, 'errors': {'non_field_errors': [
+                    f'Only {self.max_rows} rows are imported at a time; this and the following rows were not.'
+                ]}})
+                break
+            total += 1
+            instance, row_errors = self.build(row)
+            if row_errors:
+                invalid += 1
+                if len(errors) < self.max_errors:
+                    errors.append({'line': line, 'errors': row_errors})
+                continue
+            chunk.append(instance)
+            if len(chunk) >= self.chunk_size:
+                created += self.write(chunk)
+                chunk = []
+        created += self.write(chunk)
+        return ImportResult(rows=total, created=created, invalid=invalid, errors=errors)
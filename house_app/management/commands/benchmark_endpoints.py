@@ -0,0 +1,87 @@
+import json
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from house_app.benchmark import (
+    DEFAULT_SIZES, compare_reports, run_endpoints, run_renderers, run_serializers, seed_dataset,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic dataset into a throwaway test database, hit every house_app route '
+        'and write query counts, p50/p95 latency, serialization timings and render time/size '
+        'per renderer to a JSON report.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_SIZES.items():
+            parser.add_argument(f'--{name}', type=int, default=default, help=f'Number of {name} to seed.')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--output', help='Write the JSON report to this path.')
+        parser.add_argument('--compare', help='Print deltas against a previous JSON report.')
+
+    def handle(self, *args, **options):
+        sizes = {name: options[name] for name in DEFAULT_SIZES}
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # Upload routes write files; keep them out of the real MEDIA_ROOT.
+            with tempfile.TemporaryDirectory() as media_root, override_settings(
+                PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], MEDIA_ROOT=media_root,
+            ):
+                dataset = seed_dataset(sizes)
+                report = {
+                    'created_at': datetime.now(timezone.utc).isoformat(),
+                    'commit': self.get_commit(),
+                    'database': connection.vendor,
+                    'sizes': sizes,
+                    'iterations': options['iterations'],
+                    'endpoints': run_endpoints(dataset, options['iterations']),
+                    'serializers': run_serializers(dataset, options['iterations']),
+                    'renderers': run_renderers(dataset, options['iterations']),
+                }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for row in report['endpoints']:
+            style = self.style.SUCCESS if row['queries'] <= row['max_queries'] else self.style.ERROR
+            label = f"{row['method']:4} {row['url']}" + (f"?{row['query_string']}" if row['query_string'] else '')
+            self.stdout.write(style(
+                f"{label:70} {row['status']} q={row['queries']}/{row['max_queries']} "
+                f"p50={row['p50_ms']:.2f}ms p95={row['p95_ms']:.2f}ms sql={row['sql_p50_ms']:.2f}ms"
+            ))
+        for name, row in report['serializers'].items():
+            self.stdout.write(f"{name:70} rows={row['rows']} p50={row['p50_ms']:.2f}ms p95={row['p95_ms']:.2f}ms")
+        for name, row in report['renderers'].items():
+            self.stdout.write(f'{name:70} ' + ' '.join(
+                f"{renderer}={timing['p50_ms']:.3f}ms/{timing['bytes']}B" for renderer, timing in row.items()
+            ))
+
+        if options['compare']:
+            with open(options['compare']) as fp:
+                previous = json.load(fp)
+            self.stdout.write(f"\nCompared with {previous.get('commit') or options['compare']}:")
+            for label, metric, before, after in compare_reports(previous, report):
+                if before != after:
+                    change = f' ({(after - before) / before:+.0%})' if before else ''
+                    self.stdout.write(f'{label:70} {metric}: {before} -> {after}{change}')
+
+        if options['output']:
+            with open(options['output'], 'w') as fp:
+                json.dump(report, fp, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+    def get_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
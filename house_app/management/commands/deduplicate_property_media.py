@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from house_app.models import MediaBlob, Property, PropertyDocument, PropertyImage
+from house_app.storage import is_content_addressed
+
+
+class Command(BaseCommand):
+    help = (
+        'Move property images and documents saved under upload names into the content-addressed '
+        'storage, delete the originals and recount MediaBlob references.'
+    )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        old_names = set()
+        moved = missing = 0
+        for model, field_name in ((PropertyImage, 'image'), (PropertyDocument, 'file')):
+            storage = model._meta.get_field(field_name).storage
+            rows = model.objects.exclude(**{field_name: ''}).values_list('pk', 'property_id', field_name)
+            for pk, property_id, name in rows.order_by('pk').iterator():
+                if is_content_addressed(name):
+                    continue
+                if not storage.exists(name):
+                    self.stderr.write(f'{model.__name__} {pk}: {name} is missing, skipped.')
+                    missing += 1
+                    continue
+                with storage.open(name, 'rb') as file:
+                    blob_name = storage.save(name, file)
+                with transaction.atomic():
+                    model.objects.filter(pk=pk).update(**{field_name: blob_name, 'updated_at': now})
+                    Property.objects.filter(pk=property_id).update(updated_at=now)
+                old_names.add((storage, name))
+                moved += 1
+
+        MediaBlob.objects.rebuild()
+        for storage, name in old_names:
+            storage.delete(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Moved {moved} files into {MediaBlob.objects.count()} blobs'
+            + (f', {missing} missing.' if missing else '.')
+        ))
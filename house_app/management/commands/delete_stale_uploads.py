@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from house_app.models import PropertyUpload
+
+
+class Command(BaseCommand):
+    help = 'Delete chunked uploads, and their stored parts, that have not received a part for a while.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=int, default=getattr(settings, 'CHUNKED_UPLOAD_EXPIRY_HOURS', 24),
+            help='Idle time after which an upload is dropped (default: CHUNKED_UPLOAD_EXPIRY_HOURS).'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        deleted = 0
+        # One by one, so post_delete removes each upload's parts.
+        for upload in PropertyUpload.objects.filter(updated_at__lt=cutoff).iterator():
+            upload.delete()
+            deleted += 1
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} stale uploads.'))
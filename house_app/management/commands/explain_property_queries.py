@@ -0,0 +1,113 @@
+import re
+from itertools import combinations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from house_app.models import Property
+from house_app.views import PropertyListView
+
+
+ORDERINGS = ['-created_at', 'created_at', 'price', '-price', 'area', '-area', 'seller_rating', '-seller_rating']
+SAMPLE_FIELDS = ('region_id', 'city_id', 'district_id', 'property_type', 'price', 'rooms', 'latitude', 'longitude')
+SCAN_PATTERNS = {
+    'sqlite': re.compile(r'SCAN house_app_property(?! USING)'),
+    'postgresql': re.compile(r'Seq Scan on house_app_property'),
+}
+SORT_PATTERNS = {
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR ORDER BY'),
+    'postgresql': re.compile(r'Sort Key:'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Replay the filter/order combinations PropertyListView allows and report EXPLAIN plans.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not only flagged ones.')
+        parser.add_argument('--fail-on-scan', action='store_true', help='Exit with an error if any plan scans the whole table.')
+
+    def handle(self, *args, **options):
+        sample = (
+            Property.objects.exclude(district=None).values(*SAMPLE_FIELDS).first()
+            or Property.objects.values(*SAMPLE_FIELDS).first()
+        )
+        if sample is None:
+            self.stdout.write(self.style.WARNING('No properties found, skipping the location filters.'))
+            sample = {'property_type': 'apartment', 'price': 1000, 'rooms': 2}
+        filters = {
+            'city': sample.get('city_id'),
+            'property_type': sample['property_type'],
+            'price__gte': sample['price'],
+            'price__lte': sample['price'],
+        }
+        filters = {key: value for key, value in filters.items() if value is not None}
+        scan_pattern = SCAN_PATTERNS.get(connection.vendor)
+        sort_pattern = SORT_PATTERNS.get(connection.vendor)
+        scans = sorts = total = 0
+
+        for params in self.get_combinations(filters, self.get_extra_filters(sample)):
+            plan = self.get_queryset(params).explain()
+            label = '&'.join(f'{key}={value}' for key, value in params.items())
+            total += 1
+
+            if scan_pattern and scan_pattern.search(plan):
+                scans += 1
+                self.stdout.write(self.style.ERROR(f'[SCAN] ?{label}'))
+            elif sort_pattern and sort_pattern.search(plan):
+                sorts += 1
+                self.stdout.write(self.style.WARNING(f'[SORT] ?{label}'))
+            elif options['verbose_plans']:
+                self.stdout.write(self.style.SUCCESS(f'[OK]   ?{label}'))
+            else:
+                continue
+            for line in plan.splitlines():
+                self.stdout.write(f'    {line}')
+
+        self.stdout.write(
+            f'{total} plans on {connection.vendor}: {scans} full-table scans, '
+            f'{sorts} sorts of the filtered rows.'
+        )
+        if scans and options['fail_on_scan']:
+            raise CommandError('Full-table scans detected.')
+
+    def get_extra_filters(self, sample):
+        """One parameter set per other PropertyFilterSet filter, built from the sample row."""
+        shapes = [
+            {'rooms': sample.get('rooms')},
+            {'rooms__gte': sample.get('rooms')},
+            {'district': sample.get('district_id')},
+            {'districts': sample.get('district_id')},
+            {'cities': sample.get('city_id')},
+            {'region': sample.get('region_id')},
+        ]
+        latitude, longitude = sample.get('latitude'), sample.get('longitude')
+        if latitude is not None and longitude is not None:
+            shapes.append({'bbox': f'{longitude - 0.05},{latitude - 0.05},{longitude + 0.05},{latitude + 0.05}'})
+            shapes.append({'near': f'{latitude},{longitude}', 'radius': 5})
+        return [shape for shape in shapes if None not in shape.values()]
+
+    def get_combinations(self, filters, extra_filters=()):
+        # Every subset of the city/type/price filters, then each other filter
+        # alone and together with the type and price range.
+        keys = list(filters)
+        subsets = [
+            {key: filters[key] for key in subset}
+            for size in range(len(keys) + 1) for subset in combinations(keys, size)
+        ]
+        narrowing = {key: value for key, value in filters.items() if key != 'city'}
+        for shape in extra_filters:
+            subsets += [shape, {**shape, **narrowing}]
+        for subset in subsets:
+            for ordering in ORDERINGS:
+                yield {**subset, 'ordering': ordering}
+
+    def get_queryset(self, params):
+        view = PropertyListView()
+        view.request = Request(APIRequestFactory().get('/properties/', params))
+        view.format_kwarg = None
+        view.args, view.kwargs = (), {}
+        queryset = view.filter_queryset(view.get_queryset())
+        return queryset[:view.paginator.page_size]
@@ -0,0 +1,45 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from house_app.importer import IMPORT_FORMATS, PropertyImporter, get_import_format, read_rows
+from house_app.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create properties for one seller from a CSV or NDJSON file ("-" reads stdin).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--seller', required=True, help='Username owning the imported listings.')
+        parser.add_argument('--format', dest='import_format', choices=IMPORT_FORMATS, help='Default: from the file extension.')
+        parser.add_argument('--chunk-size', type=int, default=PropertyImporter.chunk_size)
+        parser.add_argument('--dry-run', action='store_true', help='Validate without writing.')
+
+    def handle(self, *args, **options):
+        import_format = options['import_format'] or get_import_format(options['path'])
+        if import_format is None:
+            raise CommandError('Cannot guess the format, pass --format.')
+        try:
+            seller = UserProfile.objects.get(username=options['seller'])
+        except UserProfile.DoesNotExist:
+            raise CommandError(f'Unknown seller "{options["seller"]}".')
+
+        importer = PropertyImporter(seller, chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+        started = time.perf_counter()
+        if options['path'] == '-':
+            result = importer.run(read_rows(sys.stdin.buffer, import_format))
+        else:
+            with open(options['path'], 'rb') as file:
+                result = importer.run(read_rows(file, import_format))
+        elapsed = time.perf_counter() - started
+
+        for error in result.errors:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        if result.invalid > len(result.errors):
+            self.stderr.write(f'... and {result.invalid - len(result.errors)} more invalid rows.')
+        verb = 'Validated' if options['dry_run'] else 'Created'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {result.created} of {result.rows} rows in {elapsed:.2f}s ({result.invalid} invalid).'
+        ))
@@ -0,0 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from house_app.images import process_in_worker, get_worker_count, process_property_image
+from house_app.models import PropertyImage
+
+
+class Command(BaseCommand):
+    help = 'Render thumbnail/card/full/webp variants for property images that do not have them yet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-render images that already have variants.')
+        parser.add_argument('--workers', type=int, default=None, help='Worker threads (default: IMAGE_PROCESSING_WORKERS).')
+
+    def handle(self, *args, **options):
+        images = PropertyImage.objects.exclude(image='')
+        if not options['all']:
+            images = images.filter(thumbnail='')
+        pks = list(images.order_by('pk').values_list('pk', flat=True))
+
+        workers = options['workers'] if options['workers'] is not None else get_worker_count()
+        if workers:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(process_in_worker, pks))
+        else:
+            results = [process_property_image(pk) for pk in pks]
+
+        processed = sum(bool(result) for result in results)
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} of {len(pks)} images.'))
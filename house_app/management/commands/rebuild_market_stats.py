@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from house_app.models import MarketStats
+
+
+class Command(BaseCommand):
+    help = 'Recompute MarketStats for every city, district and property type from the Property table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale', action='store_true',
+            help='Only refresh the rows bulk writes flagged and did not refresh on commit, and the medians '
+                 'single writes left out of date; run it from a scheduled job.'
+        )
+
+    def handle(self, *args, **options):
+        if options['stale']:
+            MarketStats.objects.refresh_stale()
+            MarketStats.objects.refresh_medians()
+        else:
+            with transaction.atomic():
+                MarketStats.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Market stats hold {MarketStats.objects.count()} groups.'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from house_app.models import SellerStats
+
+
+class Command(BaseCommand):
+    help = 'Recompute SellerStats for every seller from the Review table.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            SellerStats.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {SellerStats.objects.count()} sellers.'))
@@ -0,0 +1,73 @@
+import json
+import tempfile
+from urllib.request import Request as HTTPRequest, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+
+from house_app.benchmark import DEFAULT_SIZES, ROUTES, prepare_route, seed_dataset
+from house_app.profiling import profiler
+
+
+class Command(BaseCommand):
+    help = (
+        'Print the per-endpoint SQL profile: fetched from a running server (--url) or gathered by '
+        'replaying the benchmark routes against a throwaway test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Full URL of the sql-profile endpoint of a running server.')
+        parser.add_argument('--token', help='Admin access token for --url.')
+        parser.add_argument('--iterations', type=int, default=5, help='Replays of every route (without --url).')
+        parser.add_argument('--queries', type=int, default=3, help='Hot queries shown per endpoint.')
+        parser.add_argument('--json', action='store_true', help='Print the raw JSON report.')
+
+    def handle(self, *args, **options):
+        report = self.fetch(options['url'], options['token']) if options['url'] else self.replay(options['iterations'])
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        for endpoint, row in report['endpoints'].items():
+            style = self.style.WARNING if row['avg_duplicates'] else self.style.SUCCESS
+            self.stdout.write(style(
+                f"{endpoint:45} n={row['requests']:<5} q={row['avg_queries']:<6} max={row['max_queries']:<4} "
+                f"dup={row['avg_duplicates']:<6} sql={row['avg_sql_ms']:.2f}ms serialize={row['avg_serialize_ms']:.2f}ms "
+                f"render={row['avg_render_ms']:.2f}ms "
+                f"total={row['avg_total_ms']:.2f}ms"
+            ))
+            for query in row['hot_queries'][:options['queries']]:
+                self.stdout.write(
+                    f"    {query['total_ms']:>9.2f}ms x{query['calls_per_request']:<5} {query['sql'][:110]}"
+                )
+
+    def fetch(self, url, token):
+        headers = {'Accept': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        try:
+            with urlopen(HTTPRequest(url, headers=headers), timeout=30) as response:
+                return json.load(response)
+        except OSError as exc:
+            raise CommandError(f'Could not fetch {url}: {exc}')
+
+    def replay(self, iterations):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with tempfile.TemporaryDirectory() as media_root, override_settings(
+                PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], MEDIA_ROOT=media_root,
+                SQL_PROFILING_ENABLED=True, SQL_PROFILING_SAMPLE_RATE=1.0,
+            ):
+                dataset = seed_dataset(DEFAULT_SIZES)
+                client = APIClient()
+                profiler.reset()
+                for route in ROUTES:
+                    for _ in range(iterations):
+                        prepare_route(client, route, dataset)()
+                return profiler.snapshot()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
@@ -0,0 +1,64 @@
+from django.db import migrations
+
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE house_app_property_fts USING fts5("
+    "title, description, address, tokenize='unicode61 remove_diacritics 2')",
+    "INSERT INTO house_app_property_fts (rowid, title, description, address) "
+    "SELECT id, coalesce(title_en, '') || ' ' || coalesce(title_ru, ''), "
+    "coalesce(description_en, '') || ' ' || coalesce(description_ru, ''), address "
+    "FROM house_app_property",
+]
+SQLITE_BACKWARD = [
+    "DROP TABLE IF EXISTS house_app_property_fts",
+]
+
+POSTGRES_FORWARD = [
+    "CREATE TABLE house_app_property_search ("
+    "property_id bigint PRIMARY KEY REFERENCES house_app_property (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+    "document tsvector NOT NULL)",
+    "CREATE INDEX house_app_property_search_document_idx ON house_app_property_search USING GIN (document)",
+    "INSERT INTO house_app_property_search (property_id, document) "
+    "SELECT id, "
+    "setweight(to_tsvector('english', coalesce(title_en, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(title_ru, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(address, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description_en, '')), 'C') || "
+    "setweight(to_tsvector('russian', coalesce(description_ru, '')), 'C') "
+    "FROM house_app_property",
+]
+POSTGRES_BACKWARD = [
+    "DROP TABLE IF EXISTS house_app_property_search",
+]
+
+STATEMENTS = {
+    'sqlite': (SQLITE_FORWARD, SQLITE_BACKWARD),
+    'postgresql': (POSTGRES_FORWARD, POSTGRES_BACKWARD),
+}
+
+
+def run_statements(schema_editor, backward):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    for sql in statements[backward]:
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    run_statements(schema_editor, backward=False)
+
+
+def drop_search_index(apps, schema_editor):
+    run_statements(schema_editor, backward=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('house_app', '0004_property_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
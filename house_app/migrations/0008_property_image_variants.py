@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-18 17:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('house_app', '0007_seller_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyimage',
+            name='card',
+            field=models.ImageField(blank=True, editable=False, upload_to='property/images/variants/'),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='full',
+            field=models.ImageField(blank=True, editable=False, upload_to='property/images/variants/'),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, upload_to='property/images/variants/'),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='webp',
+            field=models.ImageField(blank=True, editable=False, upload_to='property/images/variants/'),
+        ),
+    ]
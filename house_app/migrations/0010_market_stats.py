@@ -0,0 +1,73 @@
+# Generated by Django 5.2.9 on 2026-10-18 17:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Copies of house_app.models.get_market_groups/summarize_market as of this
+# migration, so later changes to them do not change what it does.
+def get_market_groups(city_id, district_id, property_type):
+    groups = {(city_id, None, property_type)}
+    if district_id is not None:
+        groups.add((city_id, district_id, property_type))
+    return groups
+
+
+def summarize_market(prices):
+    per_m2 = sorted(float(price) / area for price, area in prices if area > 0)
+    count = len(prices)
+    values = {
+        'listing_count': count,
+        'avg_price': round(sum(float(price) for price, area in prices) / count, 2),
+        'avg_price_per_m2': None,
+        'median_price_per_m2': None,
+    }
+    if per_m2:
+        middle = len(per_m2) // 2
+        median = per_m2[middle] if len(per_m2) % 2 else (per_m2[middle - 1] + per_m2[middle]) / 2
+        values['avg_price_per_m2'] = round(sum(per_m2) / len(per_m2), 2)
+        values['median_price_per_m2'] = round(median, 2)
+    return values
+
+
+def build_market_stats(apps, schema_editor):
+    Property = apps.get_model('house_app', 'Property')
+    MarketStats = apps.get_model('house_app', 'MarketStats')
+    prices = {}
+    rows = Property.objects.values_list('city_id', 'district_id', 'property_type', 'price', 'area')
+    for city_id, district_id, property_type, price, area in rows.order_by().iterator(chunk_size=5000):
+        for group in get_market_groups(city_id, district_id, property_type):
+            prices.setdefault(group, []).append((price, area))
+    MarketStats.objects.bulk_create([
+        MarketStats(city_id=city_id, district_id=district_id, property_type=property_type, **summarize_market(group))
+        for (city_id, district_id, property_type), group in prices.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('house_app', '0009_property_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('property_type', models.CharField(choices=[('apartment', 'Apartment'), ('house', 'House'), ('land', 'Land'), ('commercial', 'Commercial'), ('studio', 'Studio')], max_length=20)),
+                ('listing_count', models.PositiveIntegerField(default=0)),
+                ('avg_price', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('avg_price_per_m2', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('median_price_per_m2', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('is_stale', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='market_stats', to='house_app.city')),
+                ('district', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='market_stats', to='house_app.district')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('district__isnull', True)), fields=('city', 'property_type'), name='market_stats_city_type_uniq'), models.UniqueConstraint(condition=models.Q(('district__isnull', False)), fields=('city', 'district', 'property_type'), name='market_stats_district_type_uniq')],
+            },
+        ),
+        migrations.RunPython(build_market_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-18 17:32
+
+import house_app.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('house_app', '0011_property_upload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='propertydocument',
+            name='file',
+            field=models.FileField(storage=house_app.storage.select_property_media_storage, upload_to='property/documents/'),
+        ),
+        migrations.AlterField(
+            model_name='propertyimage',
+            name='image',
+            field=models.ImageField(storage=house_app.storage.select_property_media_storage, upload_to='property/images/'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.9 on 2026-10-18 17:43
+
+from django.db import migrations, models
+
+
+def get_location_path(*ids):
+    return '/' + ''.join(f'{pk}/' for pk in ids if pk is not None)
+
+
+def build_location_paths(apps, schema_editor):
+    # The path is built from the stored region, city and district as they are:
+    # a data migration must not change where a listing says it is.
+    Property = apps.get_model('house_app', 'Property')
+    changed = [
+        Property(pk=pk, location_path=get_location_path(region_id, city_id, district_id))
+        for pk, region_id, city_id, district_id in Property.objects.order_by().values_list(
+            'pk', 'region_id', 'city_id', 'district_id',
+        ).iterator(chunk_size=2000)
+    ]
+    Property.objects.bulk_update(changed, ['location_path'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('house_app', '0012_media_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='location_path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['location_path'], name='property_location_path_idx'),
+        ),
+        migrations.RunPython(build_location_paths, migrations.RunPython.noop),
+    ]
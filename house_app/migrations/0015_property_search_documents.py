@@ -0,0 +1,34 @@
+# Generated by Django 5.2.9 on 2026-10-18 18:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('house_app', '0014_saved_searches'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyFTSDocument',
+            fields=[
+                ('property', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='fts_document', serialize=False, to='house_app.property')),
+            ],
+            options={
+                'db_table': 'house_app_property_fts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertySearchDocument',
+            fields=[
+                ('property', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='house_app.property')),
+            ],
+            options={
+                'db_table': 'house_app_property_search',
+                'managed': False,
+            },
+        ),
+    ]
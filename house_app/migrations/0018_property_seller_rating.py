@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-18 18:19
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def copy_seller_ratings(apps, schema_editor):
+    Property = apps.get_model('house_app', 'Property')
+    SellerStats = apps.get_model('house_app', 'SellerStats')
+    rating = SellerStats.objects.filter(seller_id=OuterRef('seller_id')).values('rating_avg')[:1]
+    Property.objects.using(schema_editor.connection.alias).update(seller_rating=Coalesce(Subquery(rating), Value(0.0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('house_app', '0017_property_updated_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='seller_rating',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['seller_rating', 'id'], name='property_seller_rating_id_idx'),
+        ),
+        migrations.RunPython(copy_seller_ratings, migrations.RunPython.noop),
+    ]
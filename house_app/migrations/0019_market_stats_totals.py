@@ -0,0 +1,50 @@
+# Generated by Django 5.2.9 on 2026-10-18 18:25
+
+from django.db import migrations, models
+from django.db.models import Count, F, FloatField, Q, Sum
+from django.db.models.functions import Cast
+
+
+def fill_market_totals(apps, schema_editor):
+    Property = apps.get_model('house_app', 'Property')
+    MarketStats = apps.get_model('house_app', 'MarketStats')
+    with_area = Q(area__gt=0)
+    for row in MarketStats.objects.all().iterator():
+        properties = Property.objects.filter(city_id=row.city_id, property_type=row.property_type)
+        if row.district_id is not None:
+            properties = properties.filter(district_id=row.district_id)
+        totals = properties.aggregate(
+            price_sum=Sum('price'),
+            price_per_m2_sum=Sum(Cast('price', FloatField()) / F('area'), filter=with_area),
+            price_per_m2_count=Count('id', filter=with_area),
+        )
+        row.price_sum = totals['price_sum'] or 0
+        row.price_per_m2_sum = totals['price_per_m2_sum'] or 0.0
+        row.price_per_m2_count = totals['price_per_m2_count']
+        row.save(update_fields=['price_sum', 'price_per_m2_sum', 'price_per_m2_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('house_app', '0018_property_seller_rating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='marketstats',
+            name='price_per_m2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='marketstats',
+            name='price_per_m2_sum',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='marketstats',
+            name='price_sum',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=18),
+        ),
+        migrations.RunPython(fill_market_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 18:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('house_app', '0019_market_stats_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='marketstats',
+            name='median_is_stale',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.9 on 2026-10-18 18:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('house_app', '0020_market_stats_median_is_stale'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='property',
+            name='property_location_path_idx',
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['location_path'], name='property_location_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
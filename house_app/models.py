@@ -1,7 +1,23 @@
+import re
+import uuid
+from decimal import Decimal
+
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction, IntegrityError
+from django.db.models import Case, Count, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Round
+from django.db.models.lookups import StartsWith
+from django.utils import timezone
+from modeltranslation.settings import AVAILABLE_LANGUAGES
+from modeltranslation.utils import build_localized_fieldname
 from phonenumber_field.modelfields import PhoneNumberField
 from django.core.validators import MinValueValidator, MaxValueValidator
+
+from .search import get_search_backend
+from .storage import is_content_addressed, select_property_media_storage
+
+
 class UserProfile(AbstractUser):
     ROLE_CHOICES = (
         ('admin', 'Admin'),
@@ -50,6 +66,36 @@ class District(models.Model):
 
 
 
+def get_location_path(*ids):
+    """``/<region>/<city>/<district>/`` with the missing levels left out."""
+    return '/' + ''.join(f'{pk}/' for pk in ids if pk is not None)
+
+
+class PathStartsWith(StartsWith):
+    """
+    ``startswith`` for location_path. A prefix match does not depend on the
+    column's collation, unlike a ``BETWEEN path AND path || '~'`` range. On
+    SQLite it is a GLOB, which can use the index; SQLite's LIKE is
+    case-insensitive and cannot.
+    """
+
+    def as_sqlite(self, compiler, connection):
+        if not self.rhs_is_direct_value():
+            return self.as_sql(compiler, connection)
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        pattern = re.sub(r'([*?\[])', r'[\1]', str(self.rhs)) + '*'
+        return f'{lhs} GLOB %s', [*lhs_params, pattern]
+
+
+def get_location_errors(region_id, city, district=None):
+    errors = {}
+    if city.region_id != region_id:
+        errors['city'] = ['City is not in the selected region.']
+    if district is not None and district.city_id != city.pk:
+        errors['district'] = ['District is not in the selected city.']
+    return errors
+
+
 class Property(models.Model):
     PROPERTY_TYPE_CHOICES = (
         ('apartment', 'Apartment'),
@@ -83,6 +129,20 @@ class Property(models.Model):
     )
 
     address = models.CharField(max_length=255)
+    latitude = models.FloatField(
+        null=True, blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    longitude = models.FloatField(
+        null=True, blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+    # Derived from latitude/longitude (see house_app.geo); an indexed prefix
+    # range on it is the spatial lookup on every database.
+    geohash = models.CharField(max_length=12, blank=True, default='', editable=False)
+    # get_location_path(region, city, district), kept in step on save: every
+    # listing of a region or city is one indexed prefix match on this column.
+    location_path = models.CharField(max_length=64, blank=True, default='', editable=False)
 
     area = models.FloatField()
     price = models.DecimalField(max_digits=12, decimal_places=2)
@@ -95,12 +155,39 @@ class Property(models.Model):
         on_delete=models.CASCADE,
         related_name='properties_seller'
     )
+    # The seller's SellerStats.rating_avg (0 without reviews), copied by
+    # SellerStatsManager so ?ordering=seller_rating is an index scan.
+    seller_rating = models.FloatField(default=0.0, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['city', 'property_type', 'price'], name='property_city_type_price_idx'),
+            models.Index(fields=['property_type', 'price'], name='property_type_price_idx'),
+            models.Index(fields=['created_at', 'id'], name='property_created_id_idx'),
+            models.Index(fields=['price', 'id'], name='property_price_id_idx'),
+            models.Index(fields=['area', 'id'], name='property_area_id_idx'),
+            models.Index(fields=['geohash'], name='property_geohash_idx'),
+            # The operator class lets PostgreSQL answer LIKE 'prefix%' from the index
+            # under any collation; other databases ignore it.
+            models.Index(fields=['location_path'], name='property_location_path_idx', opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['updated_at'], name='property_updated_idx'),
+            models.Index(fields=['seller_rating', 'id'], name='property_seller_rating_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def clean(self):
+        if self.city_id is not None:
+            errors = get_location_errors(self.region_id, self.city, self.district)
+            if errors:
+                raise ValidationError(errors)
+
+
+Property._meta.get_field('location_path').register_lookup(PathStartsWith)
 
 
 class PropertyImage(models.Model):
@@ -109,7 +196,13 @@ class PropertyImage(models.Model):
         on_delete=models.CASCADE,
         related_name='images'
     )
-    image = models.ImageField(upload_to='property/images/')
+    image = models.ImageField(upload_to='property/images/', storage=select_property_media_storage)
+    # Resized copies of ``image`` rendered by house_app.images on the worker pool.
+    thumbnail = models.ImageField(upload_to='property/images/variants/', blank=True, editable=False)
+    card = models.ImageField(upload_to='property/images/variants/', blank=True, editable=False)
+    full = models.ImageField(upload_to='property/images/variants/', blank=True, editable=False)
+    webp = models.ImageField(upload_to='property/images/variants/', blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Image for {self.property.title}"
@@ -121,7 +214,121 @@ class PropertyDocument(models.Model):
         on_delete=models.CASCADE,
         related_name='documents'
     )
-    file = models.FileField(upload_to='property/documents/')
+    file = models.FileField(upload_to='property/documents/', storage=select_property_media_storage)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+# The full-text index tables created by migration 0005, mapped only so the
+# search backends can join them (house_app.search); rows are written in SQL.
+class PropertyFTSDocument(models.Model):
+    property = models.OneToOneField(
+        Property,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        related_name='fts_document'
+    )
+
+    class Meta:
+        managed = False
+        db_table = 'house_app_property_fts'
+
+
+class PropertySearchDocument(models.Model):
+    property = models.OneToOneField(
+        Property,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_constraint=False,
+        related_name='search_document'
+    )
+
+    class Meta:
+        managed = False
+        db_table = 'house_app_property_search'
+
+
+class MediaBlobManager(models.Manager):
+
+    def acquire(self, name):
+        """Count one more reference to the blob ``name``."""
+        if not is_content_addressed(name):
+            return
+        self.bulk_create([MediaBlob(name=name)], ignore_conflicts=True)
+        self.filter(name=name).update(ref_count=F('ref_count') + 1)
+
+    def release(self, name, storage):
+        """Drop one reference; the file is deleted after commit once none are left."""
+        if not is_content_addressed(name):
+            return
+        self.filter(name=name).update(ref_count=F('ref_count') - 1)
+        if self.filter(name=name, ref_count__lte=0).delete()[0]:
+            transaction.on_commit(lambda: storage.delete(name))
+
+    def rebuild(self):
+        """Recount references from the image and document tables."""
+        counts = {}
+        for model, field_name in ((PropertyImage, 'image'), (PropertyDocument, 'file')):
+            rows = model.objects.values_list(field_name).order_by().annotate(count=Count('pk'))
+            for name, count in rows:
+                if is_content_addressed(name):
+                    counts[name] = counts.get(name, 0) + count
+        self.all().delete()
+        self.bulk_create([MediaBlob(name=name, ref_count=count) for name, count in counts.items()], batch_size=1000)
+
+
+class MediaBlob(models.Model):
+    """Reference count of one file in the content-addressed property media storage."""
+    name = models.CharField(max_length=255, primary_key=True)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = MediaBlobManager()
+
+    def __str__(self):
+        return f'{self.name} ({self.ref_count})'
+
+
+class PropertyUpload(models.Model):
+    """
+    A chunked upload in progress. Parts are stored next to the final media
+    files (see house_app.uploads) and joined into a PropertyImage or
+    PropertyDocument on completion.
+    """
+    KIND_CHOICES = (
+        ('image', 'Image'),
+        ('document', 'Document'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    property = models.ForeignKey(
+        Property,
+        on_delete=models.CASCADE,
+        related_name='uploads'
+    )
+    owner = models.ForeignKey(
+        UserProfile,
+        on_delete=models.CASCADE,
+        related_name='uploads'
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    part_size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def get_part_count(self):
+        return max(1, -(-self.size // self.part_size))
+
+    def get_part_length(self, index):
+        if index == self.get_part_count() - 1:
+            return self.size - index * self.part_size
+        return self.part_size
+
+    def __str__(self):
+        return f'{self.filename} ({self.kind}) for {self.property_id}'
 
 
 class Review(models.Model):
@@ -142,3 +349,505 @@ class Review(models.Model):
 
     def __str__(self):
         return f'{self.rating} ⭐ from {self.author}'
+
+
+
+class SellerStatsManager(models.Manager):
+
+    def get_rating(self, seller_id):
+        return self.filter(seller_id=seller_id).values_list('rating_avg', flat=True).first() or 0.0
+
+    def update_properties(self, seller_ids=None):
+        """Copy ``rating_avg`` to the sellers' Property.seller_rating, touching their listings."""
+        properties = Property.objects.all()
+        if seller_ids is not None:
+            properties = properties.filter(seller_id__in=seller_ids)
+        rating = self.filter(seller_id=OuterRef('seller_id')).values('rating_avg')[:1]
+        properties.update(seller_rating=Coalesce(Subquery(rating), Value(0.0)), updated_at=timezone.now())
+
+    def apply_review(self, seller_id, rating, delta):
+        """Add (``delta=1``) or remove (``delta=-1``) one review in a single atomic UPDATE."""
+        count = F('review_count') + delta
+        total = F('rating_sum') + delta * rating
+        changes = {
+            'review_count': count,
+            'rating_sum': total,
+            f'rating_{rating}': F(f'rating_{rating}') + delta,
+            'rating_avg': Case(
+                When(Q(review_count__lte=-delta), then=Value(0.0)),
+                default=Cast(total, FloatField()) / Cast(count, FloatField()),
+                output_field=FloatField(),
+            ),
+        }
+        if not self.filter(seller_id=seller_id).update(**changes) and delta > 0:
+            try:
+                with transaction.atomic():
+                    self.create(
+                        seller_id=seller_id, review_count=1, rating_sum=rating, rating_avg=rating, **{f'rating_{rating}': 1}
+                    )
+            except IntegrityError:
+                self.filter(seller_id=seller_id).update(**changes)
+        self.update_properties([seller_id])
+
+    def rebuild(self, seller_ids=None):
+        reviews = Review.objects.all()
+        if seller_ids is not None:
+            reviews = reviews.filter(seller_id__in=seller_ids)
+            self.filter(seller_id__in=seller_ids).delete()
+        else:
+            self.all().delete()
+
+        rows = reviews.values('seller_id').order_by().annotate(
+            review_count=Count('id'),
+            rating_sum=Sum('rating'),
+            **{f'rating_{i}': Count('id', filter=Q(rating=i)) for i in range(1, 6)},
+        )
+        self.bulk_create([
+            SellerStats(rating_avg=row['rating_sum'] / row['review_count'], **row)
+            for row in rows
+        ])
+        self.update_properties(seller_ids)
+
+
+class SellerStats(models.Model):
+    seller = models.OneToOneField(
+        UserProfile,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='seller_stats'
+    )
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(default=0, db_index=True)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    objects = SellerStatsManager()
+
+    @property
+    def histogram(self):
+        return {str(i): getattr(self, f'rating_{i}') for i in range(1, 6)}
+
+    def __str__(self):
+        return f'{self.seller}: {self.rating_avg:.2f} ({self.review_count})'
+
+
+def get_market_groups(city_id, district_id, property_type):
+    """The MarketStats keys a property counts towards: its city, and its district if set."""
+    groups = {(city_id, None, property_type)}
+    if district_id is not None:
+        groups.add((city_id, district_id, property_type))
+    return groups
+
+
+def summarize_market(prices):
+    """Field values for one MarketStats row from ``(price, area)`` pairs."""
+    per_m2 = sorted(float(price) / area for price, area in prices if area > 0)
+    count = len(prices)
+    price_sum = sum(price for price, area in prices)
+    values = {
+        'listing_count': count,
+        'price_sum': price_sum,
+        'price_per_m2_sum': sum(per_m2),
+        'price_per_m2_count': len(per_m2),
+        'avg_price': round(float(price_sum) / count, 2),
+        'avg_price_per_m2': None,
+        'median_price_per_m2': None,
+    }
+    if per_m2:
+        middle = len(per_m2) // 2
+        median = per_m2[middle] if len(per_m2) % 2 else (per_m2[middle - 1] + per_m2[middle]) / 2
+        values['avg_price_per_m2'] = round(sum(per_m2) / len(per_m2), 2)
+        values['median_price_per_m2'] = round(median, 2)
+    return values
+
+
+def add_market_listing(changes, state, delta):
+    """Count one listing of ``state`` (see signals.market.get_market_state) in or out of its groups' ``changes``."""
+    city_id, district_id, property_type, price, area = state
+    # An unsaved instance holds whatever was assigned, e.g. price='150000.00'.
+    price = Property._meta.get_field('price').to_python(price)
+    area = Property._meta.get_field('area').to_python(area)
+    for group in get_market_groups(city_id, district_id, property_type):
+        change = changes.setdefault(group, [0, 0, 0.0, 0])
+        change[0] += delta
+        change[1] += delta * price
+        if area > 0:
+            change[2] += delta * float(price) / area
+            change[3] += delta
+
+
+def get_price_per_m2():
+    return Cast('price', FloatField()) / F('area')
+
+
+class MarketStatsManager(models.Manager):
+
+    def get_properties(self, city_id, district_id, property_type):
+        properties = Property.objects.filter(city_id=city_id, property_type=property_type)
+        if district_id is not None:
+            properties = properties.filter(district_id=district_id)
+        return properties
+
+    def get_median(self, group, count):
+        """Median price per m² of ``count`` listings with an area, reading only the middle one or two."""
+        if not count:
+            return None
+        values = list(
+            self.get_properties(*group).filter(area__gt=0).annotate(price_per_m2=get_price_per_m2())
+            .order_by('price_per_m2').values_list('price_per_m2', flat=True)[(count - 1) // 2:count // 2 + 1]
+        )
+        return round(sum(values) / len(values), 2) if values else None
+
+    def refresh(self, groups):
+        """Recompute the rows for ``groups`` of ``(city_id, district_id, property_type)`` in the database."""
+        for group in groups:
+            city_id, district_id, property_type = group
+            key = {'city_id': city_id, 'district_id': district_id, 'property_type': property_type}
+            with_area = Q(area__gt=0)
+            sums = self.get_properties(*group).aggregate(
+                listing_count=Count('id'),
+                price_sum=Sum('price'),
+                price_per_m2_sum=Sum(get_price_per_m2(), filter=with_area),
+                price_per_m2_count=Count('id', filter=with_area),
+            )
+            if not sums['listing_count']:
+                self.filter(**key).delete()
+                continue
+            values = {
+                **sums,
+                'price_per_m2_sum': sums['price_per_m2_sum'] or 0.0,
+                'avg_price': round(float(sums['price_sum']) / sums['listing_count'], 2),
+                'avg_price_per_m2': None,
+                'median_price_per_m2': self.get_median(group, sums['price_per_m2_count']),
+            }
+            if sums['price_per_m2_count']:
+                values['avg_price_per_m2'] = round(values['price_per_m2_sum'] / sums['price_per_m2_count'], 2)
+            changes = {'is_stale': False, 'median_is_stale': False, 'updated_at': timezone.now(), **values}
+            if self.filter(**key).update(**changes):
+                continue
+            try:
+                with transaction.atomic():
+                    self.create(**key, **values)
+            except IntegrityError:
+                self.filter(**key).update(**changes)
+
+    def apply_changes(self, changes):
+        """
+        Apply ``add_market_listing`` deltas with one UPDATE per group; groups
+        without a row yet are refreshed. The median needs the group's rows, so
+        it is only flagged here and recomputed by refresh_medians().
+        """
+        missing = []
+        for group, (count, price_sum, per_m2_sum, per_m2_count) in changes.items():
+            if not (count or price_sum or per_m2_sum or per_m2_count):
+                continue
+            city_id, district_id, property_type = group
+            key = {'city_id': city_id, 'district_id': district_id, 'property_type': property_type}
+            new_count = F('listing_count') + count
+            new_price_sum = F('price_sum') + Value(price_sum, output_field=models.DecimalField())
+            new_per_m2_sum = F('price_per_m2_sum') + per_m2_sum
+            new_per_m2_count = F('price_per_m2_count') + per_m2_count
+            updated = self.filter(**key).update(
+                listing_count=new_count,
+                price_sum=new_price_sum,
+                price_per_m2_sum=new_per_m2_sum,
+                price_per_m2_count=new_per_m2_count,
+                avg_price=Case(
+                    When(listing_count__lte=-count, then=Value(0.0)),
+                    default=Round(Cast(new_price_sum, FloatField()) / Cast(new_count, FloatField()), 2),
+                    output_field=FloatField(),
+                ),
+                avg_price_per_m2=Case(
+                    When(price_per_m2_count__lte=-per_m2_count, then=Value(None)),
+                    default=Round(new_per_m2_sum / Cast(new_per_m2_count, FloatField()), 2),
+                    output_field=FloatField(),
+                ),
+                median_is_stale=True,
+                updated_at=timezone.now(),
+            )
+            if not updated:
+                missing.append(group)
+            elif count < 0:
+                self.filter(**key, listing_count__lte=0).delete()
+        self.refresh(missing)
+
+    def refresh_medians(self):
+        """Recompute the medians apply_changes flagged, once per row however many writes it took."""
+        rows = self.filter(median_is_stale=True).values_list(
+            'pk', 'city_id', 'district_id', 'property_type', 'price_per_m2_count', 'updated_at',
+        )
+        for pk, city_id, district_id, property_type, count, updated_at in rows:
+            # A write meanwhile changes updated_at and leaves the row flagged for the next run.
+            self.filter(pk=pk, updated_at=updated_at).update(
+                median_price_per_m2=self.get_median((city_id, district_id, property_type), count),
+                median_is_stale=False,
+            )
+
+    def mark_stale(self, groups):
+        """Flag ``groups`` for a later refresh_stale(), creating rows that do not exist yet."""
+        existing = set()
+        for city_id, district_id, property_type in groups:
+            key = {'city_id': city_id, 'district_id': district_id, 'property_type': property_type}
+            if self.filter(**key).update(is_stale=True):
+                existing.add((city_id, district_id, property_type))
+        self.bulk_create([
+            MarketStats(city_id=city_id, district_id=district_id, property_type=property_type, is_stale=True)
+            for city_id, district_id, property_type in set(groups) - existing
+        ], ignore_conflicts=True)
+
+    def refresh_stale(self):
+        groups = self.filter(is_stale=True).values_list('city_id', 'district_id', 'property_type')
+        with transaction.atomic():
+            self.refresh(list(groups))
+
+    def rebuild(self):
+        """Replace every row from a single ordered pass over the properties."""
+        prices = {}
+        rows = Property.objects.values_list('city_id', 'district_id', 'property_type', 'price', 'area')
+        for city_id, district_id, property_type, price, area in rows.order_by().iterator(chunk_size=5000):
+            for group in get_market_groups(city_id, district_id, property_type):
+                prices.setdefault(group, []).append((price, area))
+
+        self.all().delete()
+        self.bulk_create([
+            MarketStats(city_id=city_id, district_id=district_id, property_type=property_type, **summarize_market(group))
+            for (city_id, district_id, property_type), group in prices.items()
+        ], batch_size=1000)
+
+
+class MarketStats(models.Model):
+    """
+    Listing count and price per m² of one property type in a city
+    (``district`` empty) or in one of its districts.
+    """
+    city = models.ForeignKey(
+        City,
+        on_delete=models.CASCADE,
+        related_name='market_stats'
+    )
+    district = models.ForeignKey(
+        District,
+        on_delete=models.CASCADE,
+        related_name='market_stats',
+        blank=True,
+        null=True
+    )
+    property_type = models.CharField(max_length=20, choices=Property.PROPERTY_TYPE_CHOICES)
+    listing_count = models.PositiveIntegerField(default=0)
+    avg_price = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    avg_price_per_m2 = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    median_price_per_m2 = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    # Running totals behind the averages, so a single listing change is one UPDATE.
+    price_sum = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    price_per_m2_sum = models.FloatField(default=0)
+    price_per_m2_count = models.PositiveIntegerField(default=0)
+    # Set by bulk writes, which refresh the rows on commit; `rebuild_market_stats
+    # --stale` catches any left behind.
+    is_stale = models.BooleanField(default=False)
+    # Set by single writes, which keep the totals and averages current but not
+    # the median; `rebuild_market_stats --stale` recomputes it.
+    median_is_stale = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = MarketStatsManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['city', 'property_type'],
+                condition=Q(district__isnull=True),
+                name='market_stats_city_type_uniq'
+            ),
+            models.UniqueConstraint(
+                fields=['city', 'district', 'property_type'],
+                condition=Q(district__isnull=False),
+                name='market_stats_district_type_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.district or self.city} / {self.property_type}: {self.median_price_per_m2}'
+
+
+SAVED_SEARCH_PARAMS = ('city', 'property_type', 'price__gte', 'price__lte', 'search')
+
+
+def get_search_text_fields():
+    return [
+        build_localized_fieldname(name, language)
+        for name in ('title', 'description') for language in AVAILABLE_LANGUAGES
+    ] + ['address']
+
+
+def get_price_bucket(price):
+    """Power-of-two price band; any price range spans a few dozen of them at most."""
+    return int(Property._meta.get_field('price').to_python(price)).bit_length()
+
+
+_price_field = Property._meta.get_field('price')
+MAX_PRICE_BUCKET = get_price_bucket(10 ** (_price_field.max_digits - _price_field.decimal_places))
+
+
+class SavedSearchManager(models.Manager):
+
+    def index(self, saved_search, created=False):
+        if not created:
+            SavedSearchTerm.objects.filter(saved_search=saved_search).delete()
+        SavedSearchTerm.objects.bulk_create(saved_search.get_terms())
+
+    def match(self, properties):
+        """
+        Record a SavedSearchMatch for every saved search a new listing
+        satisfies. Candidates come from one lookup of SavedSearchTerm by the
+        listings' cities, types and price buckets; only those are checked.
+        """
+        properties = list(properties)
+        if not properties:
+            return []
+        terms = SavedSearchTerm.objects.filter(
+            Q(city__in={prop.city_id for prop in properties}) | Q(city__isnull=True),
+            Q(property_type__in={prop.property_type for prop in properties}) | Q(property_type=''),
+            Q(price_bucket__in={get_price_bucket(prop.price) for prop in properties}) | Q(price_bucket__isnull=True),
+        )
+        candidates = list(self.filter(pk__in=terms.values('saved_search_id')))
+        pairs = [
+            (saved_search, prop) for prop in properties for saved_search in candidates
+            if saved_search.user_id != prop.seller_id and saved_search.is_match(prop)
+        ]
+        found = {}
+        for saved_search, prop in pairs:
+            text = saved_search.params.get('search')
+            if text:
+                found.setdefault(text, set()).add(prop.pk)
+        # One query per distinct search text.
+        found = {text: self.search(text, pks) for text, pks in found.items()}
+        matches = [
+            SavedSearchMatch(user_id=saved_search.user_id, saved_search=saved_search, property=prop)
+            for saved_search, prop in pairs
+            if not saved_search.params.get('search') or prop.pk in found[saved_search.params['search']]
+        ]
+        return SavedSearchMatch.objects.bulk_create(matches, ignore_conflicts=True)
+
+    def search(self, text, pks):
+        """Ids of ``pks`` that the property list's ``?search=text`` returns."""
+        queryset = Property.objects.filter(pk__in=pks)
+        backend = get_search_backend()
+        if backend is not None:
+            queryset = backend.search(queryset, text)
+        else:
+            # SearchFilter's fallback: every word in one of the text fields.
+            for word in text.split():
+                condition = Q()
+                for name in get_search_text_fields():
+                    condition |= Q(**{f'{name}__icontains': word})
+                queryset = queryset.filter(condition)
+        return set(queryset.values_list('pk', flat=True))
+
+
+class SavedSearch(models.Model):
+    """
+    A property list query (``SAVED_SEARCH_PARAMS`` of PropertyFilterSet and
+    the search text) whose new listings are collected in SavedSearchMatch.
+    """
+    user = models.ForeignKey(
+        UserProfile,
+        on_delete=models.CASCADE,
+        related_name='saved_searches'
+    )
+    name = models.CharField(max_length=100, blank=True)
+    params = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = SavedSearchManager()
+
+    def __str__(self):
+        return self.name or str(self.params)
+
+    def get_terms(self):
+        """One SavedSearchTerm per price bucket of the range; None stands for any value."""
+        low, high = self.params.get('price__gte'), self.params.get('price__lte')
+        if low is None and high is None:
+            buckets = [None]
+        else:
+            buckets = range(
+                get_price_bucket(Decimal(low)) if low is not None else 0,
+                (get_price_bucket(Decimal(high)) if high is not None else MAX_PRICE_BUCKET) + 1,
+            )
+        return [
+            SavedSearchTerm(
+                saved_search=self,
+                city_id=self.params.get('city'),
+                property_type=self.params.get('property_type', ''),
+                price_bucket=bucket,
+            )
+            for bucket in buckets
+        ]
+
+    def is_match(self, instance):
+        params = self.params
+        if 'city' in params and instance.city_id != params['city']:
+            return False
+        if 'property_type' in params and instance.property_type != params['property_type']:
+            return False
+        price = Decimal(str(instance.price))
+        if 'price__gte' in params and price < Decimal(params['price__gte']):
+            return False
+        if 'price__lte' in params and price > Decimal(params['price__lte']):
+            return False
+        # The search text is matched by SavedSearchManager.search, through the search backend.
+        return True
+
+
+class SavedSearchTerm(models.Model):
+    """Inverted index row of a SavedSearch; a NULL or blank column matches any listing."""
+    saved_search = models.ForeignKey(
+        SavedSearch,
+        on_delete=models.CASCADE,
+        related_name='terms'
+    )
+    city = models.ForeignKey(
+        City,
+        on_delete=models.CASCADE,
+        related_name='+',
+        blank=True,
+        null=True
+    )
+    property_type = models.CharField(max_length=20, blank=True)
+    price_bucket = models.PositiveSmallIntegerField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['city', 'property_type', 'price_bucket'], name='saved_search_term_idx'),
+        ]
+
+
+class SavedSearchMatch(models.Model):
+    # user repeats saved_search.user so the inbox is one (user, id) index range.
+    user = models.ForeignKey(
+        UserProfile,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    saved_search = models.ForeignKey(
+        SavedSearch,
+        on_delete=models.CASCADE,
+        related_name='matches'
+    )
+    property = models.ForeignKey(
+        Property,
+        on_delete=models.CASCADE,
+        related_name='saved_search_matches'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['saved_search', 'property'], name='saved_search_match_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'id'], name='saved_search_match_inbox_idx'),
+        ]
@@ -1,6 +1,147 @@
-from rest_framework.pagination import PageNumberPagination
+from base64 import b64decode, b64encode
+from collections import OrderedDict, namedtuple
+from urllib import parse
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
 class PropertyPageNumberPagination(PageNumberPagination):
     page_size = 2
 
 class ReviewPageNumberPagination(PageNumberPagination):
-    page_size = 4
\ No newline at end of file
+    page_size = 4
+
+
+KeysetCursor = namedtuple('KeysetCursor', ['reverse', 'value', 'pk'])
+
+
+class PropertyCursorPagination(CursorPagination):
+    """
+    Keyset pagination over ``(<ordering field>, id)``.
+
+    Each page is fetched with ``WHERE (field, id) < (last_field, last_id)``
+    instead of an ``OFFSET``, so deep pages cost the same as the first one.
+    The total ``COUNT(*)`` is skipped unless ``?count=true`` is passed.
+    """
+    page_size = PropertyPageNumberPagination.page_size
+    ordering = '-created_at'
+    ordering_param = 'ordering'
+    ordering_fields = ('created_at', 'price', 'area', 'seller_rating')
+    count_query_param = 'count'
+
+    def get_ordering(self, request, queryset, view):
+        for term in request.query_params.get(self.ordering_param, '').split(','):
+            term = term.strip()
+            if term.lstrip('-') in self.ordering_fields:
+                return term
+        return self.ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        ordering = self.get_ordering(request, queryset, view)
+        self.field = ordering.lstrip('-')
+        self.descending = ordering.startswith('-')
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.count = queryset.count()
+
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(prefix + self.field, prefix + 'id')
+        if self.cursor is not None:
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{lookup}': self.cursor.value})
+                | Q(**{self.field: self.cursor.value, f'id__{lookup}': self.cursor.pk})
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        return self.page
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            field = self.get_model_field(tokens['f'][0])
+            value = field.to_python(tokens['v'][0])
+            pk = int(tokens['i'][0])
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+        except (TypeError, ValueError, KeyError, LookupError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if field.name != self.field:
+            raise NotFound(self.invalid_cursor_message)
+        return KeysetCursor(reverse=reverse, value=value, pk=pk)
+
+    def encode_cursor(self, cursor):
+        value = cursor.value.isoformat() if hasattr(cursor.value, 'isoformat') else str(cursor.value)
+        tokens = {'f': self.field, 'v': value, 'i': cursor.pk}
+        if cursor.reverse:
+            tokens['r'] = '1'
+        querystring = parse.urlencode(tokens)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_model_field(self, name):
+        if name not in self.ordering_fields:
+            raise LookupError(name)
+        return self.model._meta.get_field(name)
+
+    def get_row_value(self, row, name):
+        return row[name] if isinstance(row, dict) else getattr(row, name)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        row = self.page[-1]
+        return self.encode_cursor(KeysetCursor(
+            reverse=False, value=self.get_row_value(row, self.field), pk=self.get_row_value(row, 'id'),
+        ))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        row = self.page[0]
+        return self.encode_cursor(KeysetCursor(
+            reverse=True, value=self.get_row_value(row, self.field), pk=self.get_row_value(row, 'id'),
+        ))
+
+    def get_paginated_response(self, data):
+        fields = [
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]
+        if self.count is not None:
+            fields.insert(0, ('count', self.count))
+        return Response(OrderedDict(fields))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {'type': 'integer', 'example': 123}
+        return response_schema
@@ -0,0 +1,264 @@
+"""
+Opt-in runtime SQL profiling (``SQL_PROFILING_ENABLED``).
+
+SQLProfilingMiddleware times a sample of requests and records, per URL
+name, the query count, SQL time, duplicated queries, serialization time
+(``serializer.data`` without the queries it runs) and render time (the
+renderer encoding the data). The numbers are aggregated in ``profiler``, which only lives in the
+serving process and keeps a bounded number of endpoints and of hot query
+fingerprints for each.
+"""
+import random
+import re
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+serialization_timer = ContextVar('serialization_timer', default=None)
+
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+WHITESPACE = re.compile(r'\s+')
+
+
+def get_fingerprint(sql):
+    """The query without the length of its IN lists, so one shape is one entry."""
+    return IN_LIST.sub('IN (...)', WHITESPACE.sub(' ', sql).strip())
+
+
+class QueryRecorder:
+    """``execute_wrapper`` hook collecting ``{fingerprint: [count, seconds, max seconds]}``."""
+
+    def __init__(self):
+        self.queries = {}
+        self.seconds = 0.0
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.seconds += elapsed
+            self.count += 1
+            entry = self.queries.setdefault(get_fingerprint(sql), [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count, seconds, longest in self.queries.values())
+
+
+class EndpointProfile:
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.duplicates = 0
+        self.sql_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.render_seconds = 0.0
+        self.total_seconds = 0.0
+        self.max_queries = 0
+        self.hot_queries = {}
+
+    def add(self, recorder, serialize_seconds, render_seconds, total_seconds, max_hot_queries):
+        self.requests += 1
+        self.queries += recorder.count
+        self.duplicates += recorder.duplicates
+        self.sql_seconds += recorder.seconds
+        self.serialize_seconds += serialize_seconds
+        self.render_seconds += render_seconds
+        self.total_seconds += total_seconds
+        self.max_queries = max(self.max_queries, recorder.count)
+        for fingerprint, (count, seconds, longest) in recorder.queries.items():
+            entry = self.hot_queries.get(fingerprint)
+            if entry is None:
+                if len(self.hot_queries) >= max_hot_queries:
+                    # Make room by dropping the cheapest fingerprint, unless this one is cheaper still.
+                    coldest = min(self.hot_queries, key=lambda key: self.hot_queries[key][2])
+                    if self.hot_queries[coldest][2] > seconds:
+                        continue
+                    del self.hot_queries[coldest]
+                entry = self.hot_queries[fingerprint] = [0, 0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += count
+            entry[2] += seconds
+            entry[3] = max(entry[3], longest)
+
+    def as_dict(self):
+        requests = self.requests or 1
+        hot_queries = sorted(self.hot_queries.items(), key=lambda item: item[1][2], reverse=True)
+        return {
+            'requests': self.requests,
+            'avg_queries': round(self.queries / requests, 2),
+            'max_queries': self.max_queries,
+            'avg_duplicates': round(self.duplicates / requests, 2),
+            'avg_sql_ms': round(self.sql_seconds / requests * 1000, 3),
+            'avg_serialize_ms': round(self.serialize_seconds / requests * 1000, 3),
+            'avg_render_ms': round(self.render_seconds / requests * 1000, 3),
+            'avg_python_ms': round(max(self.total_seconds - self.sql_seconds, 0) / requests * 1000, 3),
+            'avg_total_ms': round(self.total_seconds / requests * 1000, 3),
+            'hot_queries': [
+                {
+                    'sql': fingerprint,
+                    'requests': seen,
+                    'calls_per_request': round(count / seen, 2),
+                    'total_ms': round(seconds * 1000, 3),
+                    'max_ms': round(longest * 1000, 3),
+                }
+                for fingerprint, (seen, count, seconds, longest) in hot_queries
+            ],
+        }
+
+
+class SQLProfiler:
+
+    def __init__(self):
+        self.endpoints = {}
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+
+    def get_max_endpoints(self):
+        return getattr(settings, 'SQL_PROFILING_MAX_ENDPOINTS', 200)
+
+    def get_max_hot_queries(self):
+        return getattr(settings, 'SQL_PROFILING_MAX_QUERIES', 20)
+
+    def record(self, endpoint, recorder, serialize_seconds, render_seconds, total_seconds):
+        with self.lock:
+            profile = self.endpoints.get(endpoint)
+            if profile is None:
+                if len(self.endpoints) >= self.get_max_endpoints():
+                    return
+                profile = self.endpoints[endpoint] = EndpointProfile()
+            profile.add(recorder, serialize_seconds, render_seconds, total_seconds, self.get_max_hot_queries())
+
+    def snapshot(self):
+        with self.lock:
+            endpoints = {key: profile.as_dict() for key, profile in self.endpoints.items()}
+            started_at = self.started_at
+        return {
+            'started_at': started_at,
+            'sample_rate': getattr(settings, 'SQL_PROFILING_SAMPLE_RATE', 1.0),
+            'endpoints': dict(sorted(
+                endpoints.items(), key=lambda item: item[1]['avg_sql_ms'] * item[1]['requests'], reverse=True,
+            )),
+        }
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+            self.started_at = time.time()
+
+
+profiler = SQLProfiler()
+
+
+class SerializationTimer:
+    """Time spent in ``serializer.data`` during one request, less the SQL it ran."""
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self.seconds = 0.0
+        self.depth = 0
+
+
+def time_serialization(data):
+    """Wrap a ``data`` property so the active SerializationTimer counts it."""
+    getter = data.fget
+
+    @wraps(getter)
+    def timed(serializer):
+        timer = serialization_timer.get()
+        if timer is None or timer.depth:
+            return getter(serializer)
+        timer.depth += 1
+        started, sql_seconds = time.perf_counter(), timer.recorder.seconds
+        try:
+            return getter(serializer)
+        finally:
+            timer.depth -= 1
+            # Lazy querysets and prefetches run here; that is SQL time.
+            timer.seconds += time.perf_counter() - started - (timer.recorder.seconds - sql_seconds)
+
+    timed.profiled = True
+    return property(timed)
+
+
+def install_serialization_timing():
+    # Serializer.data and ListSerializer.data both go through BaseSerializer.data.
+    from rest_framework.serializers import BaseSerializer
+    from .serializers import PropertyListingSerializer
+
+    for cls in (BaseSerializer, PropertyListingSerializer):
+        if not getattr(cls.data.fget, 'profiled', False):
+            cls.data = time_serialization(cls.data)
+
+
+def get_endpoint_name(request):
+    match = getattr(request, 'resolver_match', None)
+    name = match.view_name if match is not None and match.url_name else '<unresolved>'
+    return f'{request.method} {name}'
+
+
+class SQLProfilingMiddleware:
+    """
+    Records a ``SQL_PROFILING_SAMPLE_RATE`` share of requests into ``profiler``.
+    Removed from the stack unless ``SQL_PROFILING_ENABLED``. Async requests
+    pass through unprofiled: their queries run on other threads' connections.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        install_serialization_timing()
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.get_response(request)
+        if random.random() >= getattr(settings, 'SQL_PROFILING_SAMPLE_RATE', 1.0):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        timer = SerializationTimer(recorder)
+        request._sql_profile_render = 0.0
+        started = time.perf_counter()
+        token = serialization_timer.set(timer)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(recorder))
+                response = self.get_response(request)
+        finally:
+            serialization_timer.reset(token)
+        total = time.perf_counter() - started
+        profiler.record(get_endpoint_name(request), recorder, timer.seconds, request._sql_profile_render, total)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook; time the encoding.
+        started = time.perf_counter()
+
+        def finish_render(rendered):
+            request._sql_profile_render = time.perf_counter() - started
+
+        if hasattr(request, '_sql_profile_render'):
+            response.add_post_render_callback(finish_render)
+        return response
@@ -0,0 +1,57 @@
+"""
+orjson and MessagePack renderers (see REST_FRAMEWORK in settings; the
+matching parsers are in parsers.py).
+
+ORJSONRenderer produces the same document as DRF's JSONRenderer for the
+compact, unicode output the API uses; values orjson does not handle the
+same way (Decimal, datetime, lazy strings, querysets...) are encoded by
+DRF's JSONEncoder. Indented output, and data orjson refuses (integers
+over 64 bits), go through JSONRenderer. Differences: exponents are
+spelled ``1e16`` rather than ``1e+16``, and NaN/infinity render as null
+instead of raising. MessagePackRenderer is picked with
+``Accept: application/msgpack``.
+"""
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+class ORJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type or '', renderer_context or {}) is not None or not (
+            self.ensure_ascii is False and self.compact and self.encoder_class is JSONEncoder
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # JSONRenderer escapes these two for embedding in <script>; so do we.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+def encode_msgpack(value):
+    # Anything msgpack has no type for is encoded the way the JSON renderer would.
+    return JSONEncoder().default(value)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_msgpack, use_bin_type=True)
@@ -0,0 +1,144 @@
+"""
+Read replica routing (``REPLICA_DATABASE_ALIAS``).
+
+Views with ReplicaReadMixin run their GET/HEAD/OPTIONS handlers with
+``read_database`` set to the replica, and ReplicaRouter sends the reads
+made meanwhile there. Every write goes to ``default``. A user who wrote
+something is pinned to ``default`` for ``REPLICA_STICKY_SECONDS`` so they
+read their own writes despite replication lag; the pins live in the
+``REPLICA_STICKY_CACHE_ALIAS`` cache, which must be shared by all workers;
+the middleware refuses to start with a process-local one. The caches take
+the same window as the most the replica may lag.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+
+read_database = ContextVar('read_database', default=None)
+
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def get_replica_alias():
+    alias = getattr(settings, 'REPLICA_DATABASE_ALIAS', None)
+    return alias if alias in settings.DATABASES else None
+
+
+def get_sticky_cache():
+    return caches[getattr(settings, 'REPLICA_STICKY_CACHE_ALIAS', 'shared')]
+
+
+def check_sticky_cache():
+    # A pin kept in one process would send the user's next request, served
+    # by another worker, to the lagging replica.
+    if isinstance(get_sticky_cache(), PROCESS_LOCAL_CACHES):
+        raise ImproperlyConfigured(
+            'REPLICA_STICKY_CACHE_ALIAS must name a cache shared by all workers to use a read replica.'
+        )
+
+
+def get_sticky_seconds():
+    # Also the replication lag the caches allow for.
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+
+def get_sticky_key(user):
+    return f'house:replica:sticky:{user.pk}'
+
+
+def mark_sticky(user):
+    timeout = get_sticky_seconds()
+    if timeout:
+        get_sticky_cache().set(get_sticky_key(user), 1, timeout)
+
+
+def is_sticky(user):
+    return bool(user and user.is_authenticated and get_sticky_cache().get(get_sticky_key(user)))
+
+
+@contextmanager
+def use_primary():
+    """Send the reads made inside the block to ``default``."""
+    token = read_database.set(None)
+    try:
+        yield
+    finally:
+        read_database.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return read_database.get()
+
+    def db_for_write(self, model, **hints):
+        # Rows read from the replica carry it in _state.db; never write there.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, get_replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema through replication.
+        if db != DEFAULT_DB_ALIAS and db == get_replica_alias():
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """Serve safe requests from the replica unless the user is pinned to the primary."""
+
+    def dispatch(self, request, *args, **kwargs):
+        self._replica_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._replica_token is not None:
+                read_database.reset(self._replica_token)
+
+    def initial(self, request, *args, **kwargs):
+        # Authentication and permissions above still read from the primary.
+        super().initial(request, *args, **kwargs)
+        alias = get_replica_alias()
+        if alias and request.method in SAFE_METHODS and not is_sticky(request.user):
+            self._replica_token = read_database.set(alias)
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Pin the user of every unsafe request to the primary. Removed from the
+    stack without a replica; async requests (read-only views) pass through.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_replica_alias():
+            raise MiddlewareNotUsed
+        check_sticky_cache()
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.get_response(request)
+        response = self.get_response(request)
+        # DRF copies the user it authenticated onto the Django request.
+        user = getattr(request, 'user', None)
+        if request.method not in SAFE_METHODS and user is not None and user.is_authenticated:
+            mark_sticky(user)
+        return response
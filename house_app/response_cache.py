@@ -0,0 +1,196 @@
+"""
+Process-local cache of rendered anonymous property responses
+(``RESPONSE_CACHE_TIMEOUT``).
+
+Entries are keyed on the language, URL, negotiated media type and the
+sorted query parameters, and tagged with what they show: ``property:<id>``
+and ``seller:<id>`` for every listing, ``city:<id>`` for lists narrowed
+to cities with ``city``/``cities`` and ``city:*`` for all other lists
+and for every list with facets. The signal receivers drop the tags a
+change touches. A response read from the replica is only stored if none
+of its tags was dropped in the last ``REPLICA_STICKY_SECONDS``: the
+eviction can come before the replica has the change. The cache is an LRU
+bounded by ``RESPONSE_CACHE_MAX_ENTRIES`` and ``RESPONSE_CACHE_MAX_BYTES``
+of content; other processes see a change once their entry expires.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import partial
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import translation
+from django.utils.http import parse_http_date_safe
+
+from .conditional import is_not_modified, not_modified, set_validators
+from .replicas import get_sticky_seconds, read_database
+
+
+ANY_CITY = 'city:*'
+ANY_SELLER = 'seller:*'
+
+CachedResponse = namedtuple('CachedResponse', ['expires', 'content', 'content_type', 'etag', 'last_modified', 'tags'])
+
+
+def get_property_tags(row):
+    tags = {f'property:{row["id"]}'}
+    seller = row.get('seller')
+    if isinstance(seller, dict) and seller.get('id') is not None:
+        tags.add(f'seller:{seller["id"]}')
+    return tags
+
+
+def get_instance_tags(instance):
+    """Tags of the responses a saved or deleted Property can change."""
+    tags = {f'property:{instance.pk}', f'city:{instance.city_id}', ANY_CITY}
+    # Set by remember_market_state and bulk updates; the row may have left a city.
+    previous = getattr(instance, '_previous_market_state', None)
+    if previous is not None:
+        tags.add(f'city:{previous[0]}')
+    return tags
+
+
+class ResponseCache:
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.tags = {}
+        self.size = 0
+        # Bumped by every invalidation, so a response rendered meanwhile is not stored.
+        self.version = 0
+        # When each tag was last invalidated, for as long as a replica may lag.
+        self.invalidated = {}
+        self.cleared_at = float('-inf')
+        self.lock = threading.Lock()
+
+    def get_timeout(self):
+        return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 60)
+
+    def get_max_entries(self):
+        return getattr(settings, 'RESPONSE_CACHE_MAX_ENTRIES', 1000)
+
+    def get_max_bytes(self):
+        return getattr(settings, 'RESPONSE_CACHE_MAX_BYTES', 16 * 1024 * 1024)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires < time.monotonic():
+                self.remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, tags, version, response, since=None):
+        timeout = self.get_timeout()
+        content = response.content
+        if timeout <= 0 or response.status_code != 200 or len(content) > self.get_max_bytes():
+            return
+        entry = CachedResponse(
+            expires=time.monotonic() + timeout,
+            content=content,
+            content_type=response.get('Content-Type'),
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(response.get('Last-Modified')),
+            tags=frozenset(tags),
+        )
+        with self.lock:
+            if version != self.version or (since is not None and self.changed_since(tags, since)):
+                return
+            self.remove(key)
+            self.entries[key] = entry
+            self.size += len(content)
+            for tag in entry.tags:
+                self.tags.setdefault(tag, set()).add(key)
+            while len(self.entries) > self.get_max_entries() or self.size > self.get_max_bytes():
+                self.remove(next(iter(self.entries)))
+
+    def remove(self, key):
+        # Called with the lock held.
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self.size -= len(entry.content)
+        for tag in entry.tags:
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+
+    def changed_since(self, tags, since):
+        # Called with the lock held.
+        return self.cleared_at > since or any(self.invalidated.get(tag, since) > since for tag in tags)
+
+    def invalidate(self, tags):
+        with self.lock:
+            self.version += 1
+            now = time.monotonic()
+            lag = get_sticky_seconds()
+            self.invalidated = {tag: at for tag, at in self.invalidated.items() if now - at < lag}
+            for tag in tags:
+                if lag:
+                    self.invalidated[tag] = now
+                for key in list(self.tags.get(tag, ())):
+                    self.remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.tags.clear()
+            self.size = 0
+            self.version += 1
+            self.invalidated.clear()
+            self.cleared_at = time.monotonic()
+
+
+response_cache = ResponseCache()
+
+
+def get_response_cache_key(request):
+    params = sorted(
+        (name, values) for name, values in request.query_params.lists() if any(values)
+    )
+    parts = (
+        translation.get_language(), request.build_absolute_uri(request.path), request.accepted_media_type, params,
+    )
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+class ResponseCacheMixin:
+    """
+    Serve anonymous GET requests from ``response_cache``.
+
+    Views say what a response shows through ``get_response_cache_tags``.
+    Only the ``response_cache_formats`` renderers are cached; the browsable
+    API renders per-user forms.
+    """
+    response_cache_formats = ('json', 'msgpack')
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated or request.accepted_renderer.format not in self.response_cache_formats:
+            return super().get(request, *args, **kwargs)
+
+        key, version = get_response_cache_key(request), response_cache.version
+        entry = response_cache.get(key)
+        if entry is not None:
+            if is_not_modified(request, entry.etag, entry.last_modified):
+                return not_modified(entry.etag, entry.last_modified)
+            response = HttpResponse(entry.content, content_type=entry.content_type)
+            return set_validators(response, entry.etag, entry.last_modified)
+
+        # Evictions happen when the primary commits; a replica can serve the
+        # old rows after that, and an entry made from them would stay stale.
+        since = time.monotonic() - get_sticky_seconds() if read_database.get() is not None else None
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            tags = self.get_response_cache_tags(response.data)
+            response.add_post_render_callback(partial(response_cache.set, key, tags, version, since=since))
+        return response
+
+    def get_response_cache_tags(self, data):
+        raise NotImplementedError
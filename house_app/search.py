@@ -0,0 +1,164 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from modeltranslation.utils import build_localized_fieldname
+
+
+SEARCH_TERM_RE = re.compile(r'\w+', re.UNICODE)
+POSTGRES_LANGUAGE_CONFIGS = {
+    'en': 'english',
+    'ru': 'russian',
+}
+
+
+def get_search_terms(text):
+    return SEARCH_TERM_RE.findall(text or '')
+
+
+def get_localized_values(instance, field_name):
+    values = []
+    for language in settings.MODELTRANSLATION_LANGUAGES:
+        value = getattr(instance, build_localized_fieldname(field_name, language), None)
+        if value and value not in values:
+            values.append(value)
+    return values
+
+
+class BaseSearchBackend:
+    table = 'house_app_property_search'
+    # Reverse relation from Property to the unmanaged model of ``table``.
+    relation = 'search_document'
+
+    def index(self, properties):
+        raise NotImplementedError
+
+    def remove(self, pks):
+        raise NotImplementedError
+
+    def search(self, queryset, text):
+        raise NotImplementedError
+
+    def join(self, queryset, condition, params, rank):
+        """
+        Inner-join ``table`` and filter on ``condition``, so the rank is
+        computed once per match instead of in a subquery per row. The raw SQL
+        names the table directly: it is the alias of its first join.
+        """
+        return queryset.filter(
+            Q(**{f'{self.relation}__isnull': False}),
+            RawSQL(condition, params, output_field=BooleanField()),
+        ).annotate(search_rank=rank)
+
+    def rebuild(self, chunk_size=2000):
+        from .models import Property
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+        batch = []
+        for instance in Property.objects.order_by('pk').iterator(chunk_size=chunk_size):
+            batch.append(instance)
+            if len(batch) >= chunk_size:
+                self.index(batch)
+                batch = []
+        if batch:
+            self.index(batch)
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """FTS5 virtual table keyed by property id, ranked with bm25()."""
+    table = 'house_app_property_fts'
+    relation = 'fts_document'
+    column_weights = (10.0, 2.0, 4.0)
+
+    def index(self, properties):
+        rows = [
+            (
+                instance.pk,
+                ' '.join(get_localized_values(instance, 'title')),
+                ' '.join(get_localized_values(instance, 'description')),
+                instance.address or '',
+            )
+            for instance in properties
+        ]
+        self.remove([row[0] for row in rows])
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {self.table} (rowid, title, description, address) VALUES (%s, %s, %s, %s)',
+                rows,
+            )
+
+    def remove(self, pks):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(pk,) for pk in pks])
+
+    def search(self, queryset, text):
+        match = ' '.join('"%s"*' % term for term in get_search_terms(text))
+        if not match:
+            return queryset
+        weights = ', '.join(str(weight) for weight in self.column_weights)
+        return self.join(queryset, f'{self.table} MATCH %s', (match,), RawSQL(f'-bm25({self.table}, {weights})', ()))
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Weighted tsvector per translated language behind a GIN index, ranked with ts_rank()."""
+
+    def get_document_sql(self, instance):
+        parts, params = [], []
+        for field_name, weight in (('title', 'A'), ('description', 'C')):
+            for language in settings.MODELTRANSLATION_LANGUAGES:
+                value = getattr(instance, build_localized_fieldname(field_name, language), None)
+                parts.append("setweight(to_tsvector(%s::regconfig, %s), %s)")
+                params += [POSTGRES_LANGUAGE_CONFIGS.get(language, 'simple'), value or '', weight]
+        parts.append("setweight(to_tsvector('simple', %s), 'B')")
+        params.append(instance.address or '')
+        return ' || '.join(parts), params
+
+    def get_query_sql(self, terms):
+        query = ' & '.join(f'{term}:*' for term in terms)
+        configs = sorted(set(POSTGRES_LANGUAGE_CONFIGS.values())) + ['simple']
+        sql = ' || '.join('to_tsquery(%s::regconfig, %s)' for _ in configs)
+        return f'({sql})', [param for config in configs for param in (config, query)]
+
+    def index(self, properties, chunk_size=500):
+        properties = list(properties)
+        with connection.cursor() as cursor:
+            for start in range(0, len(properties), chunk_size):
+                rows, params = [], []
+                for instance in properties[start:start + chunk_size]:
+                    document, document_params = self.get_document_sql(instance)
+                    rows.append(f'(%s, {document})')
+                    params += [instance.pk, *document_params]
+                cursor.execute(
+                    f'INSERT INTO {self.table} (property_id, document) VALUES {", ".join(rows)} '
+                    f'ON CONFLICT (property_id) DO UPDATE SET document = EXCLUDED.document',
+                    params,
+                )
+
+    def remove(self, pks):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE property_id = ANY(%s)', [list(pks)])
+
+    def search(self, queryset, text):
+        terms = get_search_terms(text)
+        if not terms:
+            return queryset
+        query, params = self.get_query_sql(terms)
+        return self.join(
+            queryset, f'{self.table}.document @@ {query}', params, RawSQL(f'ts_rank({self.table}.document, {query})', params),
+        )
+
+
+SEARCH_BACKENDS = {
+    'sqlite': SQLiteFTSBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend():
+    path = getattr(settings, 'PROPERTY_SEARCH_BACKEND', None)
+    backend_class = import_string(path) if path else SEARCH_BACKENDS.get(connection.vendor)
+    return backend_class() if backend_class else None
@@ -1,5 +1,12 @@
+import posixpath
+
 from rest_framework import serializers
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+from django.conf import settings
 from django.contrib.auth import authenticate
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.validators import validate_image_file_extension
 from rest_framework_simplejwt.tokens import RefreshToken
 from .models import (
     UserProfile,
@@ -9,8 +16,17 @@ from .models import (
     Property,
     PropertyImage,
     PropertyDocument,
-    Review
+    Review,
+    SellerStats,
+    MarketStats,
+    PropertyUpload,
+    SavedSearch,
+    SavedSearchMatch,
+    SAVED_SEARCH_PARAMS,
+    get_location_errors
 )
+from .filters import PropertyFilterSet
+from .uploads import get_max_size, get_part_size, get_received_parts
 
 class UserRegisterSerializer(serializers.ModelSerializer):
     class Meta:
@@ -56,11 +72,21 @@ class UserLoginSerializer(serializers.Serializer):
 
 
 
+class SellerStatsSerializer(serializers.ModelSerializer):
+    histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+
+    class Meta:
+        model = SellerStats
+        fields = ('review_count', 'rating_avg', 'histogram')
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
+    rating = SellerStatsSerializer(source='seller_stats', read_only=True)
+
     class Meta:
         model = UserProfile
         fields = (
-            'id', 'username',  'email', 'phone_number','role',
+            'id', 'username',  'email', 'phone_number','role', 'rating',
         )
 
 class DistrictSerializer(serializers.ModelSerializer):
@@ -83,16 +109,80 @@ class RegionSerializer(serializers.ModelSerializer):
         model = Region
         fields = ('id', 'name', 'cities')
 
+class ImageVariantField(serializers.ImageField):
+    """Serves the original upload until the worker has rendered the variant."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('read_only', True)
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return super().get_attribute(instance) or instance.image
+
 class PropertyImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = PropertyImage
-        fields = ('id', 'image')
+        fields = ('id', 'image', 'thumbnail', 'card', 'full', 'webp')
+
+class PropertyImageListSerializer(serializers.ModelSerializer):
+    thumbnail = ImageVariantField()
+    card = ImageVariantField()
+    webp = ImageVariantField()
+
+    class Meta:
+        model = PropertyImage
+        fields = ('id', 'thumbnail', 'card', 'webp')
 
 class PropertyDocumentSerializer(serializers.ModelSerializer):
     class Meta:
         model = PropertyDocument
         fields = ('id', 'file')
 
+class PropertyUploadSerializer(serializers.ModelSerializer):
+    part_count = serializers.IntegerField(source='get_part_count', read_only=True)
+    received_parts = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PropertyUpload
+        fields = (
+            'id', 'property', 'kind', 'filename', 'size', 'part_size', 'part_count', 'received_parts', 'created_at',
+        )
+        read_only_fields = ('part_size',)
+
+    def get_received_parts(self, obj):
+        return sorted(get_received_parts(obj))
+
+    def validate_property(self, value):
+        user = self.context['request'].user
+        if user.role != 'ADMIN' and value.seller_id != user.pk:
+            raise serializers.ValidationError('You can only upload files to your own properties.')
+        return value
+
+    def validate_filename(self, value):
+        name = posixpath.basename(value.replace('\\', '/')).strip()
+        if not name:
+            raise serializers.ValidationError('Enter a file name.')
+        return name
+
+    def validate_size(self, value):
+        if not 0 < value <= get_max_size():
+            raise serializers.ValidationError(f'Size must be between 1 and {get_max_size()} bytes.')
+        return value
+
+    def validate(self, attrs):
+        if attrs['kind'] == 'image':
+            try:
+                validate_image_file_extension(SimpleUploadedFile(attrs['filename'], b''))
+            except DjangoValidationError as exc:
+                raise serializers.ValidationError({'filename': exc.messages})
+        return attrs
+
+    def create(self, validated_data):
+        validated_data['owner'] = self.context['request'].user
+        validated_data['part_size'] = get_part_size()
+        return super().create(validated_data)
+
+
 class PropertySerializer(serializers.ModelSerializer):
     images = PropertyImageSerializer(many=True, read_only=True)
     documents = PropertyDocumentSerializer(many=True, read_only=True)
@@ -104,19 +194,195 @@ class PropertySerializer(serializers.ModelSerializer):
     class Meta:
         model = Property
         fields = ('id', 'title', 'description', 'property_type', 'region', 'city',
-                 'district','address', 'area', 'price',  'rooms','floor','total_floors',
+                 'district','address', 'latitude', 'longitude', 'area', 'price',  'rooms','floor','total_floors',
                   'seller', 'images', 'documents', 'created_at',
         )
 
 
+class PropertyListSerializer(PropertySerializer):
+    images = PropertyImageListSerializer(many=True, read_only=True)
+
+
+class PropertyListingSerializer:
+    """
+    Read-only fast path for ``PropertyListSerializer``.
+
+    Works on the ``.values()`` rows from ``prepare_queryset`` and loads the
+    images and documents of the whole page in one query each, producing the
+    same representation without per-instance field lookups.
+    """
+    value_fields = (
+        'id', 'title', 'description', 'property_type',
+        'region__name', 'city__name', 'city__region__name',
+        'district__name', 'district__city__name', 'district__city__region__name',
+        'address', 'latitude', 'longitude', 'area', 'price', 'rooms', 'floor', 'total_floors',
+        'seller__id', 'seller__username', 'seller__email', 'seller__phone_number', 'seller__role',
+        'seller__seller_stats__review_count', 'seller__seller_stats__rating_avg',
+        'seller__seller_stats__rating_1', 'seller__seller_stats__rating_2', 'seller__seller_stats__rating_3',
+        'seller__seller_stats__rating_4', 'seller__seller_stats__rating_5',
+        # seller_rating is the keyset of ?pagination=cursor&ordering=seller_rating.
+        'created_at', 'seller_rating',
+    )
+    # name: (model, variant fields, fallback field)
+    file_sources = {
+        'images': (PropertyImage, ('thumbnail', 'card', 'webp'), 'image'),
+        'documents': (PropertyDocument, ('file',), None),
+    }
+
+    def __init__(self, instance=None, many=False, context=None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @classmethod
+    def prepare_queryset(cls, queryset):
+        return queryset.select_related(None).prefetch_related(None).values(*cls.value_fields)
+
+    @property
+    def data(self):
+        if self.many:
+            return ReturnList(self.to_representation(list(self.instance)), serializer=self)
+        return ReturnDict(self.to_representation([self.instance])[0], serializer=self)
+
+    @classmethod
+    def get_value_fields(cls):
+        # Context-free fields of PropertySerializer, built once and shared.
+        if '_value_fields' not in cls.__dict__:
+            fields = PropertyListSerializer().fields
+            seller_fields = dict(fields['seller'].fields)
+            cls._value_fields = {
+                'area': fields['area'],
+                'price': fields['price'],
+                'created_at': fields['created_at'],
+                'seller_rating': seller_fields.pop('rating'),
+                'seller': seller_fields,
+            }
+        return cls._value_fields
+
+    def get_file_rows(self, model, field_names, property_ids, fallback=None):
+        # ``fallback`` names the column used when one of ``field_names`` is blank.
+        source_names = field_names + ((fallback,) if fallback else ())
+        return model.objects.filter(property_id__in=property_ids).order_by('pk').values_list(
+            'property_id', 'id', *source_names
+        )
+
+    def get_file_representations(self, model, field_names, rows, fallback=None):
+        representation_field = serializers.FileField()
+        representation_field.bind('file', serializers.Serializer(context=self.context))
+        source_names = field_names + ((fallback,) if fallback else ())
+        model_fields = [model._meta.get_field(name) for name in source_names]
+
+        files = {}
+        for property_id, pk, *names in rows:
+            values = [field.attr_class(None, field, name) for field, name in zip(model_fields, names)]
+            representation = {'id': pk}
+            for field_name, value in zip(field_names, values):
+                if not value and fallback:
+                    value = values[-1]
+                representation[field_name] = representation_field.to_representation(value) if value else None
+            files.setdefault(property_id, []).append(representation)
+        return files
+
+    async def adata(self):
+        """``data`` for async views: every query runs through the async ORM."""
+        rows = [row async for row in self.instance]
+        property_ids = [row['id'] for row in rows]
+        file_rows = {}
+        for name, (model, field_names, fallback) in self.file_sources.items():
+            file_rows[name] = [file async for file in self.get_file_rows(model, field_names, property_ids, fallback)]
+        return ReturnList(self.to_representation(rows, file_rows), serializer=self)
+
+    def to_representation(self, rows, file_rows=None):
+        fields = self.get_value_fields()
+        area, price, created_at = fields['area'], fields['price'], fields['created_at']
+        seller_fields, seller_rating = fields['seller'], fields['seller_rating']
+
+        property_ids = [row['id'] for row in rows]
+        files = {}
+        for name, (model, field_names, fallback) in self.file_sources.items():
+            if file_rows is not None:
+                source = file_rows[name]
+            else:
+                source = self.get_file_rows(model, field_names, property_ids, fallback)
+            files[name] = self.get_file_representations(model, field_names, source, fallback)
+        images, documents = files['images'], files['documents']
+
+        def represent(field, value):
+            return None if value is None else field.to_representation(value)
+
+        def represent_rating(row):
+            if row['seller__seller_stats__review_count'] is None:
+                return None
+            return seller_rating.to_representation({
+                'review_count': row['seller__seller_stats__review_count'],
+                'rating_avg': row['seller__seller_stats__rating_avg'],
+                'histogram': {str(i): row[f'seller__seller_stats__rating_{i}'] for i in range(1, 6)},
+            })
+
+        results = []
+        for row in rows:
+            # Mirrors the __str__ of Region, City and District used by StringRelatedField.
+            district = None
+            if row['district__name'] is not None:
+                district = f"{row['district__name']} ({row['district__city__name']} ({row['district__city__region__name']}))"
+            results.append({
+                'id': row['id'],
+                'title': row['title'],
+                'description': row['description'],
+                'property_type': row['property_type'],
+                'region': row['region__name'],
+                'city': f"{row['city__name']} ({row['city__region__name']})",
+                'district': district,
+                'address': row['address'],
+                'latitude': row['latitude'],
+                'longitude': row['longitude'],
+                'area': represent(area, row['area']),
+                'price': represent(price, row['price']),
+                'rooms': row['rooms'],
+                'floor': row['floor'],
+                'total_floors': row['total_floors'],
+                'seller': {
+                    **{name: represent(field, row[f'seller__{name}']) for name, field in seller_fields.items()},
+                    'rating': represent_rating(row),
+                },
+                'images': images.get(row['id'], []),
+                'documents': documents.get(row['id'], []),
+                'created_at': represent(created_at, row['created_at']),
+            })
+        return results
+
+
+class PropertyClusterSerializer(serializers.Serializer):
+    geohash = serializers.CharField(source='cell')
+    count = serializers.IntegerField()
+    latitude = serializers.FloatField(source='center_latitude')
+    longitude = serializers.FloatField(source='center_longitude')
+    min_price = serializers.DecimalField(max_digits=12, decimal_places=2)
+    id = serializers.SerializerMethodField()
+
+    def get_id(self, cell):
+        # Single-property cells link straight to the listing.
+        return cell['first_id'] if cell['count'] == 1 else None
+
+
 class PropertyCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Property
         fields = (
             'title', 'description','property_type', 'region', 'city','district',
-            'address','area', 'price', 'rooms', 'floor', 'total_floors',
+            'address', 'latitude', 'longitude', 'area', 'price', 'rooms', 'floor', 'total_floors',
         )
 
+    def validate(self, attrs):
+        if self.instance is None or {'region', 'city', 'district'} & set(attrs):
+            region_id = attrs['region'].pk if 'region' in attrs else self.instance.region_id
+            city = attrs['city'] if 'city' in attrs else self.instance.city
+            district = attrs['district'] if 'district' in attrs else getattr(self.instance, 'district', None)
+            errors = get_location_errors(region_id, city, district)
+            if errors:
+                raise serializers.ValidationError(errors)
+        return attrs
+
     def create(self, validated_data):
         request = self.context.get('request')
         validated_data['seller'] = request.user
@@ -124,12 +390,111 @@ class PropertyCreateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Looks the pk up in ``context['preloaded'][model]`` instead of querying per value."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        instance = self.context['preloaded'][self.queryset.model].get(pk)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
+
+
+class PropertyBatchItemSerializer(PropertyCreateSerializer):
+    """PropertyCreateSerializer for one item of a batch; see house_app.batch."""
+    region = PreloadedPrimaryKeyRelatedField(queryset=Region.objects.all())
+    city = PreloadedPrimaryKeyRelatedField(queryset=City.objects.all())
+    district = PreloadedPrimaryKeyRelatedField(queryset=District.objects.all(), required=False, allow_null=True)
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     author = UserProfileSerializer(read_only=True)
     seller = UserProfileSerializer(read_only=True)
+    seller_id = serializers.PrimaryKeyRelatedField(
+        source='seller', queryset=UserProfile.objects.all(), write_only=True
+    )
 
     class Meta:
         model = Review
         fields = (
-            'id', 'author', 'seller', 'rating', 'comment', 'created_at',
+            'id', 'author', 'seller', 'seller_id', 'rating', 'comment', 'created_at',
         )
+
+
+class MarketStatsSerializer(serializers.ModelSerializer):
+    city_name = serializers.CharField(source='city.name', read_only=True)
+    district_name = serializers.CharField(source='district.name', read_only=True, default=None)
+
+    class Meta:
+        model = MarketStats
+        fields = (
+            'city', 'city_name', 'district', 'district_name', 'property_type',
+            'listing_count', 'avg_price', 'avg_price_per_m2', 'median_price_per_m2', 'updated_at',
+        )
+
+
+class SavedSearchSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = SavedSearch
+        fields = ('id', 'name', 'params', 'created_at')
+
+    def validate_params(self, value):
+        """Keep the supported property list parameters, cleaned by PropertyFilterSet."""
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('Expected an object of property list parameters.')
+        unknown = sorted(set(value) - set(SAVED_SEARCH_PARAMS))
+        if unknown:
+            raise serializers.ValidationError(
+                f'Unsupported parameters: {", ".join(unknown)}. Use {", ".join(SAVED_SEARCH_PARAMS)}.'
+            )
+        filterset = PropertyFilterSet(
+            {name: str(item) for name, item in value.items() if item is not None}, queryset=Property.objects.none()
+        )
+        if not filterset.is_valid():
+            raise serializers.ValidationError(filterset.errors)
+
+        cleaned, params = filterset.form.cleaned_data, {}
+        if cleaned.get('city') is not None:
+            params['city'] = cleaned['city'].pk
+        if cleaned.get('property_type'):
+            params['property_type'] = cleaned['property_type']
+        for name in ('price__gte', 'price__lte'):
+            if cleaned.get(name) is not None:
+                params[name] = str(cleaned[name])
+        search = ' '.join(str(value.get('search') or '').split())
+        if search:
+            params['search'] = search
+        if not params:
+            raise serializers.ValidationError('Set at least one parameter.')
+        if 'price__gte' in params and 'price__lte' in params and cleaned['price__gte'] > cleaned['price__lte']:
+            raise serializers.ValidationError('price__gte is greater than price__lte.')
+        return params
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+        limit = getattr(settings, 'SAVED_SEARCH_MAX_PER_USER', 20)
+        if self.instance is None and user.saved_searches.count() >= limit:
+            raise serializers.ValidationError(f'You can keep at most {limit} saved searches.')
+        return attrs
+
+
+class SavedSearchPropertySerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Property
+        fields = ('id', 'title', 'property_type', 'city', 'district', 'price', 'area', 'rooms', 'created_at')
+
+
+class SavedSearchMatchSerializer(serializers.ModelSerializer):
+    property = SavedSearchPropertySerializer(read_only=True)
+
+    class Meta:
+        model = SavedSearchMatch
+        fields = ('id', 'saved_search', 'property', 'created_at')
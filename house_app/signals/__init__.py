@@ -0,0 +1,12 @@
+"""
+Signal receivers, one module per feature, connected by HouseAppConfig.ready.
+"""
+from django.dispatch import Signal
+
+
+# Sent with ``instances`` and ``created`` after bulk_create/bulk_update of
+# properties, which bypass post_save.
+properties_bulk_saved = Signal()
+# Sent with ``instances`` after a batch delete. Their post_delete receivers
+# see ``instance._bulk_deleted`` and leave the bookkeeping to this signal.
+properties_bulk_deleted = Signal()
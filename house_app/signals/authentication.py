@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from ..authentication import user_cache
+from ..models import UserProfile
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(str(instance.pk))
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def invalidate_logged_out_user(sender, instance, created, **kwargs):
+    if created and instance.token.user_id is not None:
+        user_cache.invalidate(str(instance.token.user_id))
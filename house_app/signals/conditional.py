@@ -0,0 +1,34 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from ..cache import bump_property_delete_version
+from ..models import Property, PropertyDocument, PropertyImage, UserProfile
+from . import properties_bulk_deleted
+
+
+@receiver(post_save, sender=PropertyImage)
+@receiver(post_save, sender=PropertyDocument)
+@receiver(post_delete, sender=PropertyImage)
+@receiver(post_delete, sender=PropertyDocument)
+def touch_property(sender, instance, **kwargs):
+    Property.objects.filter(pk=instance.property_id).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Property)
+def count_property_delete(sender, instance, **kwargs):
+    if not getattr(instance, '_bulk_deleted', False):
+        transaction.on_commit(bump_property_delete_version)
+
+
+@receiver(properties_bulk_deleted, sender=Property)
+def count_properties_delete(sender, instances, **kwargs):
+    transaction.on_commit(bump_property_delete_version)
+
+
+@receiver(post_save, sender=UserProfile)
+def touch_seller_properties(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    Property.objects.filter(seller=instance).update(updated_at=timezone.now())
@@ -0,0 +1,10 @@
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from ..geo import get_property_geohash
+from ..models import Property
+
+
+@receiver(pre_save, sender=Property)
+def set_property_geohash(sender, instance, **kwargs):
+    instance.geohash = get_property_geohash(instance.latitude, instance.longitude)
@@ -0,0 +1,20 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from ..images import IMAGE_VARIANTS, delete_variants, schedule_image_processing
+from ..models import PropertyImage
+
+
+@receiver(post_save, sender=PropertyImage)
+def process_image(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'image' in update_fields:
+        transaction.on_commit(partial(schedule_image_processing, instance.pk))
+
+
+@receiver(post_delete, sender=PropertyImage)
+def delete_image_variants(sender, instance, **kwargs):
+    names = [getattr(instance, name).name for name in IMAGE_VARIANTS]
+    transaction.on_commit(partial(delete_variants, names))
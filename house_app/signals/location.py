@@ -0,0 +1,47 @@
+from django.db.models.signals import pre_save, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from ..models import City, District, Property, get_location_path
+from . import properties_bulk_saved
+from .market import get_market_state
+
+
+def relocate_properties(queryset, **ids):
+    """Move listings under a city or district that changed parent, keeping location_path in step."""
+    properties = list(queryset)
+    if not properties:
+        return
+    now = timezone.now()
+    for instance in properties:
+        instance._previous_market_state = get_market_state(instance)
+        for name, value in ids.items():
+            setattr(instance, name, value)
+        instance.location_path = get_location_path(instance.region_id, instance.city_id, instance.district_id)
+        instance.updated_at = now
+    Property.objects.bulk_update(properties, [*ids, 'location_path', 'updated_at'])
+    properties_bulk_saved.send(sender=Property, instances=properties, created=False)
+
+
+@receiver(post_save, sender=City)
+def relocate_city_properties(sender, instance, created, **kwargs):
+    if not created:
+        relocate_properties(
+            Property.objects.filter(city=instance).exclude(region_id=instance.region_id),
+            region_id=instance.region_id,
+        )
+
+
+@receiver(post_save, sender=District)
+def relocate_district_properties(sender, instance, created, **kwargs):
+    if not created:
+        relocate_properties(
+            Property.objects.filter(district=instance).exclude(city_id=instance.city_id),
+            region_id=instance.city.region_id, city_id=instance.city_id,
+        )
+
+
+@receiver(pre_save, sender=Property)
+def set_property_location(sender, instance, **kwargs):
+    # Consistency is checked by Property.clean() and the serializers.
+    instance.location_path = get_location_path(instance.region_id, instance.city_id, instance.district_id)
@@ -0,0 +1,61 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from ..models import MarketStats, Property, add_market_listing, get_market_groups
+from . import properties_bulk_deleted, properties_bulk_saved
+
+
+MARKET_FIELDS = ('city', 'district', 'property_type', 'price', 'area')
+
+
+def get_market_state(instance):
+    return (instance.city_id, instance.district_id, instance.property_type, instance.price, instance.area)
+
+
+@receiver(pre_save, sender=Property)
+def remember_market_state(sender, instance, update_fields=None, **kwargs):
+    if instance.pk and (update_fields is None or set(update_fields) & set(MARKET_FIELDS)):
+        instance._previous_market_state = (
+            Property.objects.filter(pk=instance.pk)
+            .values_list('city_id', 'district_id', 'property_type', 'price', 'area')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Property)
+def update_market_stats(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & set(MARKET_FIELDS):
+        return
+    state = get_market_state(instance)
+    previous = getattr(instance, '_previous_market_state', None)
+    if previous == state:
+        return
+    changes = {}
+    if previous is not None:
+        add_market_listing(changes, previous, -1)
+    add_market_listing(changes, state, 1)
+    MarketStats.objects.apply_changes(changes)
+
+
+@receiver(properties_bulk_saved, sender=Property)
+@receiver(properties_bulk_deleted, sender=Property)
+def mark_market_stats_stale(sender, instances, **kwargs):
+    groups = set()
+    for instance in instances:
+        groups |= get_market_groups(*get_market_state(instance)[:3])
+        # Set by bulk updates that know where the row was before.
+        previous = getattr(instance, '_previous_market_state', None)
+        if previous is not None:
+            groups |= get_market_groups(*previous[:3])
+    MarketStats.objects.mark_stale(groups)
+    transaction.on_commit(MarketStats.objects.refresh_stale)
+
+
+@receiver(post_delete, sender=Property)
+def remove_property_from_market_stats(sender, instance, **kwargs):
+    if getattr(instance, '_bulk_deleted', False):
+        return
+    changes = {}
+    add_market_listing(changes, get_market_state(instance), -1)
+    MarketStats.objects.apply_changes(changes)
@@ -0,0 +1,40 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from ..models import MediaBlob, PropertyDocument, PropertyImage
+
+
+MEDIA_FIELDS = {PropertyImage: 'image', PropertyDocument: 'file'}
+
+
+@receiver(pre_save, sender=PropertyImage)
+@receiver(pre_save, sender=PropertyDocument)
+def remember_media_name(sender, instance, update_fields=None, **kwargs):
+    field_name = MEDIA_FIELDS[sender]
+    if instance.pk and (update_fields is None or field_name in update_fields):
+        instance._previous_media_name = (
+            sender.objects.filter(pk=instance.pk).values_list(field_name, flat=True).first()
+        )
+
+
+@receiver(post_save, sender=PropertyImage)
+@receiver(post_save, sender=PropertyDocument)
+def count_media_reference(sender, instance, created, update_fields=None, **kwargs):
+    field_name = MEDIA_FIELDS[sender]
+    if update_fields is not None and field_name not in update_fields:
+        return
+    file = getattr(instance, field_name)
+    previous = None if created else getattr(instance, '_previous_media_name', None)
+    if file.name == previous:
+        return
+    MediaBlob.objects.acquire(file.name)
+    if previous:
+        MediaBlob.objects.release(previous, file.storage)
+    instance._previous_media_name = file.name
+
+
+@receiver(post_delete, sender=PropertyImage)
+@receiver(post_delete, sender=PropertyDocument)
+def release_media_reference(sender, instance, **kwargs):
+    file = getattr(instance, MEDIA_FIELDS[sender])
+    MediaBlob.objects.release(file.name, file.storage)
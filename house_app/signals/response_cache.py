@@ -0,0 +1,63 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from ..models import City, District, Property, PropertyDocument, PropertyImage, Region, Review, UserProfile
+from ..response_cache import ANY_SELLER, get_instance_tags, response_cache
+from . import properties_bulk_deleted, properties_bulk_saved
+
+
+def invalidate_responses(tags):
+    # Again on commit: a request reading the old rows meanwhile may have stored them.
+    response_cache.invalidate(tags)
+    transaction.on_commit(partial(response_cache.invalidate, tags))
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+def invalidate_property_responses(sender, instance, **kwargs):
+    if not getattr(instance, '_bulk_deleted', False):
+        invalidate_responses(get_instance_tags(instance))
+
+
+@receiver(properties_bulk_saved, sender=Property)
+@receiver(properties_bulk_deleted, sender=Property)
+def invalidate_properties_responses(sender, instances, **kwargs):
+    invalidate_responses(set().union(*map(get_instance_tags, instances)))
+
+
+@receiver(post_save, sender=PropertyImage)
+@receiver(post_save, sender=PropertyDocument)
+@receiver(post_delete, sender=PropertyImage)
+@receiver(post_delete, sender=PropertyDocument)
+def invalidate_media_responses(sender, instance, **kwargs):
+    invalidate_responses({f'property:{instance.property_id}'})
+
+
+@receiver(post_save, sender=Region)
+@receiver(post_save, sender=City)
+@receiver(post_save, sender=District)
+@receiver(post_delete, sender=Region)
+@receiver(post_delete, sender=City)
+@receiver(post_delete, sender=District)
+def clear_responses(sender, **kwargs):
+    # Every listing shows its region, city and district.
+    response_cache.clear()
+    transaction.on_commit(response_cache.clear)
+
+
+@receiver(post_save, sender=UserProfile)
+def invalidate_seller_responses(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    invalidate_responses({f'seller:{instance.pk}'})
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_responses(sender, instance, **kwargs):
+    # The seller the review was about before this save, set by remember_review_seller.
+    seller_ids = {instance.seller_id, getattr(instance, '_previous_seller_id', None) or instance.seller_id}
+    invalidate_responses({f'seller:{seller_id}' for seller_id in seller_ids} | {ANY_SELLER})
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from ..models import Property, SavedSearch
+from . import properties_bulk_saved
+
+
+@receiver(post_save, sender=Property)
+def match_saved_searches(sender, instance, created, **kwargs):
+    if created:
+        SavedSearch.objects.match([instance])
+
+
+@receiver(properties_bulk_saved, sender=Property)
+def match_saved_searches_in_bulk(sender, instances, created, **kwargs):
+    if created:
+        SavedSearch.objects.match(instances)
+
+
+@receiver(post_save, sender=SavedSearch)
+def index_saved_search(sender, instance, created, **kwargs):
+    SavedSearch.objects.index(instance, created)
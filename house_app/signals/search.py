@@ -0,0 +1,34 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from ..models import Property
+from ..search import get_search_backend
+from . import properties_bulk_deleted, properties_bulk_saved
+
+
+@receiver(post_save, sender=Property)
+def index_property(sender, instance, **kwargs):
+    backend = get_search_backend()
+    if backend is not None:
+        backend.index([instance])
+
+
+@receiver(properties_bulk_saved, sender=Property)
+def index_properties(sender, instances, **kwargs):
+    backend = get_search_backend()
+    if backend is not None:
+        backend.index(instances)
+
+
+@receiver(post_delete, sender=Property)
+def unindex_property(sender, instance, **kwargs):
+    backend = get_search_backend()
+    if backend is not None and not getattr(instance, '_bulk_deleted', False):
+        backend.remove([instance.pk])
+
+
+@receiver(properties_bulk_deleted, sender=Property)
+def unindex_properties(sender, instances, **kwargs):
+    backend = get_search_backend()
+    if backend is not None:
+        backend.remove([instance.pk for instance in instances])
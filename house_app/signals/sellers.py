@@ -0,0 +1,32 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from ..models import Property, Review, SellerStats
+
+
+@receiver(pre_save, sender=Property)
+def set_property_seller_rating(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'seller' in update_fields:
+        instance.seller_rating = SellerStats.objects.get_rating(instance.seller_id)
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_seller(sender, instance, **kwargs):
+    if instance.pk:
+        instance._previous_seller_id = (
+            Review.objects.filter(pk=instance.pk).values_list('seller_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def add_review_to_stats(sender, instance, created, **kwargs):
+    if created:
+        SellerStats.objects.apply_review(instance.seller_id, instance.rating, 1)
+    else:
+        previous = getattr(instance, '_previous_seller_id', None) or instance.seller_id
+        SellerStats.objects.rebuild({instance.seller_id, previous})
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_from_stats(sender, instance, **kwargs):
+    SellerStats.objects.apply_review(instance.seller_id, instance.rating, -1)
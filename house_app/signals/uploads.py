@@ -0,0 +1,13 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from ..models import PropertyUpload
+from ..uploads import delete_parts, get_parts_directory, get_storage
+
+
+@receiver(post_delete, sender=PropertyUpload)
+def delete_upload_parts(sender, instance, **kwargs):
+    transaction.on_commit(partial(delete_parts, get_storage(instance), get_parts_directory(instance)))
@@ -0,0 +1,77 @@
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage, storages
+
+
+CONTENT_ADDRESS = re.compile(r'(?:^|/)([0-9a-f]{2})/\1[0-9a-f]{62}(\.[a-z0-9]{1,10})?$')
+EXTENSION = re.compile(r'\.[a-z0-9]{1,10}')
+
+
+def is_content_addressed(name):
+    return bool(name and CONTENT_ADDRESS.search(name))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage that names every file after the SHA-256 of its content,
+    ``<upload_to>/<first two hex digits>/<digest><ext>``, so identical
+    uploads share one file and a URL never changes meaning.
+
+    The file is hashed while it is copied to a temporary file and then moved
+    into place; if the blob already exists the copy is dropped. References
+    are counted in MediaBlob, and delete() leaves blobs that are still
+    referenced alone.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content, so the upload name needs no suffix.
+        return name
+
+    def _save(self, name, content):
+        directory = posixpath.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        if not EXTENSION.fullmatch(extension):
+            extension = ''
+
+        temp_directory = self.path(directory)
+        os.makedirs(temp_directory, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=temp_directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    file.write(chunk)
+
+            hexdigest = digest.hexdigest()
+            blob_name = posixpath.join(directory, hexdigest[:2], hexdigest + extension)
+            blob_path = self.path(blob_name)
+            if os.path.exists(blob_path):
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temp_path, self.file_permissions_mode)
+                os.replace(temp_path, blob_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return blob_name
+
+    def delete(self, name):
+        from .models import MediaBlob
+
+        if is_content_addressed(name) and MediaBlob.objects.filter(name=name, ref_count__gt=0).exists():
+            return
+        super().delete(name)
+
+
+def select_property_media_storage():
+    return storages['property_media']
@@ -1,3 +1,1409 @@
-from django.test import TestCase
+import csv
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+from io import BytesIO, StringIO
+from importlib import import_module
+from urllib import parse
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils import translation
+from rest_framework.request import Request
+import msgpack
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import user_cache
+from .batch import PropertyBatch
+from .cache import GEOGRAPHY_VERSION_KEY, bump_geography_version, get_geography_version, get_geography_version_cache
+from .benchmark import ROUTES, seed_dataset, prepare_route
+from .images import IMAGE_VARIANTS, process_property_image
+from .uploads import assemble_upload
+from .export import get_export_columns
+from .facets import FACET_PARAMS
+from .filters import PropertyFilterSet, PropertySearchFilter
+from .profiling import get_fingerprint, profiler
+from .replicas import ReplicaRouter, ReplicaStickinessMiddleware, read_database
+from .search import PostgresSearchBackend
+from .response_cache import ANY_CITY, ANY_SELLER, response_cache
+from .models import (
+    City, MarketStats, MediaBlob, PathStartsWith, Property, PropertyDocument, PropertyImage, PropertyUpload, Region,
+    Review, SavedSearch, SavedSearchMatch, SellerStats, UserProfile, get_price_bucket,
+)
+from .serializers import PropertyListSerializer, PropertyListingSerializer
+from .signals import properties_bulk_saved
+from .views import PropertyDetailView, PropertyListView, RegionViewSet
+
+
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+def get_route_names(patterns):
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            yield from get_route_names(pattern.url_patterns)
+        elif pattern.name:
+            yield pattern.name
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class EndpointQueryCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset({'properties': 60, 'reviews': 30})
+
+    def setUp(self):
+        # Seeds the shared geography version, which outlives process caches.
+        get_geography_version()
+        cache.clear()
+        user_cache.clear()
+        response_cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+    def test_every_route_is_benchmarked(self):
+        routes = set(get_route_names(get_resolver('house_app.urls').url_patterns))
+        self.assertEqual(routes - {route.name for route in ROUTES}, set())
+
+    def test_query_counts_are_bounded(self):
+        client = APIClient()
+        for route in ROUTES:
+            request = prepare_route(client, route, self.dataset)
+            with self.subTest(route=route.name, method=route.method):
+                cache.clear()
+                response_cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = request()
+                self.assertLess(response.status_code, 400, getattr(response, 'streamed_content', None) or response.content[:500])
+                self.assertLessEqual(
+                    len(queries), route.max_queries,
+                    '\n'.join(query['sql'] for query in queries.captured_queries),
+                )
+
+
+class PropertyCursorPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset({'properties': 7, 'images': 0, 'documents': 0, 'reviews': 0})
+
+    def setUp(self):
+        response_cache.clear()
+        with translation.override('en'):
+            self.url = reverse('property-list')
+
+    def get(self, url, params=None):
+        response = APIClient().get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def walk(self, **params):
+        page = self.get(self.url, {'pagination': 'cursor', **params})
+        pages = [page]
+        while page['next']:
+            page = self.get(page['next'])
+            pages.append(page)
+        return pages
+
+    def test_pages_follow_the_ordering_both_ways(self):
+        pages = self.walk(ordering='price')
+        ids = [row['id'] for page in pages for row in page['results']]
+        self.assertEqual(ids, list(Property.objects.order_by('price', 'id').values_list('id', flat=True)))
+        self.assertNotIn('count', pages[0])
+        self.assertIsNone(pages[0]['previous'])
+
+        previous = self.get(pages[2]['previous'])
+        self.assertEqual(previous['results'], pages[1]['results'])
+        self.assertEqual(self.get(previous['previous'])['results'], pages[0]['results'])
+
+    def test_invalid_cursor_is_not_found(self):
+        cursor = parse.parse_qs(parse.urlsplit(self.walk(ordering='price')[0]['next']).query)['cursor'][0]
+        for params in ({'cursor': 'not-base64!'}, {'cursor': cursor, 'ordering': 'area'}):
+            with self.subTest(params=params):
+                response = APIClient().get(self.url, {'pagination': 'cursor', **params})
+                self.assertEqual(response.status_code, 404)
+
+    def test_unsupported_ordering_falls_back_to_newest_first(self):
+        ids = [row['id'] for page in self.walk(ordering='title') for row in page['results']]
+        self.assertEqual(ids, list(Property.objects.order_by('-created_at', '-id').values_list('id', flat=True)))
+
+    def test_seller_rating_ties_are_broken_by_id(self):
+        first, second = Property.objects.order_by('pk')[:2]
+        Property.objects.filter(pk=first.pk).update(seller_rating=4.5)
+        Property.objects.exclude(pk=first.pk).update(seller_rating=3.25)
+        Property.objects.filter(pk=second.pk).update(seller_rating=2.0)
+        ids = [row['id'] for page in self.walk(ordering='-seller_rating') for row in page['results']]
+        self.assertEqual(ids, list(Property.objects.order_by('-seller_rating', '-id').values_list('id', flat=True)))
+
+
+class PropertyListValidatorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset({'properties': 5, 'images': 0, 'documents': 0, 'reviews': 0})
+
+    def setUp(self):
+        response_cache.clear()
+        with translation.override('en'):
+            self.url = reverse('property-list')
+        self.params = {'city': self.dataset.city.pk, 'ordering': 'price'}
+
+    def get(self, **headers):
+        response_cache.clear()
+        return APIClient().get(self.url, self.params, **headers)
+
+    def test_not_modified_without_filtering(self):
+        etag = self.get()['ETag']
+        # The table-wide state and the shared delete version; no filtered aggregate.
+        with self.assertNumQueries(2):
+            self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_changes_and_deletes_change_the_etag(self):
+        etags = [self.get()['ETag']]
+        Property.objects.get(pk=self.dataset.property.pk).save()
+        etags.append(self.get()['ETag'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.exclude(pk=self.dataset.property.pk).first().delete()
+        etags.append(self.get()['ETag'])
+        self.assertEqual(len(set(etags)), 3)
+
+
+class PropertyListingSerializerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset({'properties': 20, 'reviews': 0})
+
+    def test_matches_property_list_serializer(self):
+        context = {'request': Request(APIRequestFactory().get('/'))}
+        properties = Property.objects.select_related('region', 'city', 'district', 'seller').order_by('pk')
+        rows = PropertyListingSerializer.prepare_queryset(properties)
+
+        expected = PropertyListSerializer(properties, many=True, context=context).data
+        self.assertEqual(PropertyListingSerializer(rows, many=True, context=context).data, expected)
+
+    def test_matches_under_russian_with_fallback(self):
+        translated, untranslated = Property.objects.order_by('pk')[:2]
+        Property.objects.filter(pk=translated.pk).update(title_ru='Квартира', description_ru='Описание')
+        Property.objects.filter(pk=untranslated.pk).update(title_ru=None, description_ru='')
+        context = {'request': Request(APIRequestFactory().get('/'))}
+        with translation.override('ru'):
+            properties = Property.objects.select_related('region', 'city', 'district', 'seller').order_by('pk')
+            expected = PropertyListSerializer(properties, many=True, context=context).data
+            rows = PropertyListingSerializer.prepare_queryset(properties)
+            data = PropertyListingSerializer(rows, many=True, context=context).data
+        self.assertEqual(data, expected)
+        self.assertEqual((data[0]['title'], data[0]['description']), ('Квартира', 'Описание'))
+        self.assertEqual(data[1]['title'], untranslated.title_en)
+
+
+class SellerStatsTests(TestCase):
+
+    def test_incremental_updates_match_rebuild(self):
+        seller = UserProfile.objects.create(username='seller', phone_number='+996700000010', role='seller')
+        other = UserProfile.objects.create(username='other', phone_number='+996700000011', role='seller')
+        buyer = UserProfile.objects.create(username='buyer', phone_number='+996700000012', role='buyer')
+        reviews = [Review.objects.create(author=buyer, seller=seller, rating=rating) for rating in (5, 4, 4, 1)]
+        reviews[0].delete()
+        reviews[1].seller = other
+        reviews[1].save()
+
+        fields = ['seller_id', 'review_count', 'rating_sum', 'rating_avg', 'rating_1', 'rating_4', 'rating_5']
+        incremental = list(SellerStats.objects.order_by('pk').values(*fields))
+        SellerStats.objects.rebuild()
+        self.assertEqual(incremental, list(SellerStats.objects.order_by('pk').values(*fields)))
+        self.assertEqual(SellerStats.objects.get(seller=seller).rating_avg, 2.5)
+
+    def test_property_rating_follows_reviews(self):
+        dataset = seed_dataset({'properties': 3, 'images': 0, 'documents': 0, 'reviews': 0})
+        seller, buyer = dataset.seller, dataset.buyer
+
+        def ratings():
+            return set(Property.objects.filter(seller=seller).values_list('seller_rating', flat=True))
+
+        review = Review.objects.create(author=buyer, seller=seller, rating=4)
+        Review.objects.create(author=buyer, seller=seller, rating=1)
+        self.assertEqual(ratings(), {2.5})
+        review.delete()
+        self.assertEqual(ratings(), {1.0})
+        Property.objects.filter(seller=seller).update(seller_rating=0)
+        SellerStats.objects.rebuild()
+        self.assertEqual(ratings(), {1.0})
+        self.assertEqual(PropertyBatch(seller).build({}).seller_rating, 1.0)
+
+
+class MarketStatsTests(TestCase):
+    fields = [
+        'city_id', 'district_id', 'property_type', 'listing_count', 'price_sum', 'price_per_m2_count',
+        'avg_price', 'avg_price_per_m2', 'median_price_per_m2',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset({'properties': 30, 'images': 0, 'documents': 0, 'reviews': 0})
+
+    def get_stats(self):
+        return list(MarketStats.objects.order_by('city_id', 'district_id', 'property_type').values(*self.fields))
+
+    def test_incremental_updates_match_rebuild(self):
+        ds = self.dataset
+        moved = Property.objects.exclude(city=ds.city).first()
+        moved.city, moved.district, moved.region = ds.city, None, ds.region
+        moved.price *= 2
+        moved.save()
+        Property.objects.exclude(pk__in=[moved.pk, ds.property.pk]).filter(city=ds.city).first().delete()
+        created = Property.objects.get(pk=ds.property.pk)
+        created.pk = None
+        created.property_type = 'studio'
+        with CaptureQueriesContext(connection) as queries:
+            created.save()
+        # Only the totals are updated on write; the median waits for refresh_medians().
+        self.assertFalse(any('ORDER BY' in query['sql'] and 'house_app_property' in query['sql'] for query in queries.captured_queries))
+        self.assertTrue(MarketStats.objects.filter(median_is_stale=True).exists())
+
+        MarketStats.objects.refresh_medians()
+        self.assertFalse(MarketStats.objects.filter(median_is_stale=True).exists())
+        incremental = self.get_stats()
+        MarketStats.objects.rebuild()
+        self.assertEqual(incremental, self.get_stats())
+
+        prices = sorted(float(price) / area for price, area in Property.objects.filter(
+            city=created.city, district=created.district, property_type='studio',
+        ).values_list('price', 'area'))
+        row = MarketStats.objects.get(city=created.city, district=created.district, property_type='studio')
+        self.assertEqual(row.listing_count, len(prices))
+        self.assertAlmostEqual(float(row.median_price_per_m2), (prices[(len(prices) - 1) // 2] + prices[len(prices) // 2]) / 2, places=2)
+
+    def test_values_assigned_as_strings_are_counted(self):
+        ds = self.dataset
+        SavedSearch.objects.create(user=ds.buyer, params={'city': ds.city.pk, 'price__lte': '200000'})
+        key = {'city': ds.city, 'district': None, 'property_type': 'studio'}
+        before = MarketStats.objects.filter(**key).values_list('listing_count', 'price_sum').first() or (0, 0)
+        created = Property.objects.create(
+            title='Listing', description='', property_type='studio', region=ds.region, city=ds.city,
+            address='1 Main st', area='50', price='150000.00', rooms=1, floor=1, total_floors=1, seller=ds.seller,
+        )
+        row = MarketStats.objects.get(**key)
+        self.assertEqual((row.listing_count, row.price_sum), (before[0] + 1, before[1] + Decimal('150000.00')))
+        self.assertTrue(SavedSearchMatch.objects.filter(property=created).exists())
+
+    def test_bulk_writes_are_refreshed_on_commit(self):
+        ds = self.dataset
+        created = Property.objects.get(pk=ds.property.pk)
+        created.pk = None
+        created.price += 1000
+        with self.captureOnCommitCallbacks() as callbacks:
+            Property.objects.bulk_create([created])
+            properties_bulk_saved.send(sender=Property, instances=[created], created=True)
+        self.assertTrue(MarketStats.objects.filter(is_stale=True).exists())
+        for callback in callbacks:
+            callback()
+        self.assertFalse(MarketStats.objects.filter(is_stale=True).exists())
+
+        with translation.override('en'):
+            url = reverse('market-stats')
+        # Reads never write.
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get(url, {'city': ds.city.pk, 'property_type': created.property_type})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in queries.captured_queries))
+        stale = self.get_stats()
+        MarketStats.objects.rebuild()
+        self.assertEqual(stale, self.get_stats())
+        self.assertEqual(
+            {(row['district'], row['listing_count']) for row in response.data},
+            set(MarketStats.objects.filter(city=ds.city, property_type=created.property_type).values_list('district', 'listing_count')),
+        )
+
+
+class PropertyBatchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset({'properties': 4, 'images': 0, 'documents': 0, 'reviews': 0})
+        cls.dataset.seller.role = 'HOST'
+        cls.dataset.seller.save()
+        cls.own, cls.other = Property.objects.all()[:2]
+        Property.objects.filter(pk=cls.own.pk).update(seller=cls.dataset.seller)
+        Property.objects.filter(pk=cls.other.pk).update(seller=cls.dataset.admin)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.dataset.seller)
+        with translation.override('en'):
+            self.url = reverse('property-batch')
+
+    def item(self, **kwargs):
+        ds = self.dataset
+        return {
+            'title': 'Batch listing', 'description': 'Created in a batch', 'property_type': 'apartment',
+            'region': ds.region.pk, 'city': ds.city.pk, 'district': ds.district.pk, 'address': '1 Batch street',
+            'area': 50, 'price': '100000.00', 'rooms': 2, 'floor': 1, 'total_floors': 9, **kwargs,
+        }
+
+    def test_changes_are_applied_together(self):
+        doomed = Property.objects.get(pk=self.own.pk)
+        doomed.pk = None
+        doomed.save()
+        response = self.client.post(self.url, {
+            'create': [self.item(), self.item(title='Second', latitude=42.87, longitude=74.59)],
+            'update': [{'id': self.own.pk, 'price': '123456.00', 'title': 'Renamed'}],
+            'delete': [doomed.pk],
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(response.data['created']), 2)
+        self.assertEqual(response.data['deleted'], [doomed.pk])
+
+        created = Property.objects.filter(pk__in=response.data['created'])
+        self.assertEqual(set(created.values_list('seller', flat=True)), {self.dataset.seller.pk})
+        self.assertTrue(created.get(title='Second').geohash)
+        own = Property.objects.get(pk=self.own.pk)
+        self.assertEqual((own.price, own.title), (123456, 'Renamed'))
+        self.assertFalse(Property.objects.filter(pk=doomed.pk).exists())
+        self.assertTrue(MarketStats.objects.filter(city=self.dataset.city, is_stale=True).exists())
+
+    def test_invalid_items_are_reported_and_nothing_is_written(self):
+        count = Property.objects.count()
+        response = self.client.post(self.url, {
+            'create': [self.item(), self.item(city=0)],
+            'update': [{'id': self.own.pk, 'price': '1.00'}, {'id': self.other.pk, 'price': '1.00'}],
+            'delete': [self.own.pk],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['create'][0], {})
+        self.assertIn('city', response.data['create'][1])
+        self.assertEqual(response.data['update'][0], {})
+        self.assertIn('id', response.data['update'][1])
+        self.assertIn('id', response.data['delete'][0])
+        self.assertEqual(Property.objects.count(), count)
+        self.assertNotEqual(Property.objects.get(pk=self.own.pk).price, 1)
+
+
+@override_settings(SAVED_SEARCH_INBOX_LAG=0)
+class SavedSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset({'properties': 10, 'images': 0, 'documents': 0, 'reviews': 0})
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.dataset.buyer)
+
+    def url(self, name, **kwargs):
+        with translation.override('en'):
+            return reverse(name, kwargs=kwargs)
+
+    def create_listing(self, **kwargs):
+        listing = Property.objects.get(pk=self.dataset.property.pk)
+        listing.pk = None
+        for name, value in kwargs.items():
+            setattr(listing, name, value)
+        listing.save()
+        return listing
+
+    def get_matches(self, **params):
+        response = self.client.get(self.url('saved-search-matches'), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [match['property']['id'] for match in response.data]
+
+    def test_params_are_validated(self):
+        response = self.client.post(self.url('saved-search-list'), {'params': {'bbox': '1,2,3,4'}}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(self.url('saved-search-list'), {
+            'params': {'price__gte': 200, 'price__lte': 100},
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(self.url('saved-search-list'), {'name': 'Houses', 'params': {
+            'city': str(self.dataset.city.pk), 'property_type': 'house', 'price__lte': 150000, 'search': '  sunny   garden ',
+        }}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.data['params'], {
+            'city': self.dataset.city.pk, 'property_type': 'house', 'price__lte': '150000', 'search': 'sunny garden',
+        })
+        terms = SavedSearch.objects.get(pk=response.data['id']).terms.all()
+        self.assertEqual({term.price_bucket for term in terms}, set(range(get_price_bucket(150000) + 1)))
+
+    def test_new_listings_are_matched(self):
+        ds = self.dataset
+        response = self.client.post(self.url('saved-search-list'), {'params': {
+            'city': ds.city.pk, 'property_type': 'house', 'price__gte': 1000, 'price__lte': 5000, 'search': 'Lake',
+        }}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+
+        matched = self.create_listing(property_type='house', price=Decimal('3000'), address='1 Lake street')
+        self.create_listing(property_type='house', price=Decimal('6000'), address='2 Lake street')
+        self.create_listing(property_type='land', price=Decimal('3000'), address='3 Lake street')
+        self.create_listing(property_type='house', price=Decimal('3000'), address='4 Hill street')
+        self.create_listing(property_type='house', price=Decimal('3000'), address='5 Lake street', seller=ds.buyer)
+        self.assertEqual(self.get_matches(), [matched.pk])
+
+        batch = APIClient()
+        batch.force_authenticate(ds.admin)
+        response = batch.post(self.url('property-batch'), {'create': [{
+            'title': 'By the lake', 'description': 'Quiet', 'property_type': 'house', 'region': ds.region.pk,
+            'city': ds.city.pk, 'address': 'Shore road', 'area': 40, 'price': '1000.00', 'rooms': 1, 'floor': 1,
+            'total_floors': 1,
+        }]}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        first = SavedSearchMatch.objects.get(property=matched)
+        self.assertEqual(self.get_matches(after=first.pk), response.data['created'])
+
+    def test_search_text_matches_like_the_property_list(self):
+        response = self.client.post(self.url('saved-search-list'), {'params': {'search': 'side'}}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        matched = self.create_listing(address='1 Side street')
+        self.create_listing(address='2 Lakeside street')
+
+        response_cache.clear()
+        with translation.override('en'):
+            listed = APIClient().get(reverse('property-list'), {'search': 'side', 'pagination': 'cursor'})
+        self.assertIn(matched.pk, [row['id'] for row in listed.data['results']])
+        self.assertEqual(self.get_matches(), [matched.pk])
+
+    def test_recent_matches_are_held_back(self):
+        self.client.post(self.url('saved-search-list'), {'params': {'city': self.dataset.city.pk}}, format='json')
+        matched = self.create_listing()
+        with self.settings(SAVED_SEARCH_INBOX_LAG=60):
+            self.assertEqual(self.get_matches(), [])
+        self.assertEqual(self.get_matches(), [matched.pk])
+
+
+@override_settings(IMAGE_PROCESSING_WORKERS=0)
+class PropertyImageProcessingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.property = seed_dataset({'properties': 1, 'images': 0, 'documents': 0, 'reviews': 0}).property
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+
+    def test_variants_are_rendered_after_commit(self):
+        buffer = BytesIO()
+        Image.new('RGBA', (2400, 1200), (200, 40, 40, 128)).save(buffer, 'PNG')
+        upload = SimpleUploadedFile('photo.png', buffer.getvalue(), content_type='image/png')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image = PropertyImage.objects.create(property=self.property, image=upload)
+        image.refresh_from_db()
+
+        for name, variant in IMAGE_VARIANTS.items():
+            with self.subTest(variant=name), getattr(image, name).open('rb') as file:
+                rendered = Image.open(file)
+                self.assertEqual(rendered.format, variant.format)
+                self.assertLessEqual(rendered.width, variant.size[0])
+                self.assertLessEqual(rendered.height, variant.size[1])
+                self.assertEqual(rendered.width / rendered.height, 2)
+        self.assertLess(image.thumbnail.size, image.image.size)
+
+
+    def create_image(self, color):
+        buffer = BytesIO()
+        Image.new('RGB', (640, 480), color).save(buffer, 'PNG')
+        upload = SimpleUploadedFile('photo.png', buffer.getvalue(), content_type='image/png')
+        with self.captureOnCommitCallbacks(execute=True):
+            image = PropertyImage.objects.create(property=self.property, image=upload)
+        image.refresh_from_db()
+        return image
+
+    def assertVariantsExist(self, image):
+        for name in IMAGE_VARIANTS:
+            with self.subTest(variant=name):
+                self.assertTrue(default_storage.exists(getattr(image, name).name))
+
+    def test_identical_images_keep_their_variants(self):
+        first, second = self.create_image('red'), self.create_image('red')
+        self.assertEqual(first.image.name, second.image.name)
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertVariantsExist(second)
+
+    def test_reprocessing_keeps_the_variants(self):
+        image = self.create_image('blue')
+        previous = image.thumbnail.name
+        self.assertTrue(process_property_image(image.pk))
+        image.refresh_from_db()
+        self.assertVariantsExist(image)
+        self.assertFalse(default_storage.exists(previous))
+
+
+@override_settings(IMAGE_PROCESSING_WORKERS=0, CHUNKED_UPLOAD_PART_SIZE=4096)
+class PropertyUploadTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset({'properties': 1, 'images': 0, 'documents': 0, 'reviews': 0})
+        cls.dataset.seller.role = 'HOST'
+        cls.dataset.seller.save()
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+        self.client = APIClient()
+        self.client.force_authenticate(self.dataset.seller)
+
+    def url(self, name, **kwargs):
+        with translation.override('en'):
+            return reverse(name, kwargs=kwargs)
+
+    def put_part(self, upload_id, index, data):
+        return self.client.put(
+            self.url('upload-part', pk=upload_id, index=index), data, content_type='application/octet-stream'
+        )
+
+    def test_parts_are_joined_into_a_property_image(self):
+        buffer = BytesIO()
+        Image.effect_noise((128, 96), 64).save(buffer, 'PNG')
+        content = buffer.getvalue()
+        response = self.client.post(self.url('upload-create'), {
+            'property': self.dataset.property.pk, 'kind': 'image', 'filename': '../photo.png', 'size': len(content),
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        upload_id, part_count = response.data['id'], response.data['part_count']
+        self.assertEqual(part_count, -(-len(content) // 4096))
+        self.assertGreater(part_count, 1)
+
+        parts = [content[i:i + 4096] for i in range(0, len(content), 4096)]
+        for index in reversed(range(1, part_count)):
+            self.assertEqual(self.put_part(upload_id, index, parts[index]).status_code, 200)
+        self.assertEqual(self.put_part(upload_id, 0, parts[0][:100]).status_code, 400)
+        response = self.client.post(self.url('upload-complete', pk=upload_id))
+        self.assertEqual((response.status_code, response.data['missing_parts']), (400, [0]))
+
+        self.assertEqual(self.put_part(upload_id, 0, parts[0]).status_code, 200)
+        self.assertEqual(self.client.get(self.url('upload-detail', pk=upload_id)).data['received_parts'], list(range(part_count)))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url('upload-complete', pk=upload_id))
+        self.assertEqual(response.status_code, 201, response.content)
+
+        image = PropertyImage.objects.get(pk=response.data['id'])
+        digest = hashlib.sha256(content).hexdigest()
+        self.assertEqual(image.image.name, f'property/images/{digest[:2]}/{digest}.png')
+        with image.image.open('rb') as file:
+            self.assertEqual(file.read(), content)
+        self.assertTrue(image.thumbnail)
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'property', 'uploads')), [])
+        self.assertEqual(self.client.get(self.url('upload-detail', pk=upload_id)).status_code, 404)
+
+    def test_upload_completed_meanwhile_is_not_created_twice(self):
+        content = b'%PDF-1.4 scan'
+        response = self.client.post(self.url('upload-create'), {
+            'property': self.dataset.property.pk, 'kind': 'document', 'filename': 'scan.pdf', 'size': len(content),
+        }, format='json')
+        upload_id = response.data['id']
+        self.assertEqual(self.put_part(upload_id, 0, content).status_code, 200)
+
+        names = []
+
+        def assemble_and_lose(upload):
+            # Runs unlocked; another request completes the same upload meanwhile.
+            names.append(assemble_upload(upload))
+            PropertyUpload.objects.filter(pk=upload.pk).delete()
+            return names[0]
+
+        with mock.patch('house_app.views.assemble_upload', assemble_and_lose):
+            response = self.client.post(self.url('upload-complete', pk=upload_id))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(PropertyDocument.objects.exists())
+        self.assertFalse(PropertyDocument._meta.get_field('file').storage.exists(names[0]))
+
+    def test_only_own_properties_accept_uploads(self):
+        self.client.force_authenticate(UserProfile.objects.create(username='host', phone_number='+996700000020', role='HOST'))
+        response = self.client.post(self.url('upload-create'), {
+            'property': self.dataset.property.pk, 'kind': 'document', 'filename': 'scan.pdf', 'size': 10,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('property', response.data)
+
+
+class ContentAddressedStorageTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.property = seed_dataset({'properties': 1, 'images': 0, 'documents': 0, 'reviews': 0}).property
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+
+    def test_identical_files_share_one_counted_blob(self):
+        documents = [
+            PropertyDocument.objects.create(property=self.property, file=SimpleUploadedFile(name, b'same scan'))
+            for name in ('scan.pdf', 'scan (1).pdf')
+        ]
+        name = documents[0].file.name
+        self.assertEqual(documents[1].file.name, name)
+        self.assertTrue(name.endswith(f'{hashlib.sha256(b"same scan").hexdigest()}.pdf'))
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            documents[0].delete()
+        self.assertTrue(documents[1].file.storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            documents[1].delete()
+        self.assertFalse(documents[1].file.storage.exists(name))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_command_moves_upload_names_into_blobs(self):
+        storage = default_storage
+        names = [storage.save('property/documents/scan.pdf', ContentFile(b'old scan')) for _ in range(2)]
+        PropertyDocument.objects.bulk_create([PropertyDocument(property=self.property, file=name) for name in names])
+
+        call_command('deduplicate_property_media', stdout=StringIO())
+        blob_names = set(PropertyDocument.objects.values_list('file', flat=True))
+        self.assertEqual(len(blob_names), 1)
+        self.assertEqual(MediaBlob.objects.get(name=blob_names.pop()).ref_count, 2)
+        self.assertFalse(any(storage.exists(name) for name in names))
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class PropertyImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset({'properties': 1, 'reviews': 0})
+
+    def test_csv_upload_creates_valid_rows(self):
+        ds = self.dataset
+        body = (
+            'title,title_ru,description,property_type,region,city,district,address,area,price,rooms,floor,total_floors\n'
+            f'Lakeside loft,Лофт,Bright,apartment,{ds.region.name.upper()},{ds.city.name},{ds.district.name},1 Lake st,42.5,99000,2,3,9\n'
+            f'Nowhere,,Dark,house,{ds.region.name},Atlantis,,2 Sea st,80,1000,3,1,2\n'
+        ).encode('utf-8-sig')
+        client = APIClient()
+        client.force_authenticate(ds.admin)
+        with translation.override('en'):
+            url = reverse('property-import')
+        upload = SimpleUploadedFile('listings.csv', body, content_type='text/csv')
+        response = client.post(url, {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual((response.data['created'], response.data['invalid']), (1, 1))
+        self.assertEqual(response.data['errors'][0]['line'], 3)
+        self.assertIn('city', response.data['errors'][0]['errors'])
+
+        imported = Property.objects.get(title_en='Lakeside loft')
+        self.assertEqual((imported.title_ru, imported.seller, imported.district), ('Лофт', ds.admin, ds.district))
+        request = Request(APIRequestFactory().get('/', {'search': 'lakeside'}))
+        found = PropertySearchFilter().filter_queryset(request, Property.objects.all(), None)
+        self.assertEqual(list(found), [imported])
+
+    def post(self, body, content_type='application/x-ndjson'):
+        client = APIClient()
+        client.force_authenticate(self.dataset.admin)
+        with translation.override('en'):
+            url = reverse('property-import')
+        return client.generic('POST', url, body, content_type=content_type)
+
+    def get_row(self, title):
+        ds = self.dataset
+        return json.dumps({
+            'title': title, 'property_type': 'house', 'city': ds.city.name, 'address': '1 Main st',
+            'area': 50, 'price': 1000, 'rooms': 2, 'floor': 1, 'total_floors': 2,
+        }).encode()
+
+    def test_rows_that_are_not_utf8_are_rejected(self):
+        body = self.get_row('Valid') + b'\n' + self.get_row('Broken').replace(b'Broken', b'Br\xffoken') + b'\n'
+        response = self.post(body)
+        self.assertEqual((response.data['created'], response.data['invalid']), (1, 1))
+        self.assertEqual(response.data['errors'], [{'line': 2, 'errors': {'non_field_errors': ['Row is not valid UTF-8.']}}])
+
+        ds = self.dataset
+        body = (
+            'title,property_type,city,address,area,price,rooms,floor,total_floors\n'
+            f'"Two\nlines \xff",house,{ds.city.name},1 Main st,50,1000,2,1,2\n'
+        ).encode('utf-8').replace(b'\xc3\xbf', b'\xff')
+        response = self.post(body, 'text/csv')
+        self.assertEqual(response.data['errors'][0]['errors'], {'non_field_errors': ['Row is not valid UTF-8.']})
+        self.assertFalse(Property.objects.filter(title_en__startswith='Two').exists())
+
+    def test_request_limits(self):
+        body = b'\n'.join(self.get_row(f'Row {i}') for i in range(3))
+        with override_settings(PROPERTY_IMPORT_MAX_ROWS=2):
+            response = self.post(body)
+        self.assertEqual((response.data['rows'], response.data['created']), (2, 2))
+        self.assertEqual(response.data['errors'][0]['line'], 3)
+
+        with override_settings(PROPERTY_IMPORT_MAX_SIZE=len(body) - 1):
+            response = self.post(body)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Property.objects.filter(title_en__startswith='Row ').count(), 2)
+
+
+class PropertyExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset({'properties': 6, 'images': 0, 'documents': 0, 'reviews': 0})
+        Property.objects.filter(pk=cls.dataset.property.pk).update(
+            title_ru='Квартира', address='1 "Lake", street\nsecond line',
+        )
+
+    def export(self, **params):
+        with translation.override('en'):
+            response = APIClient().get(reverse('property-export'), params)
+        return response, b''.join(getattr(response, 'streaming_content', [])).decode()
+
+    def test_ndjson_rows_follow_the_filters(self):
+        response, body = self.export(property_type='house', ordering='price')
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        rows = [json.loads(line) for line in body.splitlines()]
+        expected = Property.objects.filter(property_type='house').order_by('price', 'id')
+        self.assertEqual([row['id'] for row in rows], list(expected.values_list('id', flat=True)))
+
+        row = json.loads(self.export(ordering='price')[1].splitlines()[0])
+        first = Property.objects.order_by('price', 'id').first()
+        self.assertEqual((row['title_en'], row['title_ru'], row['city']), (first.title_en, first.title_ru, first.city.name))
+
+    def test_csv_has_a_header_and_escapes_values(self):
+        response, body = self.export(output='csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="properties.csv"')
+        rows = list(csv.reader(StringIO(body)))
+        header, rows = rows[0], rows[1:]
+        self.assertEqual(header, [name for name, lookup in get_export_columns()])
+        self.assertEqual(len(rows), Property.objects.count())
+        row = dict(zip(header, next(row for row in rows if row[0] == str(self.dataset.property.pk))))
+        self.assertEqual((row['title_ru'], row['address']), ('Квартира', '1 "Lake", street\nsecond line'))
+
+    def test_unknown_format_is_rejected(self):
+        response, body = self.export(output='xml')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('output', response.data)
+
+    @override_settings(REPLICA_DATABASE_ALIAS='default')
+    def test_rows_are_read_from_the_routed_database(self):
+        # 'default' stands in for the replica alias; without the pin the stream reads with no alias set.
+        with mock.patch('house_app.views.iter_export', return_value=iter(())) as export:
+            self.export()
+        self.assertEqual(export.call_args.args[0]._db, 'default')
+
+
+class PropertySearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset({'properties': 6, 'images': 0, 'documents': 0, 'reviews': 0})
+        cls.in_title, cls.in_description, cls.in_address = Property.objects.order_by('pk')[:3]
+        cls.in_title.title_en = 'Zebra crossing loft'
+        cls.in_description.description_en = 'Quiet, next to the zebra park.'
+        cls.in_address.address = '7 Zebrovaya st'
+        for instance in (cls.in_title, cls.in_description, cls.in_address):
+            instance.save()
+
+    def search(self, text, **params):
+        request = Request(APIRequestFactory().get('/', {'search': text, **params}))
+        queryset = Property.objects.order_by('-created_at')
+        return list(PropertySearchFilter().filter_queryset(request, queryset, PropertyListView()))
+
+    def test_matches_are_ranked_by_field_weight(self):
+        self.assertEqual(self.search('zebr'), [self.in_title, self.in_address, self.in_description])
+        self.assertEqual(self.search('zebra loft'), [self.in_title])
+        ordered = self.search('zebr', ordering='price')
+        self.assertEqual(set(ordered), {self.in_title, self.in_address, self.in_description})
+
+    def test_falls_back_to_icontains_without_backend(self):
+        with mock.patch('house_app.filters.get_search_backend', return_value=None):
+            found = self.search('zebr')
+        self.assertEqual(set(found), {self.in_title, self.in_description, self.in_address})
+
+    def test_index_and_remove_follow_saves_and_deletes(self):
+        self.in_title.title_en = 'Plain loft'
+        self.in_title.save()
+        self.assertEqual(self.search('zebra crossing'), [])
+        self.in_address.delete()
+        self.assertEqual(self.search('zebr'), [self.in_description])
+
+    def test_postgres_index_writes_a_batch_in_one_statement(self):
+        backend = PostgresSearchBackend()
+        with mock.patch('house_app.search.connection') as connection_mock:
+            backend.index(Property.objects.order_by('pk')[:3])
+        cursor = connection_mock.cursor.return_value.__enter__.return_value
+        self.assertEqual(cursor.execute.call_count, 1)
+        sql, params = cursor.execute.call_args.args
+        self.assertEqual(sql.count('(%s, setweight'), 3)
+        self.assertEqual(sql.count('%s'), len(params))
+        self.assertIn('ON CONFLICT (property_id)', sql)
+
+
+class PropertyGeoFilterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset({'properties': 4, 'images': 0, 'documents': 0, 'reviews': 0})
+        cls.points = {
+            'bishkek': (42.8746, 74.5698),
+            'osh': (40.5283, 72.7985),
+            'fiji': (-17.7134, 178.0650),
+            'samoa': (-13.7590, -172.1046),
+        }
+        for prop, (name, (latitude, longitude)) in zip(Property.objects.order_by('pk'), cls.points.items()):
+            prop.title_en, prop.latitude, prop.longitude = name, latitude, longitude
+            prop.save()
+
+    def setUp(self):
+        response_cache.clear()
+
+    def get_titles(self, **params):
+        with translation.override('en'):
+            response = APIClient().get(reverse('property-list'), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return sorted(row['title'] for row in response.data['results'])
+
+    def test_bbox(self):
+        self.assertEqual(self.get_titles(bbox='72,40,75,43'), ['bishkek', 'osh'])
+        # min_lng > max_lng crosses the antimeridian.
+        self.assertEqual(self.get_titles(bbox='170,-20,-170,-10'), ['fiji', 'samoa'])
+
+    def test_radius(self):
+        # Bishkek and Osh are ~300 km apart.
+        self.assertEqual(self.get_titles(near='42.87,74.59', radius=250), ['bishkek'])
+        self.assertEqual(self.get_titles(near='42.87,74.59', radius=350), ['bishkek', 'osh'])
+
+    def test_clusters(self):
+        with translation.override('en'):
+            response = APIClient().get(reverse('property-clusters'), {'precision': 1})
+        counts = {cell['geohash']: cell['count'] for cell in response.data['clusters']}
+        self.assertEqual(sum(counts.values()), len(self.points))
+        self.assertEqual(counts['t'], 2)
+
+
+class PropertyLocationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset({'properties': 40, 'regions': 2, 'cities': 2, 'images': 0, 'documents': 0, 'reviews': 0})
+
+    def setUp(self):
+        response_cache.clear()
+
+    def get_ids(self, **params):
+        with translation.override('en'):
+            response = APIClient().get(reverse('property-list'), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        filterset = PropertyFilterSet(params, queryset=Property.objects.all())
+        self.assertTrue(filterset.is_valid())
+        ids = sorted(filterset.qs.values_list('pk', flat=True))
+        self.assertEqual(response.data['count'], len(ids))
+        return ids
+
+    def test_filters(self):
+        ds = self.dataset
+        other_city = City.objects.exclude(pk=ds.city.pk).first()
+        self.assertEqual(self.get_ids(region=str(ds.region.pk)), sorted(
+            Property.objects.filter(city__region=ds.region).values_list('pk', flat=True)
+        ))
+        self.assertEqual(self.get_ids(cities=f'{ds.city.pk},{other_city.pk}'), sorted(
+            Property.objects.filter(city__in=[ds.city, other_city]).values_list('pk', flat=True)
+        ))
+        self.assertEqual(self.get_ids(districts=str(ds.district.pk)), sorted(
+            Property.objects.filter(district=ds.district).values_list('pk', flat=True)
+        ))
+
+    def test_region_filter_is_a_prefix_match(self):
+        # Locale collations ignore '/', so a BETWEEN '/1/' AND '/1/~' range
+        # would also admit '/10/...'; the filter must be a plain prefix match.
+        ds = self.dataset
+        moved = Property.objects.exclude(pk=ds.property.pk).filter(region=ds.region).first()
+        Property.objects.filter(pk=moved.pk).update(location_path=f'/{ds.region.pk}0/')
+        self.assertNotIn(moved.pk, self.get_ids(region=str(ds.region.pk)))
+        self.assertEqual(Property.objects.filter(location_path__startswith='/*').count(), 0)
+
+        queryset = PropertyFilterSet({'region': ds.region.pk}, queryset=Property.objects.all()).qs
+        lookups = [type(node) for node in queryset.query.where.children]
+        self.assertEqual(lookups, [PathStartsWith])
+        self.assertNotIn('~', str(queryset.query))
+
+    def test_location_path_backfill_keeps_stored_location(self):
+        build_location_paths = import_module('house_app.migrations.0013_property_location_path').build_location_paths
+        ds = self.dataset
+        other_region = Region.objects.exclude(pk=ds.region.pk).first()
+        Property.objects.filter(pk=ds.property.pk).update(region=other_region, location_path='')
+        build_location_paths(apps, None)
+        row = Property.objects.values('region_id', 'city_id', 'district_id', 'location_path').get(pk=ds.property.pk)
+        self.assertEqual(row['region_id'], other_region.pk)
+        self.assertEqual(row['district_id'], ds.property.district_id)
+        self.assertEqual(row['location_path'], f"/{other_region.pk}/{row['city_id']}/{row['district_id']}/")
+
+    def test_inconsistent_location_is_rejected(self):
+        ds = self.dataset
+        other_region = Region.objects.exclude(pk=ds.region.pk).first()
+        client = APIClient()
+        client.force_authenticate(ds.admin)
+        with translation.override('en'):
+            response = client.post(reverse('property-batch'), {
+                'update': [{'id': ds.property.pk, 'region': other_region.pk}],
+            }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('city', response.data['update'][0])
+
+        prop = Property.objects.get(pk=ds.property.pk)
+        prop.region = other_region
+        with self.assertRaises(ValidationError):
+            prop.clean()
+
+    def test_moved_district_relocates_properties(self):
+        district = Property.objects.filter(district__isnull=False).first().district
+        target = City.objects.exclude(region=district.city.region_id).first()
+        moved = set(Property.objects.filter(district=district).values_list('pk', flat=True))
+        district.city = target
+        district.save()
+        rows = Property.objects.filter(pk__in=moved).values_list('region_id', 'city_id', 'location_path')
+        self.assertEqual(set(rows), {(target.region_id, target.pk, f'/{target.region_id}/{target.pk}/{district.pk}/')})
+        self.assertEqual(set(self.get_ids(region=str(target.region_id))) & moved, moved)
+
+
+class PropertyFacetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset({'properties': 40, 'images': 0, 'documents': 0, 'reviews': 0})
+
+    def setUp(self):
+        response_cache.clear()
+
+    def test_facets_ignore_their_own_filter(self):
+        with translation.override('en'):
+            response = APIClient().get(reverse('property-list'), {'facets': 'true', 'property_type': 'house'})
+        facets = response.data['facets']
+
+        types = {row['value']: row['count'] for row in facets['property_type']}
+        self.assertEqual(types, {
+            value: Property.objects.filter(property_type=value).count() for value, label in Property.PROPERTY_TYPE_CHOICES
+        })
+        self.assertEqual(sum(row['count'] for row in facets['rooms']), response.data['count'])
+        self.assertEqual(sum(row['count'] for row in facets['city']), response.data['count'])
+
+    def test_every_facet_is_a_filter(self):
+        district = Property.objects.exclude(district=None).values_list('district', flat=True).first()
+        params = {'facets': 'true', 'rooms__gte': 2, 'district': district}
+        with translation.override('en'):
+            response = APIClient().get(reverse('property-list'), params)
+        self.assertEqual(response.data['count'], Property.objects.filter(rooms__gte=2, district=district).count())
+
+        facets = response.data['facets']
+        self.assertEqual(sum(row['count'] for row in facets['rooms']), Property.objects.filter(district=district).count())
+        self.assertEqual(sum(row['count'] for row in facets['district']), Property.objects.filter(rooms__gte=2).count())
+        for name, names in FACET_PARAMS.items():
+            with self.subTest(facet=name):
+                self.assertLessEqual(set(names), set(PropertyFilterSet.base_filters))
+
+    def test_location_facets_ignore_the_list_filters(self):
+        city, district = Property.objects.exclude(district=None).values_list('city', 'district').first()
+        for params, facet in (({'cities': city}, 'city'), ({'districts': district}, 'district')):
+            with self.subTest(facet=facet), translation.override('en'):
+                response = APIClient().get(reverse('property-list'), {'facets': 'true', **params})
+                total = Property.objects.exclude(**{facet: None}).count()
+                self.assertEqual(sum(row['count'] for row in response.data['facets'][facet]), total)
+
+
+class GeographyCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset({'properties': 2, 'images': 0, 'documents': 0, 'reviews': 0})
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, **headers):
+        with translation.override('en'):
+            return APIClient().get(reverse('region-list'), **headers)
+
+    def test_not_modified(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_version_outlives_the_local_cache(self):
+        etag = self.get()['ETag']
+        # Another worker, or this one once GEOGRAPHY_CACHE_TIMEOUT has passed.
+        cache.clear()
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_change_bumps_version(self):
+        etag = self.get()['ETag']
+        City.objects.filter(pk=self.dataset.city.pk).update(name='Renamed')
+        self.dataset.city.save()
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(REPLICA_DATABASE_ALIAS='default')
+    def test_misses_read_the_primary_while_the_replica_may_lag(self):
+        # 'default' stands in for the replica alias.
+        routed = []
+        filter_queryset = RegionViewSet.filter_queryset
+
+        def record(view, queryset):
+            routed.append(read_database.get())
+            return filter_queryset(view, queryset)
+
+        self.enterContext(mock.patch.object(RegionViewSet, 'filter_queryset', record))
+        bump_geography_version()
+        self.get()
+        self.get()
+        get_geography_version_cache().set(GEOGRAPHY_VERSION_KEY, time.time_ns() - 60 * 10 ** 9, None)
+        cache.clear()
+        self.get()
+        self.assertEqual(routed, [None, 'default'])
+
+
+class RendererTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset({'properties': 6, 'reviews': 0})
+
+    def setUp(self):
+        response_cache.clear()
+
+    def get(self, name, accept, **kwargs):
+        with translation.override('en'):
+            url = reverse(name, kwargs=kwargs)
+        response = APIClient().get(url, HTTP_ACCEPT=accept)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_orjson_matches_drf_json(self):
+        for name, kwargs in (('property-list', {}), ('property-detail', {'pk': self.dataset.property.pk}), ('region-list', {})):
+            with self.subTest(route=name):
+                response = self.get(name, 'application/json', **kwargs)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_msgpack_is_negotiated(self):
+        response = self.get('property-detail', 'application/msgpack', pk=self.dataset.property.pk)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        as_json = self.get('property-detail', 'application/json', pk=self.dataset.property.pk)
+        self.assertEqual(msgpack.unpackb(response.content), json.loads(as_json.content))
+
+        client = APIClient()
+        client.force_authenticate(self.dataset.buyer)
+        with translation.override('en'):
+            url = reverse('saved-search-list')
+        response = client.post(
+            url, msgpack.packb({'params': {'city': self.dataset.city.pk}}), content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(msgpack.unpackb(response.content)['params'], {'city': self.dataset.city.pk})
+
+
+@override_settings(REPLICA_DATABASE_ALIAS='default')
+class ReplicaRoutingTests(TestCase):
+    # 'default' stands in for the replica alias: the tests check where reads are routed.
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset({'properties': 2, 'images': 0, 'documents': 0, 'reviews': 0})
+
+    def setUp(self):
+        cache.clear()
+        response_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.dataset.buyer)
+        self.routed = []
+        retrieve = PropertyDetailView.retrieve
+
+        def record(view, request, *args, **kwargs):
+            self.routed.append(read_database.get())
+            return retrieve(view, request, *args, **kwargs)
+
+        self.enterContext(mock.patch.object(PropertyDetailView, 'retrieve', record))
+
+    def url(self, name, **kwargs):
+        with translation.override('en'):
+            return reverse(name, kwargs=kwargs)
+
+    def test_reads_are_sent_to_the_replica_until_the_user_writes(self):
+        detail = self.url('property-detail', pk=self.dataset.property.pk)
+        self.assertEqual(self.client.get(detail).status_code, 200)
+        response = self.client.post(self.url('saved-search-list'), {'params': {'property_type': 'house'}}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.client.get(detail).status_code, 200)
+        self.assertEqual(APIClient().get(detail).status_code, 200)
+        self.assertEqual(self.routed, ['default', None, 'default'])
+        self.assertIsNone(read_database.get())
+
+    def test_process_local_sticky_cache_is_refused(self):
+        with self.settings(REPLICA_STICKY_CACHE_ALIAS='default'), self.assertRaises(ImproperlyConfigured):
+            ReplicaStickinessMiddleware(lambda request: None)
+        ReplicaStickinessMiddleware(lambda request: None)
+
+    def test_router(self):
+        router = ReplicaRouter()
+        instance = Property.objects.get(pk=self.dataset.property.pk)
+        instance._state.db = 'replica'
+        self.assertEqual(router.db_for_write(Property, instance=instance), 'default')
+        self.assertIsNone(router.db_for_read(Property))
+        with mock.patch('house_app.replicas.get_replica_alias', return_value='replica'):
+            self.assertFalse(router.allow_migrate('replica', 'house_app'))
+            self.assertIsNone(router.allow_migrate('default', 'house_app'))
+
+
+class AsyncViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset({'properties': 12, 'reviews': 10})
+
+    def setUp(self):
+        response_cache.clear()
+
+    def assertSameResponse(self, name, async_name, kwargs=None, params=None):
+        client = APIClient()
+        with translation.override('en'):
+            expected = client.get(reverse(name, kwargs=kwargs), params)
+            response = client.get(reverse(async_name, kwargs=kwargs), params)
+        self.assertEqual(response.status_code, expected.status_code)
+        if isinstance(expected.data, dict) and 'results' in expected.data:
+            self.assertEqual(response.json()['count'], expected.data['count'])
+            self.assertEqual(response.json()['results'], expected.json()['results'])
+        else:
+            self.assertEqual(response.json(), expected.json())
+
+    def test_matches_sync_views(self):
+        ds = self.dataset
+        self.assertSameResponse('property-list', 'async-property-list', params={'page': 2, 'ordering': 'price'})
+        self.assertSameResponse('property-list', 'async-property-list', params={'city': 'x'})
+        self.assertSameResponse('property-list', 'async-property-list', params={'page': 99})
+        self.assertSameResponse('property-detail', 'async-property-detail', {'pk': ds.property.pk})
+        self.assertSameResponse('property-detail', 'async-property-detail', {'pk': 0})
+        self.assertSameResponse('region-list', 'async-region-list')
+        self.assertSameResponse('region-detail', 'async-region-detail', {'pk': ds.region.pk})
+        self.assertSameResponse('region-detail', 'async-region-detail', {'pk': 0})
+        self.assertSameResponse('review-list', 'async-review-list', params={'seller': ds.seller.pk})
+
+
+class ResponseCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset({'properties': 12, 'cities': 2, 'images': 0, 'documents': 0, 'reviews': 0})
+        first = Property.objects.order_by('pk').first()
+        cls.first = first
+        cls.other = Property.objects.exclude(city=first.city).order_by('pk').first()
+
+    def setUp(self):
+        response_cache.clear()
+        self.client = APIClient()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+    def get(self, name, params=None, language='en', **kwargs):
+        with translation.override(language):
+            url = reverse(name, kwargs=kwargs or None)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def assertCached(self, name, params=None, **kwargs):
+        self.assertEqual(self.get(name, params, **kwargs)[1], 0)
+
+    def assertNotCached(self, name, params=None, **kwargs):
+        self.assertGreater(self.get(name, params, **kwargs)[1], 0)
+
+    def test_seller_rating_ordering_is_tagged(self):
+        view = PropertyListView()
+        for ordering, expected in (('price,-seller_rating', True), ('seller_ratings', False), ('price', False)):
+            with self.subTest(ordering=ordering):
+                view.request = Request(APIRequestFactory().get('/', {'ordering': ordering}))
+                self.assertEqual(ANY_SELLER in view.get_response_cache_tags([]), expected)
+
+    def test_city_lists_with_facets_are_tagged_with_every_city(self):
+        view = PropertyListView()
+        for params, expected in (({'city': 1}, False), ({'city': 1, 'facets': 'true'}, True)):
+            with self.subTest(params=params):
+                view.request = Request(APIRequestFactory().get('/', params))
+                self.assertEqual(ANY_CITY in view.get_response_cache_tags([]), expected)
+
+    @override_settings(REPLICA_DATABASE_ALIAS='default', REPLICA_STICKY_SECONDS=10)
+    def test_replica_responses_are_stored_once_the_replica_can_have_the_changes(self):
+        # 'default' stands in for the replica alias; setUp has just cleared the cache.
+        self.assertNotCached('property-list', {'ordering': 'price'})
+        self.assertNotCached('property-list', {'ordering': 'price'})
+        later = time.monotonic() + 60
+        with mock.patch('house_app.response_cache.time', monotonic=lambda: later):
+            self.assertNotCached('property-list', {'ordering': 'price'})
+            self.assertCached('property-list', {'ordering': 'price'})
+            Property.objects.get(pk=self.other.pk).save()
+            self.assertNotCached('property-list', {'ordering': 'price'})
+            self.assertNotCached('property-list', {'ordering': 'price'})
+            self.assertNotCached('property-detail', pk=self.first.pk)
+            self.assertCached('property-detail', pk=self.first.pk)
+
+    def test_anonymous_responses_are_cached_per_language_and_params(self):
+        response, query_count = self.get('property-list', {'ordering': 'price', 'property_type': ''})
+        self.assertGreater(query_count, 0)
+        cached, query_count = self.get('property-list', {'ordering': 'price'})
+        self.assertEqual((cached.content, cached['ETag'], query_count), (response.content, response['ETag'], 0))
+        self.assertNotCached('property-list', {'ordering': 'price'}, language='ru')
+        self.assertCached('property-list', {'ordering': 'price'}, language='ru')
+
+        with translation.override('en'):
+            url = reverse('property-list')
+        self.assertEqual(self.client.get(url, {'ordering': 'price'}, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        self.client.force_authenticate(self.dataset.buyer)
+        self.assertNotCached('property-list', {'ordering': 'price'})
+
+    def test_changes_evict_tagged_entries(self):
+        first, other = self.first, self.other
+        requests = {
+            'first': ('property-detail', None, {'pk': first.pk}),
+            'other': ('property-detail', None, {'pk': other.pk}),
+            'first city': ('property-list', {'city': first.city_id}, {}),
+            'other city': ('property-list', {'cities': f'{other.city_id}'}, {}),
+            'all': ('property-list', {'property_type': 'house'}, {}),
+        }
+        for name, params, kwargs in requests.values():
+            self.get(name, params, **kwargs)
+
+        first.price += 1
+        first.save()
+        for key in ('first', 'first city', 'all'):
+            self.assertNotCached(requests[key][0], requests[key][1], **requests[key][2])
+        for key in ('other', 'other city'):
+            self.assertCached(requests[key][0], requests[key][1], **requests[key][2])
+
+        PropertyDocument.objects.create(property=other, file=SimpleUploadedFile('plan.pdf', b'%PDF-1.4'))
+        self.assertNotCached('property-detail', pk=other.pk)
+        self.assertCached('property-list', {'city': first.city_id})
+
+        Review.objects.create(seller=other.seller, author=self.dataset.buyer, rating=5)
+        self.assertNotCached('property-detail', pk=other.pk)
+
+    @override_settings(RESPONSE_CACHE_MAX_ENTRIES=2)
+    def test_least_recently_used_entry_is_evicted(self):
+        first, other = self.first, self.other
+        self.get('property-detail', pk=first.pk)
+        self.get('property-detail', pk=other.pk)
+        self.assertCached('property-detail', pk=first.pk)
+        self.get('property-list')
+        self.assertEqual(len(response_cache.entries), 2)
+        self.assertCached('property-detail', pk=first.pk)
+        self.assertNotCached('property-detail', pk=other.pk)
+
+        response_cache.clear()
+        size = len(self.get('property-detail', pk=first.pk)[0].content)
+        with override_settings(RESPONSE_CACHE_MAX_BYTES=size * 3 // 2):
+            content = self.get('property-detail', pk=other.pk)[0].content
+        self.assertEqual([entry.content for entry in response_cache.entries.values()], [content])
+        self.assertEqual(response_cache.size, len(content))
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class CachedJWTAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserProfile.objects.create_user('cached', password='pass', phone_number='+996700000020', role='GUEST')
+
+    def setUp(self):
+        user_cache.clear()
+        self.client = APIClient()
+        self.refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+        with translation.override('en'):
+            self.url = reverse('user-me')
+
+    def get_me(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        user_queries = [query for query in queries.captured_queries if 'FROM "house_app_userprofile"' in query['sql']]
+        return response, len(user_queries)
+
+    def test_user_is_loaded_once(self):
+        self.assertEqual(self.get_me()[1], 1)
+        response, user_queries = self.get_me()
+        self.assertEqual((response.data['role'], user_queries), ('GUEST', 0))
+
+    def test_save_and_logout_invalidate(self):
+        self.get_me()
+        user = UserProfile.objects.get(pk=self.user.pk)
+        user.role = 'HOST'
+        user.save()
+        response, user_queries = self.get_me()
+        self.assertEqual((response.data['role'], user_queries), ('HOST', 1))
+
+        self.refresh.blacklist()
+        self.assertEqual(self.get_me()[1], 1)
+
+
+@override_settings(SQL_PROFILING_ENABLED=True, SQL_PROFILING_SAMPLE_RATE=1.0)
+class SQLProfilingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed_dataset({'properties': 5, 'reviews': 5})
+
+    def setUp(self):
+        response_cache.clear()
+        profiler.reset()
+        self.addCleanup(profiler.reset)
+
+    def test_requests_are_recorded_per_url_name(self):
+        with translation.override('en'):
+            list_url, profile_url = reverse('property-list'), reverse('sql-profile')
+        client = APIClient()
+        with CaptureQueriesContext(connection) as queries:
+            client.get(list_url)
+        query_count = len(queries)
+        self.assertEqual(client.get(profile_url).status_code, 401)
+
+        client.force_authenticate(self.dataset.admin)
+        report = client.get(profile_url).data
+        row = report['endpoints']['GET property-list']
+        self.assertEqual((row['requests'], row['max_queries']), (1, query_count))
+        self.assertTrue(any('house_app_property' in query['sql'] for query in row['hot_queries']))
+        self.assertEqual(client.delete(profile_url).status_code, 204)
+        self.assertNotIn('GET property-list', profiler.snapshot()['endpoints'])
+
+    def test_serialization_is_timed_apart_from_rendering(self):
+        to_representation = PropertyListingSerializer.to_representation
+
+        def slow(serializer, *args, **kwargs):
+            time.sleep(0.05)
+            return to_representation(serializer, *args, **kwargs)
+
+        with translation.override('en'):
+            url = reverse('property-list')
+        with mock.patch.object(PropertyListingSerializer, 'to_representation', slow):
+            APIClient().get(url)
+        row = profiler.snapshot()['endpoints']['GET property-list']
+        self.assertGreaterEqual(row['avg_serialize_ms'], 50)
+        self.assertLess(row['avg_render_ms'], 50)
+
+    def test_in_lists_share_a_fingerprint(self):
+        self.assertEqual(
+            get_fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s)'),
+            get_fingerprint('SELECT 1 FROM t  WHERE id IN (%s)'),
+        )
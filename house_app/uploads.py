@@ -0,0 +1,173 @@
+import os
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import File
+from django.core.files.storage import default_storage
+from PIL import Image, UnidentifiedImageError
+from rest_framework.exceptions import ValidationError
+
+
+PARTS_DIRECTORY = 'property/uploads'
+
+
+def get_part_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_PART_SIZE', 8 * 1024 * 1024)
+
+
+def get_max_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_MAX_SIZE', 512 * 1024 * 1024)
+
+
+def get_target_field(upload):
+    from .models import PropertyDocument, PropertyImage
+
+    if upload.kind == 'image':
+        return PropertyImage._meta.get_field('image')
+    return PropertyDocument._meta.get_field('file')
+
+
+def get_storage(upload):
+    """Where the parts are kept; the joined file goes to the target field's storage."""
+    return default_storage
+
+
+def get_parts_directory(upload):
+    return posixpath.join(PARTS_DIRECTORY, str(upload.pk))
+
+
+def get_part_name(upload, index):
+    return posixpath.join(get_parts_directory(upload), f'{index:06d}.part')
+
+
+def get_received_parts(upload):
+    """``{index: size}`` of the parts already in storage."""
+    storage = get_storage(upload)
+    directory = get_parts_directory(upload)
+    try:
+        names = storage.listdir(directory)[1]
+    except FileNotFoundError:
+        return {}
+    parts = {}
+    for name in names:
+        stem, extension = os.path.splitext(name)
+        if extension == '.part' and stem.isdigit():
+            parts[int(stem)] = storage.size(posixpath.join(directory, name))
+    return parts
+
+
+class LimitedReader:
+    """Reads at most ``length`` bytes of ``stream`` and remembers how many it got."""
+
+    def __init__(self, stream, length):
+        self.stream = stream
+        self.remaining = length
+        self.read_bytes = 0
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.stream.read(size)
+        self.remaining -= len(data)
+        self.read_bytes += len(data)
+        return data
+
+
+def save_part(upload, index, stream):
+    """
+    Copy one part from the request stream into storage chunk by chunk.
+    Re-sending a part replaces it, so a client can retry any part that
+    did not make it. Returns the number of bytes written.
+    """
+    storage = get_storage(upload)
+    name = get_part_name(upload, index)
+    length = upload.get_part_length(index)
+    storage.delete(name)
+    reader = LimitedReader(stream, length)
+    saved_name = storage.save(name, File(reader, name))
+    if saved_name != name or reader.read_bytes != length:
+        storage.delete(saved_name)
+        raise ValidationError({'detail': f'Part {index} must be {length} bytes, got {reader.read_bytes}.'})
+    return reader.read_bytes
+
+
+class JoinedParts:
+    """Read-only file over the stored parts, one after the other."""
+
+    def __init__(self, storage, names):
+        self.storage = storage
+        self.names = list(names)
+        self.current = None
+
+    def read(self, size=-1):
+        chunks = []
+        while size is None or size < 0 or size > 0:
+            if self.current is None:
+                if not self.names:
+                    break
+                self.current = self.storage.open(self.names.pop(0), 'rb')
+            data = self.current.read(size if size is not None else -1)
+            if not data:
+                self.current.close()
+                self.current = None
+                continue
+            chunks.append(data)
+            if size is not None and size > 0:
+                size -= len(data)
+        return b''.join(chunks)
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+            self.current = None
+
+
+def verify_image(storage, name):
+    try:
+        with storage.open(name, 'rb') as file, Image.open(file) as image:
+            image.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError) as exc:
+        raise ValidationError({'detail': 'Upload a valid image.'}) from exc
+
+
+def get_missing_parts(upload):
+    received = get_received_parts(upload)
+    return [index for index in range(upload.get_part_count()) if received.get(index) != upload.get_part_length(index)]
+
+
+def assemble_upload(upload):
+    """
+    Join the parts into the file the target model field would have stored
+    and return its storage name. Raises ValidationError if the result is
+    not a valid image; check get_missing_parts() first.
+    """
+    part_count = upload.get_part_count()
+    field = get_target_field(upload)
+    storage = field.storage
+    parts = JoinedParts(get_storage(upload), [get_part_name(upload, index) for index in range(part_count)])
+    try:
+        name = storage.save(field.generate_filename(None, upload.filename), File(parts, upload.filename))
+    finally:
+        parts.close()
+    if upload.kind == 'image':
+        try:
+            verify_image(storage, name)
+        except ValidationError:
+            storage.delete(name)
+            raise
+    return name
+
+
+def delete_parts(storage, directory):
+    try:
+        names = storage.listdir(directory)[1]
+    except FileNotFoundError:
+        return
+    for name in names:
+        storage.delete(posixpath.join(directory, name))
+    try:
+        os.rmdir(storage.path(directory))
+    except (NotImplementedError, OSError):
+        pass
@@ -2,6 +2,12 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 
+from .async_views import (
+    AsyncPropertyListView,
+    AsyncPropertyDetailView,
+    AsyncRegionView,
+    AsyncReviewListView,
+)
 from .views import (
     RegisterView,
     LoginView,
@@ -13,8 +19,21 @@ from .views import (
     DistrictViewSet,
     PropertyListView,
     PropertyDetailView,
+    PropertyImportView,
+    PropertyBatchView,
+    PropertyExportView,
+    PropertyClusterView,
+    PropertyUploadCreateView,
+    PropertyUploadDetailView,
+    PropertyUploadPartView,
+    PropertyUploadCompleteView,
     ReviewListView,
     ReviewCreateView,
+    MarketStatsListView,
+    SavedSearchListView,
+    SavedSearchDetailView,
+    SavedSearchMatchListView,
+    SQLProfileView,
 
 )
 
@@ -24,7 +43,7 @@ router.register(r'cities', CityViewSet, basename='city')
 router.register(r'districts', DistrictViewSet, basename='district')
 
 urlpatterns = [
-
+    path('', include(router.urls)),
 
     path('auth/register/', RegisterView.as_view(), name='register'),
     path('auth/login/', LoginView.as_view(), name='login'),
@@ -32,11 +51,19 @@ urlpatterns = [
 
 
     path('users/', UserListAPIView.as_view(), name='user-list'),
-    path('users/me/', UserMeAPIView.as_view()),
+    path('users/me/', UserMeAPIView.as_view(), name='user-me'),
 
 
     path('properties/', PropertyListView.as_view(), name='property-list'),
     path('properties/<int:pk>/', PropertyDetailView.as_view(), name='property-detail'),
+    path('properties/import/', PropertyImportView.as_view(), name='property-import'),
+    path('properties/batch/', PropertyBatchView.as_view(), name='property-batch'),
+    path('properties/export/', PropertyExportView.as_view(), name='property-export'),
+    path('properties/clusters/', PropertyClusterView.as_view(), name='property-clusters'),
+    path('uploads/', PropertyUploadCreateView.as_view(), name='upload-create'),
+    path('uploads/<uuid:pk>/', PropertyUploadDetailView.as_view(), name='upload-detail'),
+    path('uploads/<uuid:pk>/parts/<int:index>/', PropertyUploadPartView.as_view(), name='upload-part'),
+    path('uploads/<uuid:pk>/complete/', PropertyUploadCompleteView.as_view(), name='upload-complete'),
 
 
 
@@ -44,5 +71,23 @@ urlpatterns = [
     path('reviews/create/', ReviewCreateView.as_view(), name='review-create'),
 
 
+    path('market-stats/', MarketStatsListView.as_view(), name='market-stats'),
+
+
+    path('saved-searches/', SavedSearchListView.as_view(), name='saved-search-list'),
+    path('saved-searches/<int:pk>/', SavedSearchDetailView.as_view(), name='saved-search-detail'),
+    path('saved-searches/matches/', SavedSearchMatchListView.as_view(), name='saved-search-matches'),
+
+
+    path('profiling/sql/', SQLProfileView.as_view(), name='sql-profile'),
+
+
+    path('async/properties/', AsyncPropertyListView.as_view(), name='async-property-list'),
+    path('async/properties/<int:pk>/', AsyncPropertyDetailView.as_view(), name='async-property-detail'),
+    path('async/regions/', AsyncRegionView.as_view(), name='async-region-list'),
+    path('async/regions/<int:pk>/', AsyncRegionView.as_view(), name='async-region-detail'),
+    path('async/reviews/', AsyncReviewListView.as_view(), name='async-review-list'),
+
+
 
 ]
@@ -1,13 +1,25 @@
+from datetime import timedelta
+
 from rest_framework import generics, viewsets, permissions, status
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import AllowAny
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.response import Response
-
-
-from .models import UserProfile, Region, City, District, Property, Review
+from rest_framework.parsers import MultiPartParser
+from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.db.models import Avg, Count, Min
+from django.db.models.functions import Substr
+
+
+from .models import UserProfile, Region, City, District, Property, PropertyImage, PropertyDocument, PropertyUpload, Review, MarketStats, SavedSearch, SavedSearchMatch
 from .serializers import (
     UserProfileSerializer,
     UserRegisterSerializer,
@@ -16,17 +28,39 @@ from .serializers import (
     CitySerializer,
     DistrictSerializer,
     PropertySerializer,
+    PropertyListSerializer,
+    PropertyListingSerializer,
+    PropertyClusterSerializer,
     PropertyCreateSerializer,
-    ReviewSerializer
+    ReviewSerializer,
+    MarketStatsSerializer,
+    PropertyImageSerializer,
+    PropertyDocumentSerializer,
+    PropertyUploadSerializer,
+    SavedSearchSerializer,
+    SavedSearchMatchSerializer
 )
 from .permissions import IsAdmin, IsHost, IsGuest, IsOwnerOrAdmin, IsAuthenticated
-from .pagination import PropertyPageNumberPagination
-from .filters import PropertyFilterSet
+from .pagination import PropertyPageNumberPagination, PropertyCursorPagination
+from .filters import MarketStatsFilterSet, PropertyFilterSet, PropertySearchFilter
+from .cache import GeographyCacheMixin, get_geography_version, get_property_list_state
+from .conditional import is_not_modified, make_etag, not_modified, set_validators
+from .export import EXPORT_FORMATS, iter_export
+from .facets import PropertyFacets
+from .geo import GEOHASH_PRECISION, get_zoom_precision
+from .batch import PropertyBatch, get_max_items
+from .importer import PropertyImporter, get_import_format, get_max_rows, get_max_size, read_rows
+from .parsers import CSVStreamParser, NDJSONStreamParser, OctetStreamParser
+from .uploads import assemble_upload, get_missing_parts, get_target_field, save_part
+from .profiling import profiler
+from .replicas import ReplicaReadMixin
+from .response_cache import ANY_CITY, ANY_SELLER, ResponseCacheMixin, get_property_tags
 
 
 
 class RegisterView(generics.CreateAPIView):
     serializer_class = UserRegisterSerializer
+    permission_classes = [permissions.AllowAny]
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -60,7 +94,7 @@ class LogoutView(generics.GenericAPIView):
 
 
 class UserListAPIView(generics.ListAPIView):
-    queryset = UserProfile.objects.all()
+    queryset = UserProfile.objects.select_related('seller_stats')
     serializer_class = UserProfileSerializer
     permission_classes = [IsAdmin]
 class UserMeAPIView(generics.RetrieveUpdateAPIView):
@@ -72,26 +106,26 @@ class UserMeAPIView(generics.RetrieveUpdateAPIView):
 
 
 
-class RegionViewSet(viewsets.ReadOnlyModelViewSet):
+class RegionViewSet(ReplicaReadMixin, GeographyCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Region.objects.prefetch_related('cities__districts')
     serializer_class = RegionSerializer
     permission_classes = [permissions.AllowAny]
 
 
-class CityViewSet(viewsets.ReadOnlyModelViewSet):
+class CityViewSet(ReplicaReadMixin, GeographyCacheMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = CitySerializer
     permission_classes = [permissions.AllowAny]
     search_fields = ['name']
 
     def get_queryset(self):
-        queryset = City.objects.all()
+        queryset = City.objects.prefetch_related('districts')
         region_id = self.request.query_params.get('region')
         if region_id:
             queryset = queryset.filter(region_id=region_id)
         return queryset
 
 
-class DistrictViewSet(viewsets.ReadOnlyModelViewSet):
+class DistrictViewSet(ReplicaReadMixin, GeographyCacheMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = DistrictSerializer
     permission_classes = [permissions.AllowAny]
 
@@ -104,24 +138,177 @@ class DistrictViewSet(viewsets.ReadOnlyModelViewSet):
 
 
 
-class PropertyListView(generics.ListAPIView):
-    queryset = Property.objects.select_related('region', 'city', 'district', 'seller').prefetch_related('images', 'documents')
-    serializer_class = PropertySerializer
+class PropertyListView(ResponseCacheMixin, ReplicaReadMixin, generics.ListAPIView):
+    queryset = Property.objects.select_related(
+        'region', 'city__region', 'district__city__region', 'seller__seller_stats'
+    ).prefetch_related('images', 'documents')
+    serializer_class = PropertyListSerializer
+    listing_serializer_class = PropertyListingSerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = PropertyPageNumberPagination
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter, PropertySearchFilter]
 
     filterset_class = PropertyFilterSet
     search_fields = ['title', 'description', 'address']
-    ordering_fields = ['price', 'area', 'created_at']
+    ordering_fields = ['price', 'area', 'created_at', 'seller_rating']
     ordering = ['-created_at']
-
-
-class PropertyDetailView(generics.RetrieveAPIView):
-    queryset = Property.objects.select_related('region', 'city', 'district', 'seller').prefetch_related('images', 'documents')
+    cursor_pagination_class = PropertyCursorPagination
+    pagination_mode_param = 'pagination'
+    facets_param = 'facets'
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            request = getattr(self, 'request', None)
+            if request is not None and request.query_params.get(self.pagination_mode_param) == 'cursor':
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def list(self, request, *args, **kwargs):
+        # Table-wide, so answering a conditional request never runs the filters.
+        state = get_property_list_state()
+        etag = make_etag(*state, get_geography_version(), request.get_full_path(), request.accepted_renderer.format)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+
+        queryset = self.filter_queryset(self.get_queryset())
+
+        if self.listing_serializer_class is not None:
+            queryset = self.listing_serializer_class.prepare_queryset(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_listing_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+        else:
+            serializer = self.get_listing_serializer(queryset, many=True)
+            response = Response(serializer.data)
+
+        if self.has_facets():
+            state_key = make_etag(*state, get_geography_version())
+            facets = PropertyFacets(self, request).get(state_key)
+            if isinstance(response.data, dict):
+                response.data['facets'] = facets
+            else:
+                response.data = {'results': response.data, 'facets': facets}
+        return set_validators(response, etag)
+
+    def get_response_cache_tags(self, data):
+        rows = data.get('results', []) if isinstance(data, dict) else data
+        tags = {tag for row in rows for tag in get_property_tags(row)}
+        params = self.request.query_params
+        try:
+            city_ids = {int(params['city'])} if params.get('city') else set()
+            if params.get('cities'):
+                city_ids |= {int(value) for value in params['cities'].split(',') if value}
+        except ValueError:
+            city_ids = set()
+        # Any property change can move a list that is not narrowed to cities,
+        # and the city facet counts every city whatever the list is narrowed to.
+        tags |= {f'city:{city_id}' for city_id in city_ids}
+        if not city_ids or self.has_facets():
+            tags.add(ANY_CITY)
+        if 'seller_rating' in self.get_ordering_terms():
+            tags.add(ANY_SELLER)
+        return tags
+
+    def has_facets(self):
+        return self.request.query_params.get(self.facets_param) in ('1', 'true')
+
+    def get_ordering_terms(self):
+        # The valid ?ordering= terms the list is sorted by, without direction.
+        ordering = OrderingFilter().get_ordering(self.request, self.queryset, self) or ()
+        return {term.lstrip('-') for term in ordering}
+
+    def get_listing_serializer(self, *args, **kwargs):
+        if self.listing_serializer_class is None:
+            return self.get_serializer(*args, **kwargs)
+        kwargs.setdefault('context', self.get_serializer_context())
+        return self.listing_serializer_class(*args, **kwargs)
+
+
+class PropertyExportView(PropertyListView):
+    """
+    The whole filtered list as one streamed NDJSON (default) or CSV
+    (``?output=csv``) download, accepting the same filter, search and
+    ordering parameters as PropertyListView. The rows are read from the
+    database the view is routed to, the replica when there is one.
+    """
+    output_param = 'output'
+    chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get(self.output_param, 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({self.output_param: [f'Choose one of: {", ".join(EXPORT_FORMATS)}.']})
+
+        queryset = self.filter_queryset(self.get_queryset()).select_related(None).prefetch_related(None)
+        # The body is streamed after dispatch has reset read_database; pin the alias routed now.
+        queryset = queryset.using(queryset.db)
+        response = StreamingHttpResponse(
+            iter_export(queryset, export_format, self.chunk_size),
+            content_type=f'{EXPORT_FORMATS[export_format]}; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="properties.{export_format}"'
+        return response
+
+
+class PropertyClusterView(PropertyListView):
+    """
+    Map markers: filtered properties grouped by geohash cell, sized from
+    ``?zoom=`` (map zoom level) or ``?precision=`` (geohash length), with one
+    count and centroid per cell instead of one row per property.
+    """
+
+    def get_precision(self):
+        params = self.request.query_params
+        try:
+            if 'precision' in params:
+                return max(1, min(int(params['precision']), GEOHASH_PRECISION))
+            return get_zoom_precision(params.get('zoom', 0))
+        except ValueError:
+            raise ValidationError({'zoom': ['Expected an integer.']})
+
+    def get(self, request, *args, **kwargs):
+        precision = self.get_precision()
+        queryset = self.filter_queryset(self.get_queryset()).exclude(geohash='')
+        cells = (
+            queryset.select_related(None).prefetch_related(None)
+            .annotate(cell=Substr('geohash', 1, precision))
+            .values('cell')
+            .annotate(
+                count=Count('id'), center_latitude=Avg('latitude'), center_longitude=Avg('longitude'),
+                min_price=Min('price'), first_id=Min('id'),
+            )
+            .order_by('cell')
+        )
+        serializer = PropertyClusterSerializer(cells, many=True)
+        return Response({'precision': precision, 'clusters': serializer.data})
+
+
+class PropertyDetailView(ResponseCacheMixin, ReplicaReadMixin, generics.RetrieveAPIView):
+    queryset = Property.objects.select_related(
+        'region', 'city__region', 'district__city__region', 'seller__seller_stats'
+    ).prefetch_related('images', 'documents')
     serializer_class = PropertySerializer
     permission_classes = [permissions.AllowAny]
 
+    def retrieve(self, request, *args, **kwargs):
+        updated_at = Property.objects.filter(pk=kwargs['pk']).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        geography_version = get_geography_version()
+        etag = make_etag(updated_at, geography_version, request.get_full_path(), request.accepted_renderer.format)
+        last_modified = max(int(updated_at.timestamp()), geography_version // 10 ** 9)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+        return set_validators(super().retrieve(request, *args, **kwargs), etag, last_modified)
+
+    def get_response_cache_tags(self, data):
+        return get_property_tags(data)
+
 
 class PropertyCreateView(generics.CreateAPIView):
     serializer_class = PropertyCreateSerializer
@@ -131,6 +318,137 @@ class PropertyCreateView(generics.CreateAPIView):
         serializer.save(seller=self.request.user)
 
 
+class PropertyImportView(APIView):
+    """
+    Bulk-create the caller's listings from CSV or NDJSON, sent either as the
+    raw request body (``text/csv`` / ``application/x-ndjson``) or as a
+    multipart ``file``. ``?dry_run=true`` only validates. Bodies over
+    ``PROPERTY_IMPORT_MAX_SIZE`` are refused and rows after
+    ``PROPERTY_IMPORT_MAX_ROWS`` are not imported.
+    """
+    permission_classes = [IsHost | IsAdmin]
+    parser_classes = [CSVStreamParser, NDJSONStreamParser, MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file') if request.content_type.startswith('multipart/') else None
+        if upload is not None:
+            import_format = get_import_format(upload.name, upload.content_type)
+            stream = upload.file
+        else:
+            import_format = get_import_format(content_type=request.content_type)
+            stream = request.data
+        if import_format is None or not hasattr(stream, 'read'):
+            raise ValidationError({'file': ['Send a CSV or NDJSON file.']})
+        size = upload.size if upload is not None else int(request.META.get('CONTENT_LENGTH') or 0)
+        if size > get_max_size():
+            raise ValidationError({'file': [
+                f'Import at most {get_max_size()} bytes per request; use the import_properties command for larger files.'
+            ]})
+
+        dry_run = request.query_params.get('dry_run') in ('1', 'true')
+        importer = PropertyImporter(request.user, dry_run=dry_run, max_rows=get_max_rows())
+        result = importer.run(read_rows(stream, import_format))
+        if result.invalid and not result.created:
+            response_status = status.HTTP_400_BAD_REQUEST
+        else:
+            response_status = status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED
+        return Response(result._asdict(), status=response_status)
+
+
+class PropertyBatchView(APIView):
+    """
+    Create, update and delete many of the caller's listings at once:
+    ``{"create": [...], "update": [{"id": ..., ...}], "delete": [ids]}``.
+    Either every item is applied in one transaction, or nothing is and
+    the per-item errors come back in the same order as the items.
+    """
+    permission_classes = [IsHost | IsAdmin]
+    actions = ('create', 'update', 'delete')
+
+    def post(self, request, *args, **kwargs):
+        if not isinstance(request.data, dict):
+            raise ValidationError({'non_field_errors': ['Expected an object with create/update/delete lists.']})
+        items = {}
+        for action in self.actions:
+            value = request.data.get(action, [])
+            if not isinstance(value, list):
+                raise ValidationError({action: ['Expected a list.']})
+            items[action] = value
+        if sum(map(len, items.values())) > get_max_items():
+            raise ValidationError({'non_field_errors': [f'A batch holds at most {get_max_items()} items.']})
+
+        batch = PropertyBatch(request.user, request)
+        result = batch.run(**items)
+        if result is None:
+            return Response(batch.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result._asdict())
+
+
+class PropertyUploadMixin:
+    """
+    Chunked upload of a PropertyImage or PropertyDocument: create the upload,
+    PUT its parts as ``application/octet-stream`` in any order (re-sending
+    a part replaces it), then complete it. GET lists the received parts so
+    an interrupted client can resume.
+    """
+    serializer_class = PropertyUploadSerializer
+    permission_classes = [IsHost | IsAdmin]
+
+    def get_queryset(self):
+        return PropertyUpload.objects.filter(owner=self.request.user)
+
+
+class PropertyUploadCreateView(PropertyUploadMixin, generics.CreateAPIView):
+    pass
+
+
+class PropertyUploadDetailView(PropertyUploadMixin, generics.RetrieveDestroyAPIView):
+    pass
+
+
+class PropertyUploadPartView(PropertyUploadMixin, generics.GenericAPIView):
+    parser_classes = [OctetStreamParser]
+
+    def put(self, request, *args, **kwargs):
+        upload = self.get_object()
+        index = kwargs['index']
+        if index >= upload.get_part_count():
+            raise ValidationError({'index': [f'Expected a part index below {upload.get_part_count()}.']})
+        stream = request.data
+        if not hasattr(stream, 'read'):
+            raise ValidationError({'detail': 'Send the part as an application/octet-stream body.'})
+        size = save_part(upload, index, stream)
+        upload.save(update_fields=['updated_at'])
+        return Response({'index': index, 'size': size})
+
+
+class PropertyUploadCompleteView(PropertyUploadMixin, generics.GenericAPIView):
+    targets = {
+        'image': (PropertyImage, 'image', PropertyImageSerializer),
+        'document': (PropertyDocument, 'file', PropertyDocumentSerializer),
+    }
+
+    def post(self, request, *args, **kwargs):
+        upload = get_object_or_404(self.get_queryset(), pk=kwargs['pk'])
+        missing = get_missing_parts(upload)
+        if missing:
+            return Response({'detail': 'Some parts are missing.', 'missing_parts': missing}, status=status.HTTP_400_BAD_REQUEST)
+        model, field_name, serializer_class = self.targets[upload.kind]
+        # Joining and hashing the parts can take a while; no lock is held meanwhile.
+        name = assemble_upload(upload)
+
+        with transaction.atomic():
+            # Deleting locks the row: a concurrent completion of the same upload
+            # waits here, then deletes nothing and 404s.
+            deleted, _ = upload.delete()
+            if not deleted:
+                # Shared content-addressed blobs are kept while referenced.
+                get_target_field(upload).storage.delete(name)
+                raise Http404
+            instance = model.objects.create(property_id=upload.property_id, **{field_name: name})
+        return Response(serializer_class(instance, context=self.get_serializer_context()).data, status=status.HTTP_201_CREATED)
+
+
 class PropertyUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Property.objects.all()
     serializer_class = PropertyCreateSerializer
@@ -139,12 +457,12 @@ class PropertyUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
 
 
 
-class ReviewListView(generics.ListAPIView):
+class ReviewListView(ReplicaReadMixin, generics.ListAPIView):
     serializer_class = ReviewSerializer
     permission_classes = [permissions.AllowAny]
 
     def get_queryset(self):
-        queryset = Review.objects.select_related('author', 'seller')
+        queryset = Review.objects.select_related('author__seller_stats', 'seller__seller_stats')
         seller_id = self.request.query_params.get('seller')
         if seller_id:
             queryset = queryset.filter(seller_id=seller_id)
@@ -156,4 +474,75 @@ class ReviewCreateView(generics.CreateAPIView):
     permission_classes = [IsGuest]
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            serializer.save(author=self.request.user)
+
+
+class MarketStatsListView(generics.ListAPIView):
+    """Precomputed price per m² by city, district (``district__isnull=true`` for city totals) and type."""
+    queryset = MarketStats.objects.select_related('city', 'district').order_by('city_id', 'district_id', 'property_type')
+    serializer_class = MarketStatsSerializer
+    permission_classes = [permissions.AllowAny]
+    filterset_class = MarketStatsFilterSet
+
+
+class SavedSearchListView(generics.ListCreateAPIView):
+    serializer_class = SavedSearchSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return SavedSearch.objects.filter(user=self.request.user).order_by('pk')
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class SavedSearchDetailView(generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = SavedSearchSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return SavedSearch.objects.filter(user=self.request.user)
+
+
+class SavedSearchMatchListView(generics.ListAPIView):
+    """
+    Listings matched by the caller's saved searches since they were created,
+    oldest first. Poll with ``?after=<id of the last match seen>``: each
+    request is one range scan of the (user, id) index.
+
+    Ids are handed out before commit, so a match can become visible after a
+    higher id was already returned. Matches younger than
+    ``SAVED_SEARCH_INBOX_LAG`` seconds are held back so the cursor does not
+    pass them; only a transaction running longer than that can be skipped.
+    """
+    serializer_class = SavedSearchMatchSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = []
+
+    def get_queryset(self):
+        queryset = SavedSearchMatch.objects.filter(user=self.request.user)
+        for param, lookup in (('after', 'pk__gt'), ('saved_search', 'saved_search')):
+            value = self.request.query_params.get(param)
+            if value is None:
+                continue
+            if not value.isdigit():
+                raise ValidationError({param: ['Expected an id.']})
+            queryset = queryset.filter(**{lookup: int(value)})
+        lag = getattr(settings, 'SAVED_SEARCH_INBOX_LAG', 5)
+        if lag:
+            queryset = queryset.filter(created_at__lte=timezone.now() - timedelta(seconds=lag))
+        limit = getattr(settings, 'SAVED_SEARCH_INBOX_LIMIT', 100)
+        return queryset.select_related('property').order_by('pk')[:limit]
+
+
+class SQLProfileView(APIView):
+    """Per-endpoint SQL profile gathered by SQLProfilingMiddleware in this process; DELETE resets it."""
+    permission_classes = [IsAdmin]
+
+    def get(self, request, *args, **kwargs):
+        return Response({'enabled': getattr(settings, 'SQL_PROFILING_ENABLED', False), **profiler.snapshot()})
+
+    def delete(self, request, *args, **kwargs):
+        profiler.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
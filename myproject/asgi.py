@@ -2,6 +2,8 @@
 ASGI config for myproject project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+It serves the async read views (house_app.async_views) under /<lang>/async/;
+see the web-async service in docker-compose.yml for the worker setup.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
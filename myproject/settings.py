@@ -50,10 +50,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'house_app.profiling.SQLProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'house_app.replicas.ReplicaStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     "allauth.account.middleware.AccountMiddleware",
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -91,6 +93,103 @@ DATABASES = {
     }
 }
 
+# Read replica for the read-only views (house_app.replicas). Locally, point
+# REPLICA_DATABASE_NAME at a copy of db.sqlite3, read-only as a URI:
+# REPLICA_DATABASE_NAME="file:replica.sqlite3?mode=ro". Users stay on the
+# primary for REPLICA_STICKY_SECONDS after a write; the pins are kept in the
+# REPLICA_STICKY_CACHE_ALIAS cache, which has to be shared by all workers
+# (a LocMem cache is refused at startup).
+REPLICA_DATABASE_NAME = os.getenv('REPLICA_DATABASE_NAME')
+if REPLICA_DATABASE_NAME:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': REPLICA_DATABASE_NAME,
+        'HOST': os.getenv('REPLICA_DATABASE_HOST', DATABASES['default'].get('HOST', '')),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['house_app.replicas.ReplicaRouter']
+REPLICA_DATABASE_ALIAS = 'replica'
+REPLICA_STICKY_SECONDS = 10
+REPLICA_STICKY_CACHE_ALIAS = 'shared'
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Seen by every worker (gunicorn and uvicorn); the table is created by
+    # migration 0016. Entries here are small and kept until replaced.
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'house_app_cache',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+# Region/City/District responses are cached per process under a version key.
+# The version itself lives in GEOGRAPHY_VERSION_CACHE_ALIAS, which has to be
+# shared by all workers so they send the same ETags; each worker re-reads it
+# every GEOGRAPHY_CACHE_TIMEOUT seconds, so changes made elsewhere show up by then.
+GEOGRAPHY_CACHE_ALIAS = 'default'
+GEOGRAPHY_VERSION_CACHE_ALIAS = 'shared'
+GEOGRAPHY_CACHE_TIMEOUT = 300
+
+# Property list ETags, and the facets cache below, follow the newest
+# Property.updated_at and the time of the last delete, which is kept in
+# PROPERTY_VERSION_CACHE_ALIAS; like the geography version it has to be shared.
+PROPERTY_VERSION_CACHE_ALIAS = 'shared'
+
+# ?facets=true counts for the unfiltered property list are cached per catalogue
+# state (last update and delete) for this many seconds; 0 disables.
+PROPERTY_FACETS_CACHE_TIMEOUT = 60
+
+# Anonymous property list/detail responses are kept in each process for
+# RESPONSE_CACHE_TIMEOUT seconds (0 disables), in an LRU of at most
+# RESPONSE_CACHE_MAX_ENTRIES responses and RESPONSE_CACHE_MAX_BYTES of content.
+# Changes made in this process evict the affected entries right away; other
+# processes catch up after the timeout. Responses read from the replica are
+# kept only if nothing they show changed in the last REPLICA_STICKY_SECONDS.
+RESPONSE_CACHE_TIMEOUT = 60
+RESPONSE_CACHE_MAX_ENTRIES = 1000
+RESPONSE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Thread pool rendering PropertyImage variants after upload; 0 renders them
+# inline in the saving thread (useful for tests and management commands).
+IMAGE_PROCESSING_WORKERS = 2
+
+# Upper bound on create + update + delete items in one properties/batch/ request.
+PROPERTY_BATCH_MAX_ITEMS = 1000
+
+# properties/import/ runs in the request: it refuses bodies over
+# PROPERTY_IMPORT_MAX_SIZE bytes and stops after PROPERTY_IMPORT_MAX_ROWS rows.
+# The import_properties command has no limits.
+PROPERTY_IMPORT_MAX_SIZE = 10 * 1024 * 1024
+PROPERTY_IMPORT_MAX_ROWS = 10_000
+
+# Saved searches (house_app.models.SavedSearch): at most SAVED_SEARCH_MAX_PER_USER
+# per user; one poll of saved-searches/matches/ returns up to
+# SAVED_SEARCH_INBOX_LIMIT matches, leaving out those younger than
+# SAVED_SEARCH_INBOX_LAG seconds (their transaction may not have committed).
+SAVED_SEARCH_MAX_PER_USER = 20
+SAVED_SEARCH_INBOX_LIMIT = 100
+SAVED_SEARCH_INBOX_LAG = 5
+
+# Chunked uploads (house_app.uploads): each part is one request of at most
+# CHUNKED_UPLOAD_PART_SIZE bytes, well under nginx's client_max_body_size.
+# `delete_stale_uploads` drops uploads idle for CHUNKED_UPLOAD_EXPIRY_HOURS.
+CHUNKED_UPLOAD_PART_SIZE = 8 * 1024 * 1024
+CHUNKED_UPLOAD_MAX_SIZE = 512 * 1024 * 1024
+CHUNKED_UPLOAD_EXPIRY_HOURS = 24
+
+# house_app.profiling: record query count, SQL, serialization and render time
+# and duplicate queries for SQL_PROFILING_SAMPLE_RATE of requests, per URL
+# name, in each process (see /profiling/sql/ and `sql_profile`). Off by default.
+SQL_PROFILING_ENABLED = os.getenv('SQL_PROFILING_ENABLED', '') == '1'
+SQL_PROFILING_SAMPLE_RATE = 0.1
+SQL_PROFILING_MAX_ENDPOINTS = 200
+SQL_PROFILING_MAX_QUERIES = 20
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -137,6 +236,20 @@ STATIC_URL = 'static/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+# PropertyImage.image and PropertyDocument.file are stored by content hash
+# (house_app.storage), so duplicates share one file and URLs are immutable.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'property_media': {
+        'BACKEND': 'house_app.storage.ContentAddressedStorage',
+    },
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'house_app.UserProfile'
 
@@ -144,13 +257,32 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
 
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "house_app.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # orjson first (same JSON as DRF's JSONRenderer); `Accept: application/msgpack`
+    # selects MessagePack.
+    "DEFAULT_RENDERER_CLASSES": (
+        "house_app.renderers.ORJSONRenderer",
+        "house_app.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "house_app.parsers.ORJSONParser",
+        "house_app.parsers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
+# CachedJWTAuthentication keeps up to AUTH_USER_CACHE_SIZE users per process for
+# AUTH_USER_CACHE_TIMEOUT seconds (0 disables). Changes made by another process
+# are picked up when the entry expires.
+AUTH_USER_CACHE_TIMEOUT = 30
+AUTH_USER_CACHE_SIZE = 1024
+
 AUTHENTICATION_BACKENDS = [
 
     'django.contrib.auth.backends.ModelBackend',